@@ -0,0 +1,150 @@
+"""
+Background removal of season folders with optional I/O throttling.
+
+The scan submits folders and carries on; worker threads delete them file by
+file, optionally limited to N files and/or bytes per second so a large
+removal does not saturate a disk that is also serving streams. drain()
+waits for everything queued and returns per-deletion metrics.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+
+try:
+    from app.rate_limiter import TokenBucket
+except ImportError:
+    from rate_limiter import TokenBucket
+
+
+@dataclass(frozen=True)
+class DeletionResult:
+    path: str
+    # Opaque caller context (e.g. the series and season being removed)
+    context: Any
+    files: int
+    bytes_freed: int
+    seconds: float
+    error: Optional[Exception] = None
+
+
+def _raise(error: OSError) -> None:
+    raise error
+
+
+def remove_tree(
+    path: str,
+    *,
+    files_bucket: Optional[TokenBucket] = None,
+    bytes_bucket: Optional[TokenBucket] = None,
+) -> Tuple[int, int]:
+    """shutil.rmtree() equivalent that throttles; returns (files, bytes)."""
+    if not os.path.lexists(path):
+        raise FileNotFoundError(2, "No such file or directory", path)
+    files = 0
+    freed = 0
+    for root, dirs, names in os.walk(path, topdown=False, onerror=_raise):
+        for name in names:
+            fp = os.path.join(root, name)
+            size = os.lstat(fp).st_size
+            if files_bucket is not None:
+                files_bucket.consume(1)
+            if bytes_bucket is not None:
+                bytes_bucket.consume(size)
+            os.unlink(fp)
+            files += 1
+            freed += size
+        for name in dirs:
+            dp = os.path.join(root, name)
+            if os.path.islink(dp):
+                os.unlink(dp)
+            else:
+                os.rmdir(dp)
+    os.rmdir(path)
+    return files, freed
+
+
+class DeletionQueue:
+    def __init__(
+        self,
+        workers: int = 1,
+        *,
+        files_per_second: float = 0,
+        bytes_per_second: float = 0,
+        remover: Callable[..., Tuple[int, int]] = remove_tree,
+    ) -> None:
+        # Limits are shared by all workers: they cap the total I/O rate.
+        self._files_bucket = (
+            TokenBucket(files_per_second) if files_per_second > 0 else None
+        )
+        self._bytes_bucket = (
+            TokenBucket(bytes_per_second) if bytes_per_second > 0 else None
+        )
+        self._remover = remover
+        self._queue: "queue.Queue[Optional[Tuple[int, str, Any]]]" = (
+            queue.Queue())
+        self._submitted = 0
+        self._results: List[Tuple[int, DeletionResult]] = []
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(
+                target=self._worker,
+                name=f"season-delete-{i}",
+                daemon=True,
+            )
+            for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, path: str, context: Any = None) -> None:
+        self._submitted += 1
+        self._queue.put((self._submitted, path, context))
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._delete(*job)
+            finally:
+                self._queue.task_done()
+
+    def _delete(self, seq: int, path: str, context: Any) -> None:
+        started = time.monotonic()
+        files = freed = 0
+        error: Optional[Exception] = None
+        try:
+            files, freed = self._remover(
+                path,
+                files_bucket=self._files_bucket,
+                bytes_bucket=self._bytes_bucket,
+            )
+        except Exception as e:  # keep the worker alive for the next job
+            error = e
+        result = DeletionResult(
+            path, context, files, freed, time.monotonic() - started, error)
+        with self._lock:
+            self._results.append((seq, result))
+
+    def drain(self) -> List[DeletionResult]:
+        """Wait for all queued deletions; return results finished since the
+        previous drain(), in submission order."""
+        self._queue.join()
+        with self._lock:
+            results, self._results = self._results, []
+        return [result for _, result in sorted(results, key=lambda x: x[0])]
+
+    def close(self) -> List[DeletionResult]:
+        results = self.drain()
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        return results
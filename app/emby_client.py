@@ -0,0 +1,197 @@
+"""Minimal Emby/Jellyfin REST client: library-wide and per-item refreshes.
+
+Jellyfin kept Emby's API for these calls but dropped the `/Emby` prefix
+and wants the token in an `Authorization: MediaBrowser` header.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+import httpx
+
+try:
+    from app.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+    from app.sonarr_client import RETRY_STATUS_CODES, RetryPolicy
+except ImportError:
+    from rate_limiter import AdaptiveRateLimiter, parse_retry_after
+    from sonarr_client import RETRY_STATUS_CODES, RetryPolicy
+
+MEDIA_SERVER_KINDS = ("emby", "jellyfin")
+
+
+class EmbyClientError(Exception):
+    """Raised when the Emby API returns an error or the request fails."""
+
+
+@dataclass(frozen=True)
+class MediaServer:
+    """One refresh target from the INI."""
+
+    name: str
+    url: str
+    token: str
+    kind: str = "emby"  # or "jellyfin"
+
+
+@dataclass(frozen=True)
+class RefreshResult:
+    """Outcome of refreshing one media server, for the run summary."""
+
+    name: str
+    ok: bool
+    seconds: float
+    detail: str  # what was refreshed, or the error
+
+
+def _folder_key(path: str) -> str:
+    """Series folder name, used to match Sonarr and Emby paths.
+
+    Sonarr and Emby often see the library through different mounts
+    (/tv/Show vs /mnt/media/Show), so only the last component is compared.
+    """
+    return os.path.basename(path.replace("\\", "/").rstrip("/")).casefold()
+
+
+class EmbyClient:
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        *,
+        kind: str = "emby",
+        timeout: float = 60.0,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+        session: Optional[httpx.Client] = None,
+    ) -> None:
+        """With `session`, requests share that pool and close() leaves
+        it open; otherwise the client has a pool of its own."""
+        if kind not in MEDIA_SERVER_KINDS:
+            raise ValueError(f"unknown media server kind {kind!r}")
+        self._base = base_url.rstrip("/")
+        self._limiter = rate_limiter
+        # Refreshes are safe to repeat, so POSTs are retried as well.
+        self._retry = retry or RetryPolicy(retries=0)
+        if kind == "jellyfin":
+            self._prefix = ""
+            self._params: Dict[str, str] = {}
+            self._headers = {
+                "Authorization": f'MediaBrowser Token="{api_key}"'}
+        else:
+            self._prefix = "/Emby"
+            self._params = {"api_key": api_key}
+            self._headers = {}
+        self._owns_session = session is None
+        self._session = session or httpx.Client(
+            timeout=timeout, transport=transport)
+
+    def close(self) -> None:
+        if self._owns_session:
+            self._session.close()
+
+    def __enter__(self) -> "EmbyClient":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Optional[Dict[str, str]] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send with retries on connection errors and 429/5xx."""
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                r = self._send(method, path, params=params, **kwargs)
+                r.raise_for_status()
+                return r
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                if (attempt >= self._retry.retries
+                        or status not in RETRY_STATUS_CODES):
+                    raise EmbyClientError(f"HTTP {status}") from e
+                retry_after = parse_retry_after(
+                    e.response.headers.get("Retry-After"))
+            except httpx.RequestError as e:
+                if attempt >= self._retry.retries:
+                    raise EmbyClientError(
+                        str(e) or type(e).__name__) from e
+            time.sleep(self._retry.delay(attempt, retry_after))
+            attempt += 1
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Optional[Dict[str, str]] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        if self._limiter is not None:
+            self._limiter.wait()
+        started = time.monotonic()
+        status: Optional[int] = None
+        try:
+            r = self._session.request(
+                method,
+                f"{self._base}{self._prefix}{path}",
+                params={**self._params, **(params or {})},
+                headers=self._headers,
+                **kwargs,
+            )
+            status = r.status_code
+            return r
+        finally:
+            if self._limiter is not None:
+                self._limiter.observe(time.monotonic() - started, status)
+
+    def refresh_library(self) -> None:
+        self._request("POST", "/Library/Refresh")
+
+    def series_item_ids(self, paths: Iterable[str]) -> Dict[str, str]:
+        """Map series folder paths (as Sonarr sees them) to Emby item ids.
+
+        Paths without a matching Emby series are left out.
+        """
+        wanted = {_folder_key(p): p for p in paths}
+        r = self._request(
+            "GET",
+            "/Items",
+            params={
+                "Recursive": "true",
+                "IncludeItemTypes": "Series",
+                "Fields": "Path",
+            },
+        )
+        found: Dict[str, str] = {}
+        try:
+            for item in r.json().get("Items") or ():
+                path = wanted.get(_folder_key(item.get("Path") or ""))
+                if path is not None:
+                    found[path] = str(item["Id"])
+        except (ValueError, KeyError) as e:
+            raise EmbyClientError(f"Invalid items response: {e}") from e
+        return found
+
+    def refresh_item(self, item_id: str) -> None:
+        """Rescan one item (a series and its seasons) for changes on disk."""
+        self._request(
+            "POST",
+            f"/Items/{item_id}/Refresh",
+            params={
+                "Recursive": "true",
+                "MetadataRefreshMode": "Default",
+                "ImageRefreshMode": "Default",
+            },
+        )
@@ -0,0 +1,104 @@
+"""
+Buffered run log, with optional machine-readable JSONL events.
+
+The text log keeps its format (`<timestamp> - <message>`), but the file is
+opened once per run and flushed every `flush_lines` lines or
+`flush_seconds` seconds instead of being reopened for each line. An atexit
+hook flushes whatever is buffered when the process exits, including on
+sys.exit() and uncaught exceptions. Writes are serialised by a lock, so
+several scan threads (one per Sonarr instance) can share one log.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import threading
+import time
+from datetime import datetime
+from typing import IO, Any, Callable, Optional
+
+
+class EventLog:
+    def __init__(
+        self,
+        path: str,
+        *,
+        jsonl_path: Optional[str] = None,
+        flush_lines: int = 100,
+        flush_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = path
+        self.jsonl_path = jsonl_path
+        self.flush_lines = flush_lines
+        self.flush_seconds = flush_seconds
+        self._clock = clock
+        self._log: Optional[IO[str]] = None
+        self._jsonl: Optional[IO[str]] = None
+        self._pending = 0
+        self._flushed_at = clock()
+        self._registered = False
+        self._lock = threading.RLock()
+
+    def write(self, msg: str, *, truncate: bool = False) -> None:
+        """Append `msg` (newline included by the caller) to the text log.
+
+        `truncate` starts a fresh log file, as at the start of a run.
+        """
+        with self._lock:
+            if truncate or self._log is None:
+                if self._log is not None:
+                    self._log.close()
+                self._log = open(self.path, "w" if truncate else "a")
+                self._register()
+            self._log.write(f"{datetime.now()} - {msg}")
+            self._written()
+
+    def event(self, kind: str, **fields: Any) -> None:
+        """Write one JSONL record; a no-op without a JSONL path."""
+        if self.jsonl_path is None:
+            return
+        record = {"ts": datetime.now().isoformat(), "event": kind}
+        record.update(fields)
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._jsonl is None:
+                self._jsonl = open(self.jsonl_path, "a")
+                self._register()
+            self._jsonl.write(line)
+            self._written()
+
+    def _register(self) -> None:
+        if not self._registered:
+            atexit.register(self.close)
+            self._registered = True
+
+    def _written(self) -> None:
+        self._pending += 1
+        if (
+            self._pending >= self.flush_lines
+            or self._clock() - self._flushed_at >= self.flush_seconds
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            for f in (self._log, self._jsonl):
+                if f is not None:
+                    f.flush()
+            self._pending = 0
+            self._flushed_at = self._clock()
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self.flush()
+            finally:
+                for f in (self._log, self._jsonl):
+                    if f is not None:
+                        f.close()
+                self._log = self._jsonl = None
+                if self._registered:
+                    atexit.unregister(self.close)
+                    self._registered = False
@@ -0,0 +1,97 @@
+"""
+Sorting with bounded memory: sorted runs spill to temporary files.
+
+Items are added one at a time; once `max_in_memory` items are buffered the
+run is sorted and pickled to an anonymous temp file. Iterating merges all
+runs lazily. Equal keys keep their insertion order, like list.sort().
+"""
+
+from __future__ import annotations
+
+import heapq
+import pickle
+import tempfile
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+def _read_run(f: IO[bytes]) -> Iterator[Any]:
+    f.seek(0)
+    while True:
+        try:
+            yield pickle.load(f)
+        except EOFError:
+            return
+
+
+class ExternalSorter(Generic[T]):
+    def __init__(
+        self,
+        key: Callable[[T], Any],
+        max_in_memory: int = 5000,
+        spill_dir: Optional[str] = None,
+    ) -> None:
+        self._key = key
+        self._max = max(1, max_in_memory)
+        self._spill_dir = spill_dir
+        self._buffer: List[T] = []
+        self._runs: List[IO[bytes]] = []
+
+    @property
+    def spilled_runs(self) -> int:
+        return len(self._runs)
+
+    def add(self, item: T) -> None:
+        self._buffer.append(item)
+        if len(self._buffer) >= self._max:
+            self._spill()
+
+    def extend(self, items: Iterable[T]) -> None:
+        for item in items:
+            self.add(item)
+
+    def _spill(self) -> None:
+        self._buffer.sort(key=self._key)
+        f = tempfile.TemporaryFile(dir=self._spill_dir)
+        for item in self._buffer:
+            pickle.dump(item, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._runs.append(f)
+        self._buffer = []
+
+    def __iter__(self) -> Iterator[T]:
+        self._buffer.sort(key=self._key)
+        if not self._runs:
+            yield from self._buffer
+            return
+        try:
+            streams = [_read_run(f) for f in self._runs]
+            streams.append(iter(self._buffer))
+            yield from heapq.merge(*streams, key=self._key)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        for f in self._runs:
+            f.close()
+        self._runs = []
+
+
+def sorted_spilling(
+    items: Iterable[T],
+    key: Callable[[T], Any],
+    max_in_memory: int = 5000,
+) -> Iterator[T]:
+    sorter: ExternalSorter[T] = ExternalSorter(key, max_in_memory)
+    sorter.extend(items)
+    return iter(sorter)
@@ -0,0 +1,147 @@
+"""
+Free-space target: remove due seasons only while their disk is short of
+FREE_SPACE_TARGET_GB.
+
+Sonarr's root folders are grouped by filesystem (st_dev), so two roots on
+one disk share a single target, also when they belong to different Sonarr
+instances: one FreeSpaceTarget is shared by all instance scans (threads).
+During the scan, seasons past REMOVE_SERIES_AFTER_DAYS are pushed on the
+heap of their filesystem instead of being removed. After all scans each
+heap is popped, oldest first and larger first on ties, until the free
+space plus the bytes reclaimed reaches the target. The remaining seasons
+stay for a later run, and on a disk that already has enough free space
+their sizes are not even looked up.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+
+def disk_free(path: str) -> int:
+    """Bytes available to this (unprivileged) process on path's disk."""
+    st = os.statvfs(path)
+    return st.f_bavail * st.f_frsize
+
+
+def _device(path: str) -> int:
+    return os.stat(path).st_dev
+
+
+def directory_size(path: str) -> int:
+    """Total size of the files below `path` (0 when it is missing)."""
+    total = 0
+    for root, _dirs, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+@dataclass
+class Volume:
+    """One filesystem: its free space, target and removal candidates."""
+
+    root: str  # first root folder seen on this filesystem
+    free: int
+    target: int
+    reclaimed: int = 0
+    removed: int = 0
+    held: int = 0  # due seasons left in place
+    _heap: List[Tuple[float, int, int, Any]] = field(
+        default_factory=list, repr=False)
+    _order: Iterator[int] = field(
+        default_factory=itertools.count, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def short(self) -> int:
+        """Bytes still missing to reach the target."""
+        return max(0, self.target - self.free - self.reclaimed)
+
+    def push(self, first_complete: float, size: int, item: Any) -> None:
+        with self._lock:
+            heapq.heappush(
+                self._heap, (first_complete, -size, next(self._order), item))
+
+    def hold(self) -> None:
+        """Count a due season that stays without being a candidate."""
+        with self._lock:
+            self.held += 1
+
+    def pop_needed(self) -> Iterator[Tuple[int, Any]]:
+        """(size, item) of the oldest candidates while short of the target.
+
+        The caller adds the bytes actually freed to `reclaimed` before
+        asking for the next one; the candidates left over count as held.
+        """
+        while self._heap and self.short > 0:
+            _, size, _, item = heapq.heappop(self._heap)
+            yield -size, item
+        self.held += len(self._heap)
+        self._heap = []
+
+
+class FreeSpaceTarget:
+    def __init__(
+        self,
+        roots: Iterable[str],
+        target: int,
+        *,
+        free_bytes: Callable[[str], int] = disk_free,
+        device: Callable[[str], int] = _device,
+    ) -> None:
+        self.target = target
+        self._free_bytes = free_bytes
+        self._device = device
+        self.volumes: Dict[int, Volume] = {}
+        # Due seasons whose disk could not be read (left in place)
+        self.unreadable = 0
+        # (root path, volume), longest path first for prefix matching
+        self._roots: List[Tuple[str, Volume]] = []
+        self._lock = threading.Lock()
+        self.add_roots(roots)
+
+    def add_roots(self, roots: Iterable[str]) -> None:
+        """Add root folders (of one more Sonarr instance)."""
+        with self._lock:
+            for root in roots:
+                try:
+                    volume = self._volume_at(root)
+                except OSError as e:
+                    logging.warning(f"Can't read free space of {root}: {e}")
+                    continue
+                self._roots.append((root.rstrip("/\\"), volume))
+            self._roots.sort(key=lambda entry: len(entry[0]), reverse=True)
+
+    def hold_unreadable(self) -> None:
+        """Count a due season whose disk could not be read."""
+        with self._lock:
+            self.unreadable += 1
+
+    def _volume_at(self, path: str) -> Volume:
+        dev = self._device(path)
+        volume = self.volumes.get(dev)
+        if volume is None:
+            volume = self.volumes[dev] = Volume(
+                path, self._free_bytes(path), self.target)
+        return volume
+
+    def volume_for(self, path: str) -> Volume:
+        """Volume of a series folder (outside the root folders: by stat)."""
+        with self._lock:
+            for root, volume in self._roots:
+                if path == root or path.startswith(root + os.sep):
+                    return volume
+            volume = self._volume_at(path)
+            self._roots.append((path, volume))
+            return volume
@@ -0,0 +1,102 @@
+"""
+Incremental parser for a top-level JSON array (stdlib only).
+
+Sonarr answers /api/v3/series with one large array. JsonArrayParser is fed
+the response body chunk by chunk and hands back each element as soon as it
+is complete, so only one element (plus a partial chunk) is held in memory.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    List,
+    Union,
+)
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonArrayParser:
+    """Push parser: feed() bytes or text, get back completed elements."""
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._started = False
+        self._done = False
+
+    def feed(
+        self, data: Union[bytes, str], final: bool = False
+    ) -> List[Any]:
+        if isinstance(data, bytes):
+            data = self._utf8.decode(data, final)
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        buf = self._buf
+        out: List[Any] = []
+        pos = 0
+        while not self._done:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buf):
+                break
+            ch = buf[pos]
+            if not self._started:
+                if ch != "[":
+                    raise ValueError("Expected a JSON array")
+                self._started = True
+                pos += 1
+                continue
+            if ch == "]":
+                self._done = True
+                pos += 1
+                break
+            if ch == ",":
+                pos += 1
+                continue
+            try:
+                item, end = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break  # element not complete yet
+            if end == len(buf) and not final:
+                break  # a scalar may continue in the next chunk
+            out.append(item)
+            pos = end
+        self._pos = pos
+        return out
+
+    def close(self) -> List[Any]:
+        """Flush remaining elements; raises if the array was truncated."""
+        out = self.feed(b"", final=True)
+        if not self._done:
+            raise ValueError("Truncated JSON array")
+        return out
+
+
+def iter_json_array(chunks: Iterable[Union[bytes, str]]) -> Iterator[Any]:
+    parser = JsonArrayParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def aiter_json_array(
+    chunks: AsyncIterable[Union[bytes, str]],
+) -> AsyncIterator[Any]:
+    parser = JsonArrayParser()
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
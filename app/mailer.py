@@ -0,0 +1,107 @@
+"""
+Summary mail for a prune run.
+
+The body holds the counts and only the WARNING/REMOVED lines of the run
+log; the complete log travels as a gzip attachment that is compressed
+from the file in chunks, so only the compressed copy is kept in memory.
+send_mail() is blocking but bounded by a socket timeout, so the driver runs
+it on a worker thread.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import shutil
+import smtplib
+from email.message import EmailMessage
+from typing import Callable, Iterable, List, Sequence
+
+# Log lines that are repeated in the mail body.
+SUMMARY_PREFIXES = ("PRUNE: WARNING", "PRUNE: REMOVED")
+
+
+def summary_lines(
+    log_path: str,
+    prefixes: Sequence[str] = SUMMARY_PREFIXES,
+) -> List[str]:
+    """WARNING/REMOVED lines of a run log (read line by line)."""
+    with open(log_path, "r", errors="replace") as f:
+        return [
+            line.rstrip("\n") for line in f
+            if any(p in line for p in prefixes)
+        ]
+
+
+def gzip_log(log_path: str) -> bytes:
+    """Compress the log file in chunks; returns the gzip data.
+
+    Only the compressed data is held in memory: the MIME part needs it as
+    bytes anyway, so a temporary file would just be read back in full.
+    """
+    buf = io.BytesIO()
+    with open(log_path, "rb") as src, \
+            gzip.GzipFile(fileobj=buf, mode="wb") as gz:
+        shutil.copyfileobj(src, gz)
+    return buf.getvalue()
+
+
+def build_summary_mail(
+    *,
+    sender: str,
+    receivers: Iterable[str],
+    subject: str,
+    log_path: str,
+    log_name: str,
+    removed: int,
+    notified: int,
+    details: Sequence[str] = (),
+    max_lines: int = 500,
+) -> EmailMessage:
+    """`details` are extra lines after the counts (one per instance and
+    per media server refresh)."""
+    lines = summary_lines(log_path)
+    body = [
+        "Hi,",
+        "",
+        f"Sonarr Prune removed {removed} seasons and planned "
+        f"{notified} for removal.",
+        "",
+    ]
+    if details:
+        body += list(details) + [""]
+    body.extend(lines[:max_lines])
+    if len(lines) > max_lines:
+        body.append(
+            f"... and {len(lines) - max_lines} more, see the attachment.")
+    body += ["", "The full prunelog is attached.", "", "Have a nice day."]
+
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = ", ".join(receivers)
+    message["Subject"] = subject
+    message.set_content("\n".join(body) + "\n")
+    message.add_attachment(
+        gzip_log(log_path),
+        maintype="application",
+        subtype="gzip",
+        filename=f"{log_name}.gz",
+    )
+    return message
+
+
+def send_mail(
+    message: EmailMessage,
+    *,
+    server: str,
+    port: int,
+    login: str,
+    password: str,
+    timeout: float = 30.0,
+    smtp_factory: Callable[..., smtplib.SMTP] = smtplib.SMTP,
+) -> None:
+    """STARTTLS + login + send; every socket operation obeys `timeout`."""
+    with smtp_factory(server, port, timeout=timeout) as session:
+        session.starttls()
+        session.login(login, password)
+        session.send_message(message)
@@ -0,0 +1,351 @@
+"""
+Run metrics (counters, gauges, histograms) in Prometheus text formats.
+
+The registry is rendered either as the classic text format (0.0.4), which
+node_exporter's textfile collector reads, or as OpenMetrics 1.0 for
+scrapers that ask for it. write_textfile() replaces the file atomically so
+the collector never sees a partial write; MetricsServer serves /metrics
+from a daemon thread for --daemon mode. Values are process lifetime
+totals, so a daemon's counters keep growing across runs.
+"""
+
+from __future__ import annotations
+
+import abc
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; from a single API call up to a very slow run.
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+    60.0, 300.0, 900.0, 3600.0,
+)
+
+TEXT_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = (
+    "application/openmetrics-text; version=1.0.0; charset=utf-8")
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: Sequence[str], values: Sequence[str],
+            extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {self.labelnames}, "
+                f"got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self, family: str) -> List[str]:
+        return [
+            f"# HELP {family} {_escape(self.documentation)}",
+            f"# TYPE {family} {self.kind}",
+        ]
+
+    @abc.abstractmethod
+    def render(self, openmetrics: bool = False) -> List[str]:
+        """Exposition lines of this metric family."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        if amount < 0:
+            raise ValueError("counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self, openmetrics: bool = False) -> List[str]:
+        # OpenMetrics names the family without _total, the text format
+        # uses the sample name for both.
+        sample = f"{self.name}_total"
+        lines = self._header(self.name if openmetrics else sample)
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(
+                    f"{sample}{_labels(self.labelnames, key)} "
+                    f"{_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels: object) -> Optional[float]:
+        return self._values.get(self._key(labels))
+
+    def render(self, openmetrics: bool = False) -> List[str]:
+        lines = self._header(self.name)
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(
+                    f"{self.name}{_labels(self.labelnames, key)} "
+                    f"{_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts incl. +Inf, sum)
+        self._values: Dict[LabelValues, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(
+                key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: object) -> int:
+        counts, _ = self._values.get(self._key(labels), ([0], 0.0))
+        return sum(counts)
+
+    def render(self, openmetrics: bool = False) -> List[str]:
+        lines = self._header(self.name)
+        bounds = self.buckets + (math.inf,)
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, n in zip(bounds, counts):
+                    cumulative += n
+                    le = ("le", _format_value(bound))
+                    lines.append(
+                        f"{self.name}_bucket"
+                        f"{_labels(self.labelnames, key, le)} {cumulative}")
+                labels = _labels(self.labelnames, key)
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+                lines.append(
+                    f"{self.name}_sum{labels} {_format_value(total)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self, openmetrics: bool = False) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render(openmetrics))
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Write for node_exporter's textfile collector (*.prom)."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+class MetricsServer:
+    """Serves GET /metrics on a daemon thread until close()."""
+
+    def __init__(
+        self, registry: MetricsRegistry, port: int, host: str = ""
+    ) -> None:
+        # Only daemons serve metrics; http.server is slow to import.
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                openmetrics = "application/openmetrics-text" in (
+                    self.headers.get("Accept") or "")
+                body = registry.render(openmetrics).encode()
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type",
+                    OPENMETRICS_CONTENT_TYPE if openmetrics
+                    else TEXT_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                logging.debug("metrics: " + format, *args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-http",
+            daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+class RunMetrics:
+    """The metrics of a prune run, on their own registry."""
+
+    def __init__(self) -> None:
+        self.registry = MetricsRegistry()
+        r = self.registry
+        self.runs = r.counter(
+            "sonarr_prune_runs", "Completed prune runs.")
+        self.phase_seconds = r.histogram(
+            "sonarr_prune_phase_seconds",
+            "Time spent in each phase of a run.", ["phase"])
+        self.api_seconds = r.histogram(
+            "sonarr_prune_api_request_seconds",
+            "Latency of API calls to Sonarr and Emby.", ["service"])
+        self.api_requests = r.counter(
+            "sonarr_prune_api_requests",
+            "API calls by service and HTTP status (error: no response).",
+            ["service", "status"])
+        self.seasons = r.counter(
+            "sonarr_prune_seasons",
+            "Seasons evaluated, by decision.", ["decision"])
+        self.season_seconds = r.histogram(
+            "sonarr_prune_season_seconds",
+            "Time to evaluate one season (probe, decision, actions).",
+            ["decision"])
+        self.deleted_bytes = r.counter(
+            "sonarr_prune_deleted_bytes", "Bytes freed by removals.")
+        self.deleted_files = r.counter(
+            "sonarr_prune_deleted_files", "Files deleted by removals.")
+        self.notifications = r.counter(
+            "sonarr_prune_notifications",
+            "Pushover send attempts by outcome.", ["outcome"])
+        self.notification_seconds = r.histogram(
+            "sonarr_prune_notification_seconds",
+            "Latency of Pushover sends.")
+        self.last_run = r.gauge(
+            "sonarr_prune_last_run_timestamp_seconds",
+            "End of the last run (Unix time).")
+        self.last_run_seasons = r.gauge(
+            "sonarr_prune_last_run_seasons",
+            "Seasons removed and planned for removal in the last run.",
+            ["result"])
+
+    def phase(self, name: str):
+        """Context manager timing one phase of a run."""
+        return self.phase_seconds.time(phase=name)
+
+    def api_call(
+        self, service: str, seconds: float, status: Optional[int]
+    ) -> None:
+        self.api_seconds.observe(seconds, service=service)
+        self.api_requests.inc(
+            service=service,
+            status="error" if status is None else status)
+
+    def season(self, decision: str, started: float) -> None:
+        self.seasons.inc(decision=decision)
+        self.season_seconds.observe(
+            time.perf_counter() - started, decision=decision)
+
+    def run_finished(self, removed: int, planned: int) -> None:
+        self.runs.inc()
+        self.last_run.set(time.time())
+        self.last_run_seasons.set(removed, result="removed")
+        self.last_run_seasons.set(planned, result="planned")
@@ -0,0 +1,151 @@
+"""
+Background dispatcher that batches Pushover notifications into digests.
+
+notify() only queues the message, so the scan never waits for Pushover.
+A worker thread collects messages until the queue has been quiet for
+`linger` seconds (or a full message is ready), joins them into digests
+within Pushover's message size limit and sends them through the service
+rate limiter, retrying failed sends with exponential backoff.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Iterable, List, Optional
+
+try:
+    from app.rate_limiter import AdaptiveRateLimiter
+except ImportError:
+    from rate_limiter import AdaptiveRateLimiter
+
+# Pushover rejects messages longer than 1024 characters.
+PUSHOVER_MAX_MESSAGE = 1024
+
+
+def build_digests(
+    messages: Iterable[str], max_length: int = PUSHOVER_MAX_MESSAGE
+) -> List[str]:
+    """Join messages (in order, one per line) into as few digests as fit.
+
+    A single message longer than `max_length` is truncated.
+    """
+    digests: List[str] = []
+    current = ""
+    for message in messages:
+        if len(message) > max_length:
+            message = message[:max_length - 1] + "…"
+        if not current:
+            current = message
+        elif len(current) + 1 + len(message) <= max_length:
+            current = f"{current}\n{message}"
+        else:
+            digests.append(current)
+            current = message
+    if current:
+        digests.append(current)
+    return digests
+
+
+class NotificationDispatcher:
+    def __init__(
+        self,
+        send: Callable[[str], None],
+        *,
+        limiter: Optional[AdaptiveRateLimiter] = None,
+        linger: float = 2.0,
+        max_length: int = PUSHOVER_MAX_MESSAGE,
+        retries: int = 3,
+        backoff: float = 1.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._send = send
+        self._limiter = limiter
+        self.linger = linger
+        self.max_length = max_length
+        self.retries = retries
+        self.backoff = backoff
+        self._sleep = sleep
+        self.messages = 0
+        self.sent = 0
+        self.failed = 0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="pushover-dispatch", daemon=True)
+        self._thread.start()
+
+    def notify(self, message: str) -> None:
+        """Queue a message; returns immediately."""
+        self._queue.put(("message", message))
+
+    def flush(self) -> None:
+        """Block until every queued message has been sent (or given up)."""
+        self._control("flush")
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._control("stop")
+            self._thread.join()
+
+    def _control(self, kind: str) -> None:
+        done = threading.Event()
+        self._queue.put((kind, done))
+        done.wait()
+
+    def _run(self) -> None:
+        pending: List[str] = []
+        size = 0
+        while True:
+            try:
+                kind, payload = self._queue.get(
+                    timeout=self.linger if pending else None)
+            except queue.Empty:
+                # Quiet for `linger` seconds: send what has been collected.
+                self._deliver_all(build_digests(pending, self.max_length))
+                pending, size = [], 0
+                continue
+            if kind == "message":
+                # Counted here: notify() is called from several threads.
+                self.messages += 1
+                pending.append(payload)
+                size += len(payload) + 1
+                if size > self.max_length:
+                    # Send the full digests now, keep collecting the rest.
+                    digests = build_digests(pending, self.max_length)
+                    self._deliver_all(digests[:-1])
+                    pending = digests[-1:]
+                    size = len(pending[0])
+                continue
+            self._deliver_all(build_digests(pending, self.max_length))
+            pending, size = [], 0
+            payload.set()
+            if kind == "stop":
+                return
+
+    def _deliver_all(self, digests: List[str]) -> None:
+        for digest in digests:
+            self._deliver(digest)
+
+    def _deliver(self, text: str) -> None:
+        for attempt in range(self.retries + 1):
+            if self._limiter is not None:
+                self._limiter.wait()
+            started = time.monotonic()
+            try:
+                self._send(text)
+            except Exception as e:
+                if self._limiter is not None:
+                    # Treat a failed send as throttling so spacing grows.
+                    self._limiter.observe(time.monotonic() - started, 429)
+                if attempt == self.retries:
+                    self.failed += 1
+                    logging.error(f"Pushover notification failed: {e}")
+                    return
+                self._sleep(self.backoff * 2 ** attempt)
+            else:
+                if self._limiter is not None:
+                    self._limiter.observe(time.monotonic() - started)
+                self.sent += 1
+                return
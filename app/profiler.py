@@ -0,0 +1,192 @@
+"""
+Profiling for a single prune run (`--profile`).
+
+RunProfiler runs cProfile over the run and, by wrapping a few methods of
+the pruner (and of every [SONARR:<name>] instance pruner attached to it),
+times every series: the filesystem probe, the first-complete lookup, the
+season evaluation and queueing notifications. Nothing is wrapped unless
+profiling is requested, so normal runs pay no overhead. Instance scans run
+on their own threads, each under its own cProfile, merged into one report.
+Before Python 3.12 cProfile does not see other threads, so probes on
+SCAN_WORKERS threads only show up in the per-series table.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# Per-series categories, in table order.
+CATEGORIES = ("probe", "first_complete", "evaluate", "notify")
+
+
+@dataclass
+class SeriesTiming:
+    title: str
+    year: int
+    seasons: int = 0
+    seconds: Dict[str, float] = field(
+        default_factory=lambda: dict.fromkeys(CATEGORIES, 0.0))
+
+    @property
+    def total(self) -> float:
+        # first_complete and notify happen inside evaluate
+        return self.seconds["probe"] + self.seconds["evaluate"]
+
+
+class SeriesLatency:
+    """Collects time per series and category (thread-safe)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.series: Dict[str, SeriesTiming] = {}
+
+    def add(self, serie: Any, category: str, seconds: float) -> None:
+        with self._lock:
+            timing = self.series.get(serie.path)
+            if timing is None:
+                timing = self.series[serie.path] = SeriesTiming(
+                    serie.title, serie.year)
+            timing.seconds[category] += seconds
+            if category == "evaluate":
+                timing.seasons += 1
+
+    def timed(
+        self, func: Callable[..., Any], category: str, *, per_series: bool
+    ) -> Callable[..., Any]:
+        """Wrap `func`; its first argument is the series when `per_series`,
+        otherwise time goes to the series being evaluated, if any."""
+        local = self._local
+
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            outer = getattr(local, "serie", None)
+            serie = args[0] if per_series else outer
+            local.serie = serie
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                local.serie = outer
+                if serie is not None:
+                    self.add(serie, category, elapsed)
+
+        return wrapper
+
+    def slowest(self, limit: Optional[int] = None) -> List[SeriesTiming]:
+        rows = sorted(
+            self.series.values(), key=lambda t: t.total, reverse=True)
+        return rows if limit is None else rows[:limit]
+
+    def table(self, limit: Optional[int] = None) -> str:
+        lines = [
+            f"{'total':>9} {'probe':>9} {'first':>9} {'evaluate':>9} "
+            f"{'notify':>9} {'seasons':>7}  series"
+        ]
+        for t in self.slowest(limit):
+            s = t.seconds
+            lines.append(
+                f"{t.total:>9.4f} {s['probe']:>9.4f} "
+                f"{s['first_complete']:>9.4f} {s['evaluate']:>9.4f} "
+                f"{s['notify']:>9.4f} {t.seasons:>7}  {t.title} ({t.year})"
+            )
+        return "\n".join(lines)
+
+
+class RunProfiler:
+    """Context manager around pruner.run().
+
+    Writes `<prefix>.pstats` (load with pstats or snakeviz) and
+    `<prefix>.txt` with the slowest functions and the per-series table.
+    """
+
+    # (method, category, first argument is the series)
+    WRAPPED = (
+        ("_probe_series", "probe", True),
+        ("_season_first_complete_at", "first_complete", True),
+        ("evalSeason", "evaluate", True),
+        ("_send_pushover", "notify", False),
+    )
+
+    def __init__(self, pruner: Any, prefix: str, *, top: int = 40) -> None:
+        self.pruner = pruner
+        self.prefix = prefix
+        self.top = top
+        self.latency = SeriesLatency()
+        self._profile = cProfile.Profile()
+        self._attached: List[Any] = []
+        self._lock = threading.Lock()
+        self._thread_profiles: List[cProfile.Profile] = []
+
+    def __enter__(self) -> "RunProfiler":
+        self.attach(self.pruner)
+        # The pruner attaches its instance pruners and threads through it.
+        self.pruner.profiler = self
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._profile.disable()
+        self.pruner.profiler = None
+        for pruner in self._attached:
+            for name, _, _ in self.WRAPPED:
+                # Drop the instance attribute, the class method shows again.
+                pruner.__dict__.pop(name, None)
+        self._attached = []
+        try:
+            self.write()
+        except OSError as e:
+            logging.error(f"Can't write profile {self.prefix}: {e}")
+
+    def attach(self, pruner: Any) -> None:
+        """Time the series of `pruner` too (once per run)."""
+        if any(p is pruner for p in self._attached):
+            return
+        self._attached.append(pruner)
+        for name, category, per_series in self.WRAPPED:
+            setattr(pruner, name, self.latency.timed(
+                getattr(pruner, name), category, per_series=per_series))
+
+    def in_thread(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap `func` to run under its own cProfile on a worker thread."""
+
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+: the run's profile already sees all threads.
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._lock:
+                    self._thread_profiles.append(profile)
+
+        return wrapper
+
+    def write(self) -> None:
+        out = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=out)
+        for profile in self._thread_profiles:
+            stats.add(profile)
+        stats.dump_stats(f"{self.prefix}.pstats")
+        stats.sort_stats("cumulative").print_stats(self.top)
+        with open(f"{self.prefix}.txt", "w") as f:
+            f.write("Series by time spent (seconds)\n\n")
+            f.write(self.latency.table() + "\n\n")
+            f.write(out.getvalue())
+        logging.info(
+            "Prune - Profile written to %s.pstats and %s.txt.",
+            self.prefix, self.prefix)
+        if self.latency.series:
+            logging.info(
+                "Prune - Slowest series:\n%s", self.latency.table(10))
@@ -0,0 +1,108 @@
+"""
+Calendar of upcoming prune events (warning starts and removals).
+
+Every evaluated series replaces its events; the calendar keeps them in a
+list sorted by due time so the next event and the events in a time range
+are found by bisection. It is saved as JSON next to the config, which lets
+the daemon sleep until the next event and `upcoming` list removals without
+contacting Sonarr or scanning the library.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional
+
+CALENDAR_FORMAT = 1
+
+
+@dataclass(frozen=True, order=True)
+class CalendarEvent:
+    due: float  # epoch seconds
+    kind: str  # "warn" or "remove"
+    series_path: str
+    season: int
+    title: str = field(default="", compare=False)
+    year: int = field(default=0, compare=False)
+
+
+class PruneCalendar:
+    def __init__(self, events: Iterable[CalendarEvent] = ()) -> None:
+        self._by_series: Dict[str, List[CalendarEvent]] = {}
+        for event in events:
+            self._by_series.setdefault(event.series_path, []).append(event)
+        self._sorted: Optional[List[CalendarEvent]] = None
+        self._keys: List[float] = []
+
+    def __len__(self) -> int:
+        return sum(len(events) for events in self._by_series.values())
+
+    def __iter__(self) -> Iterator[CalendarEvent]:
+        """All events in due order."""
+        return iter(self._index())
+
+    def replace_series(
+        self, series_path: str, events: Iterable[CalendarEvent]
+    ) -> None:
+        events = list(events)
+        if events:
+            self._by_series[series_path] = events
+        else:
+            self._by_series.pop(series_path, None)
+        self._sorted = None
+
+    def drop_series(self, series_path: str) -> None:
+        self.replace_series(series_path, ())
+
+    def clear(self) -> None:
+        self._by_series = {}
+        self._sorted = None
+
+    def _index(self) -> List[CalendarEvent]:
+        if self._sorted is None:
+            self._sorted = sorted(
+                e for events in self._by_series.values() for e in events)
+            self._keys = [e.due for e in self._sorted]
+        return self._sorted
+
+    def next_after(self, when: float) -> Optional[CalendarEvent]:
+        """First event due strictly after `when`."""
+        events = self._index()
+        i = bisect.bisect_right(self._keys, when)
+        return events[i] if i < len(events) else None
+
+    def between(self, start: float, end: float) -> List[CalendarEvent]:
+        """Events with start <= due < end, in due order."""
+        events = self._index()
+        lo = bisect.bisect_left(self._keys, start)
+        hi = bisect.bisect_left(self._keys, end)
+        return events[lo:hi]
+
+    def save(self, path: str) -> None:
+        raw = {
+            "format": CALENDAR_FORMAT,
+            "events": [asdict(e) for e in self._index()],
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(raw, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "PruneCalendar":
+        """Saved calendar, or an empty one when missing or unreadable."""
+        try:
+            with open(path, "r") as f:
+                raw = json.load(f)
+            if raw.get("format") != CALENDAR_FORMAT:
+                return cls()
+            return cls(CalendarEvent(**e) for e in raw["events"])
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+            logging.warning(f"Ignoring unreadable prune calendar {path}: {e}")
+            return cls()
@@ -0,0 +1,165 @@
+"""
+Adaptive rate limiting for outbound API calls (Sonarr, Pushover, Emby),
+plus a plain token bucket for throttling local work such as deletions.
+
+Only real requests are throttled: callers invoke wait() right before a call
+and observe() right after it. The delay between calls starts at the
+configured minimum, grows when a service answers slowly or with 429/503,
+and decays back once responses are fast again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+# Status codes that mean "you are calling too often / I am overloaded".
+THROTTLE_STATUS_CODES = frozenset({429, 503})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveRateLimiter:
+    """Spaces out calls to one service and adapts to its responses."""
+
+    def __init__(
+        self,
+        min_interval: float = 0.0,
+        max_interval: float = 5.0,
+        *,
+        slow_latency: float = 2.0,
+        initial_backoff: float = 0.25,
+        backoff_factor: float = 2.0,
+        recovery_factor: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        observer: Optional[Callable[[float, Optional[int]], None]] = None,
+    ) -> None:
+        self.min_interval = max(0.0, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self.slow_latency = slow_latency
+        self.initial_backoff = initial_backoff
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self._clock = clock
+        self._sleep = sleep
+        # Called with (latency, status) for every observed call (metrics)
+        self._observer = observer
+        self._interval = self.min_interval
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self) -> float:
+        """Current spacing between calls, in seconds."""
+        return self._interval
+
+    def reserve(self) -> float:
+        """Claim the next call slot; returns how long the caller must wait."""
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next_at)
+            self._next_at = start + self._interval
+            return start - now
+
+    def wait(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            self._sleep(delay)
+
+    async def wait_async(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def observe(
+        self,
+        latency: float,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """Feed back the outcome of a call to adjust the spacing."""
+        if self._observer is not None:
+            self._observer(latency, status_code)
+        with self._lock:
+            throttled = status_code in THROTTLE_STATUS_CODES
+            if throttled or latency >= self.slow_latency:
+                grown = max(
+                    self._interval * self.backoff_factor,
+                    self.initial_backoff,
+                )
+                if throttled and retry_after is not None:
+                    # Capped, so a huge Retry-After cannot stall the run.
+                    retry_after = min(retry_after, self.max_interval)
+                    grown = max(grown, retry_after)
+                    # Honour the server's hint for the very next call too.
+                    self._next_at = max(
+                        self._next_at, self._clock() + retry_after
+                    )
+                self._interval = min(grown, self.max_interval)
+                return
+
+            shrunk = self._interval * self.recovery_factor
+            if shrunk < self.initial_backoff:
+                shrunk = self.min_interval
+            self._interval = max(self.min_interval, shrunk)
+
+
+class TokenBucket:
+    """Fixed-rate throttle (e.g. files or bytes per second), thread-safe.
+
+    Requests larger than the capacity are allowed; the caller simply waits
+    until the rate has paid for them.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: float = 1.0) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+            wait = 0.0
+            if self._tokens < amount:
+                wait = (amount - self._tokens) / self.rate
+            self._tokens -= amount
+        if wait > 0:
+            self._sleep(wait)
@@ -0,0 +1,144 @@
+"""
+Schedules for daemon mode: a fixed interval or a 5-field cron expression.
+
+Cron fields are `minute hour day-of-month month day-of-week` with `*`,
+lists, ranges and steps (`*/15`, `1-5`, `0,30`). Day-of-week is 0-7 with
+both 0 and 7 meaning Sunday. As in Vixie cron, when both day fields are
+restricted a day matching either one is used.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, FrozenSet, Tuple
+
+# (low, high) per cron field
+_FIELDS: Tuple[Tuple[int, int], ...] = (
+    (0, 59),  # minute
+    (0, 23),  # hour
+    (1, 31),  # day of month
+    (1, 12),  # month
+    (0, 7),   # day of week
+)
+
+
+def _parse_field(text: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"invalid step in {text!r}")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            a, b = part.split("-", 1)
+            start, end = int(a), int(b)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"{text!r} is out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class IntervalSchedule:
+    def __init__(self, seconds: float) -> None:
+        if seconds <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = timedelta(seconds=seconds)
+
+    def next_after(self, when: datetime) -> datetime:
+        return when + self.interval
+
+    def __repr__(self) -> str:
+        return f"every {self.interval}"
+
+
+class CronSchedule:
+    def __init__(self, expression: str) -> None:
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(
+                f"cron expression needs 5 fields, got {expression!r}")
+        self.expression = expression
+        (
+            self.minutes,
+            self.hours,
+            self.days,
+            self.months,
+            weekdays,
+        ) = (
+            _parse_field(text, low, high)
+            for text, (low, high) in zip(parts, _FIELDS)
+        )
+        # cron Sunday is 0 (or 7), Python's weekday() Sunday is 6
+        self.weekdays = frozenset((d - 1) % 7 for d in weekdays)
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    def _day_matches(self, when: datetime) -> bool:
+        day = when.day in self.days
+        weekday = when.weekday() in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, when: datetime) -> datetime:
+        """First matching minute strictly after `when`."""
+        t = when.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1) + timedelta(days=32)).replace(
+                    day=1, hour=0, minute=0)
+            elif not self._day_matches(t):
+                t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+            elif t.hour not in self.hours:
+                t = (t + timedelta(hours=1)).replace(minute=0)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"cron expression never fires: {self.expression!r}")
+
+    def __repr__(self) -> str:
+        return f"cron '{self.expression}'"
+
+
+def run_forever(
+    job: Callable[[], None],
+    next_run: Callable[[datetime], datetime],
+    stop: threading.Event,
+    *,
+    now: Callable[[], datetime] = datetime.now,
+    run_immediately: bool = True,
+) -> int:
+    """Call `job` on schedule until `stop` is set; returns the run count.
+
+    `next_run` is looked up again after every run, so a reloaded config can
+    change the schedule. Errors from a run are logged, not raised; a run in
+    progress always finishes before stopping.
+    """
+    runs = 0
+    if not run_immediately:
+        wait = (next_run(now()) - now()).total_seconds()
+        stop.wait(max(0.0, wait))
+    while not stop.is_set():
+        try:
+            job()
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                logging.error(f"Prune run exited with status {e.code}.")
+        except Exception:
+            logging.exception("Prune run failed.")
+        runs += 1
+        due = next_run(now())
+        logging.info(f"Prune - Next run at {due:%Y-%m-%d %H:%M:%S}.")
+        stop.wait(max(0.0, (due - now()).total_seconds()))
+    return runs
@@ -0,0 +1,226 @@
+"""
+Filesystem probe for season folders and their "first complete" marker.
+
+The probe is the blocking part of evaluating a season. Each series folder
+is listed once with os.scandir to find its `Season N`/`Specials` folders;
+only complete seasons then cost one stat of their marker (plus a create
+when the marker is new). Probes have no logging or notifications so they
+can run on a worker pool; the driver applies the results in library order.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+try:
+    from app.sonarr_prune_logic import season_directory_name
+except ImportError:
+    from sonarr_prune_logic import season_directory_name
+
+# Number of series whose seasons are probed together before being evaluated.
+SCAN_BATCH_SIZE = 100
+
+
+@dataclass(frozen=True)
+class SeasonProbe:
+    # mtime of the marker file, None when the season is not tracked
+    first_complete_at: Optional[datetime] = None
+    # True when the marker was created by this probe (season just completed)
+    created: bool = False
+    # Timestamp to add to the state index (indexed probes only)
+    store_timestamp: Optional[float] = None
+    # The index has a time for a season that is gone or incomplete; drop
+    # it, as a marker would have gone with its folder
+    forget: bool = False
+
+
+class ProbeStats:
+    """Filesystem calls made by probes (thread-safe, for verbose logging)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.seasons = 0
+        self.scandir = 0
+        self.stat = 0
+        self.create = 0
+        # Calls the old per-season isdir/isfile/stat probe would have made
+        self.per_season_equivalent = 0
+
+    @property
+    def calls(self) -> int:
+        return self.scandir + self.stat + self.create
+
+    def add(
+        self,
+        *,
+        seasons: int = 0,
+        scandir: int = 0,
+        stat: int = 0,
+        create: int = 0,
+        per_season_equivalent: int = 0,
+    ) -> None:
+        with self._lock:
+            self.seasons += seasons
+            self.scandir += scandir
+            self.stat += stat
+            self.create += create
+            self.per_season_equivalent += per_season_equivalent
+
+    def summary(self) -> str:
+        return (
+            f"{self.seasons} seasons probed with {self.calls} filesystem "
+            f"calls ({self.scandir} scandir, {self.stat} stat, "
+            f"{self.create} create); a per-season probe needs "
+            f"{self.per_season_equivalent}"
+        )
+
+
+def _season_folders(series_path: str) -> Optional[Set[str]]:
+    """Names of sub-directories of a series folder.
+
+    Empty when the folder is missing; None when it cannot be read (e.g. no
+    permission), which is treated like an empty folder except that indexed
+    first-complete times are kept.
+    """
+    try:
+        with os.scandir(series_path) as it:
+            return {e.name for e in it if e.is_dir()}
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+    except OSError:
+        return None
+
+
+def probe_series(
+    series_path: str,
+    seasons: Sequence[Any],
+    marker: str,
+    *,
+    index: Optional[Mapping[Tuple[str, int], float]] = None,
+    write_marker: bool = True,
+    stats: Optional[ProbeStats] = None,
+) -> List[SeasonProbe]:
+    """Probe all seasons of one series; one SeasonProbe per season.
+
+    With an `index`, known seasons take their time from it and do not touch
+    the marker at all. Unknown seasons import an existing marker's mtime or
+    start now; a new marker is written unless `write_marker` is False.
+    Indexed seasons whose folder is gone or that are incomplete again are
+    flagged `forget`.
+    """
+    if not seasons:
+        return []
+    folders = _season_folders(series_path)
+    readable = folders is not None
+    if folders is None:
+        folders = set()
+    n_stat = n_create = 0
+    legacy = len(seasons)  # one isdir per season
+    out: List[SeasonProbe] = []
+    for season in seasons:
+        name = season_directory_name(season.seasonNumber)
+        if (
+            name not in folders
+            or season.totalEpisodeCount != season.episodeFileCount
+        ):
+            out.append(SeasonProbe(forget=(
+                readable
+                and index is not None
+                and (series_path, season.seasonNumber) in index
+            )))
+            continue
+        legacy += 2  # isfile + stat
+        if index is not None:
+            known = index.get((series_path, season.seasonNumber))
+            if known is not None:
+                out.append(SeasonProbe(datetime.fromtimestamp(known)))
+                continue
+
+        fc_path = os.path.join(series_path, name, marker)
+        created = False
+        n_stat += 1
+        try:
+            ts = os.stat(fc_path).st_mtime
+        except FileNotFoundError:
+            created = True
+            if index is None or write_marker:
+                open(fc_path, "w").close()
+                n_create += 1
+                n_stat += 1
+                legacy += 1
+                ts = os.stat(fc_path).st_mtime
+            else:
+                ts = time.time()
+        out.append(SeasonProbe(
+            datetime.fromtimestamp(ts),
+            created,
+            ts if index is not None else None,
+        ))
+    if stats is not None:
+        stats.add(
+            seasons=len(out),
+            scandir=1,
+            stat=n_stat,
+            create=n_create,
+            per_season_equivalent=legacy,
+        )
+    return out
+
+
+def probe_season(series_path: str, season: Any, marker: str) -> SeasonProbe:
+    """Look up (and create if needed) the marker of a complete season."""
+    return probe_series(series_path, [season], marker)[0]
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class SeasonScanner:
+    """Runs probes on a bounded thread pool, results in input order.
+
+    `probe` is called with one job (e.g. a series) on the worker threads.
+    """
+
+    def __init__(self, probe: Callable[[Any], Any], workers: int) -> None:
+        self.probe = probe
+        self.workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="season-scan",
+        )
+
+    def probe_many(self, jobs: List[Any]) -> List[Any]:
+        return list(self._pool.map(self.probe, jobs))
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> "SeasonScanner":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
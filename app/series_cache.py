@@ -0,0 +1,222 @@
+"""
+On-disk cache of Sonarr listings (series, tags) between runs.
+
+Each listing is stored as a stream of pickled records plus a small JSON
+meta file with the fetch time and validators (ETag, Last-Modified, SHA-256
+of the response body). Within the TTL the cache is used without contacting
+Sonarr; after it, the listing is revalidated with a conditional request and
+only rewritten when the content actually changed. A run that removed
+seasons expires the series entry, so the next run sees the new counts.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Iterable, Iterator, Optional
+
+# Bump when the pickled record classes change shape.
+CACHE_FORMAT = 4
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.hits} hit(s), {self.revalidated} revalidated, "
+            f"{self.misses} miss(es)"
+        )
+
+
+@dataclass(frozen=True)
+class CacheMeta:
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    sha256: Optional[str] = None
+    count: int = 0
+
+
+def _read_records(path: str) -> Iterator[Any]:
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+class CacheWriter:
+    """Writes records to a temp file that replaces the entry on commit."""
+
+    def __init__(self, cache: "SnapshotCache", name: str) -> None:
+        self._cache = cache
+        self._name = name
+        fd, self._tmp = tempfile.mkstemp(
+            dir=cache.directory, prefix=f".{name}.", suffix=".tmp")
+        self._f: IO[bytes] = os.fdopen(fd, "wb")
+        self.count = 0
+
+    def add(self, record: Any) -> None:
+        pickle.dump(record, self._f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.count += 1
+
+    def commit(self, meta: CacheMeta) -> None:
+        self._f.close()
+        os.replace(self._tmp, self._cache.data_path(self._name))
+        self._cache.save_meta(self._name, meta)
+
+    def discard(self) -> None:
+        self._f.close()
+        try:
+            os.remove(self._tmp)
+        except FileNotFoundError:
+            pass
+
+
+class SnapshotCache:
+    def __init__(
+        self,
+        directory: str,
+        ttl_seconds: float,
+        *,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._clock = clock
+        os.makedirs(directory, exist_ok=True)
+
+    def data_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.pickle")
+
+    def meta_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.meta.json")
+
+    def load_meta(self, name: str) -> Optional[CacheMeta]:
+        """Meta of a usable entry, or None (missing, corrupt, old format)."""
+        try:
+            with open(self.meta_path(name), "r") as f:
+                raw = json.load(f)
+            if raw.pop("format", None) != CACHE_FORMAT:
+                return None
+            meta = CacheMeta(**raw)
+        except (OSError, ValueError, TypeError):
+            return None
+        if not os.path.isfile(self.data_path(name)):
+            return None
+        return meta
+
+    def save_meta(self, name: str, meta: CacheMeta) -> None:
+        raw = dict(meta.__dict__, format=CACHE_FORMAT)
+        tmp = self.meta_path(name) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(raw, f)
+        os.replace(tmp, self.meta_path(name))
+
+    def is_fresh(self, meta: CacheMeta) -> bool:
+        return self._clock() - meta.fetched_at < self.ttl_seconds
+
+    def touch(self, name: str, meta: CacheMeta) -> CacheMeta:
+        """Mark an entry as revalidated now."""
+        fresh = CacheMeta(
+            fetched_at=self._clock(),
+            etag=meta.etag,
+            last_modified=meta.last_modified,
+            sha256=meta.sha256,
+            count=meta.count,
+        )
+        self.save_meta(name, fresh)
+        return fresh
+
+    def expire(self, name: str) -> None:
+        """Make the next use revalidate the entry (e.g. after removals)."""
+        meta = self.load_meta(name)
+        if meta is not None and meta.fetched_at:
+            self.save_meta(name, CacheMeta(
+                fetched_at=0.0,
+                etag=meta.etag,
+                last_modified=meta.last_modified,
+                sha256=meta.sha256,
+                count=meta.count,
+            ))
+
+    def records(self, name: str) -> Iterator[Any]:
+        return _read_records(self.data_path(name))
+
+    def writer(self, name: str) -> CacheWriter:
+        return CacheWriter(self, name)
+
+    def store(self, name: str, records: Iterable[Any]) -> CacheMeta:
+        writer = self.writer(name)
+        try:
+            for record in records:
+                writer.add(record)
+        except BaseException:
+            writer.discard()
+            raise
+        meta = CacheMeta(fetched_at=self._clock(), count=writer.count)
+        writer.commit(meta)
+        return meta
+
+    def cached_series(self, client: Any) -> Iterator[Any]:
+        """Series from cache, revalidating against Sonarr when stale."""
+        name = "series"
+        meta = self.load_meta(name)
+        if meta is not None and self.is_fresh(meta):
+            self.stats.hits += 1
+            return self.records(name)
+
+        kwargs = {}
+        if meta is not None:
+            kwargs = {"etag": meta.etag, "last_modified": meta.last_modified}
+        with client.series_snapshot(**kwargs) as snapshot:
+            if snapshot.not_modified and meta is not None:
+                self.touch(name, meta)
+                self.stats.revalidated += 1
+                return self.records(name)
+
+            writer = self.writer(name)
+            try:
+                for serie in snapshot:
+                    writer.add(serie)
+            except BaseException:
+                writer.discard()
+                raise
+
+        if meta is not None and meta.sha256 == snapshot.sha256:
+            # Same body as last time: keep the existing file.
+            writer.discard()
+            self.touch(name, meta)
+            self.stats.revalidated += 1
+        else:
+            writer.commit(CacheMeta(
+                fetched_at=self._clock(),
+                etag=snapshot.etag,
+                last_modified=snapshot.last_modified,
+                sha256=snapshot.sha256,
+                count=writer.count,
+            ))
+            self.stats.misses += 1
+        return self.records(name)
+
+    def cached_list(
+        self, name: str, fetch: Callable[[], Iterable[Any]]
+    ) -> Iterator[Any]:
+        """Small listing (e.g. tags): reuse within the TTL, else refetch."""
+        meta = self.load_meta(name)
+        if meta is not None and self.is_fresh(meta):
+            self.stats.hits += 1
+            return self.records(name)
+        self.store(name, fetch())
+        self.stats.misses += 1
+        return self.records(name)
@@ -2,11 +2,36 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import random
+import time
+from collections import deque
 from dataclasses import dataclass
-from typing import Any, List
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Collection,
+    Deque,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+)
 
 import httpx
 
+try:
+    from app.json_stream import aiter_json_array, iter_json_array
+    from app.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+except ImportError:
+    from json_stream import aiter_json_array, iter_json_array
+    from rate_limiter import AdaptiveRateLimiter, parse_retry_after
+
 
 class SonarrClientError(Exception):
     """Raised when the Sonarr API returns an error or the request fails."""
@@ -23,21 +48,151 @@ class Tag:
     label: str
 
 
-@dataclass(frozen=True)
+# Series/Season are held for the whole library (10k+ series), so they are
+# slotted (no per-instance __dict__) and the parser stores tuples rather
+# than over-allocated lists.
+@dataclass(frozen=True, slots=True)
 class Season:
     seasonNumber: int
     totalEpisodeCount: int
     episodeFileCount: int
+    sizeOnDisk: int = 0
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Series:
     sortTitle: str
     title: str
     year: int
     path: str
-    tagsIds: List[int]
-    seasons: List[Season]
+    tagsIds: Sequence[int]
+    seasons: Sequence[Season]
+    id: int = 0
+
+
+@dataclass(frozen=True)
+class EpisodeFile:
+    id: int
+    seasonNumber: int
+    size: int = 0
+
+
+@dataclass(frozen=True)
+class RequestTiming:
+    method: str
+    path: str
+    status_code: Optional[int]
+    seconds: float
+
+
+# Transient statuses worth retrying for idempotent requests.
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Episode files per DELETE /api/v3/episodefile/bulk request.
+EPISODE_FILE_BATCH_SIZE = 100
+
+# Latest requests kept in a client's `timings` (clients live for a daemon).
+TIMINGS_KEPT = 1000
+
+
+@dataclass(frozen=True)
+class SonarrInstance:
+    """Connection settings of one Sonarr server from the INI."""
+
+    # None for the [SONARRDV] section, else the <name> of [SONARR:<name>]
+    name: Optional[str]
+    url: str
+    token: str
+    max_connections: int = 10
+    http2: bool = False
+    retries: int = 3
+    retry_backoff: float = 0.5
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Jittered exponential backoff for idempotent requests."""
+
+    retries: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 8.0
+
+    def delay(
+        self, attempt: int, retry_after: Optional[float] = None
+    ) -> float:
+        """Full-jitter delay before retry number `attempt` (0-based)."""
+        cap = min(self.max_backoff, self.backoff * (2 ** attempt))
+        wait = random.uniform(0, cap)
+        if retry_after is not None:
+            wait = max(wait, min(retry_after, self.max_backoff))
+        return wait
+
+    def should_retry(
+        self,
+        method: str,
+        attempt: int,
+        status_code: Optional[int],
+    ) -> bool:
+        if attempt >= self.retries or method not in IDEMPOTENT_METHODS:
+            return False
+        return status_code is None or status_code in RETRY_STATUS_CODES
+
+
+def _parse_root_folders(raw: Any) -> List[RootFolder]:
+    return [RootFolder(path=str(r["path"])) for r in raw]
+
+
+def _parse_tags(raw: Any) -> List[Tag]:
+    return [Tag(id=int(t["id"]), label=str(t["label"])) for t in raw]
+
+
+def _parse_season(se: Mapping[str, Any]) -> Season:
+    stats = se.get("statistics") or {}
+    return Season(
+        seasonNumber=int(se["seasonNumber"]),
+        totalEpisodeCount=int(stats.get("totalEpisodeCount", 0)),
+        episodeFileCount=int(stats.get("episodeFileCount", 0)),
+        sizeOnDisk=int(stats.get("sizeOnDisk", 0)),
+    )
+
+
+def _parse_series(s: Mapping[str, Any]) -> Series:
+    title = s.get("title") or ""
+    return Series(
+        sortTitle=str(s.get("sortTitle") or title),
+        title=str(title),
+        year=int(s.get("year") or 0),
+        path=str(s.get("path") or ""),
+        tagsIds=tuple(int(x) for x in (s.get("tags") or ())),
+        seasons=tuple(_parse_season(se) for se in s.get("seasons") or ()),
+        id=int(s.get("id") or 0),
+    )
+
+
+def _parse_episode_files(raw: Any) -> List[EpisodeFile]:
+    return [
+        EpisodeFile(
+            id=int(f["id"]),
+            seasonNumber=int(f.get("seasonNumber", 0)),
+            size=int(f.get("size") or 0),
+        )
+        for f in raw
+    ]
+
+
+def _status_error(e: httpx.HTTPStatusError) -> SonarrClientError:
+    body = ""
+    if e.response is not None and e.response.text:
+        body = f" — {e.response.text[:500]}"
+    return SonarrClientError(f"HTTP {e.response.status_code}{body}")
+
+
+def _headers(api_key: str) -> dict:
+    return {
+        "X-Api-Key": api_key,
+        "Content-Type": "application/json",
+    }
 
 
 class SonarrClient:
@@ -49,15 +204,19 @@ class SonarrClient:
         api_key: str,
         *,
         timeout: float = 60.0,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+        transport: Optional[httpx.BaseTransport] = None,
     ) -> None:
         self._base = base_url.rstrip("/")
         self._timeout = timeout
+        self._limiter = rate_limiter
+        self._retry = retry or RetryPolicy()
+        self.timings: Deque[RequestTiming] = deque(maxlen=TIMINGS_KEPT)
         self._session = httpx.Client(
             timeout=timeout,
-            headers={
-                "X-Api-Key": api_key,
-                "Content-Type": "application/json",
-            },
+            headers=_headers(api_key),
+            transport=transport,
         )
         self._verify_connection()
 
@@ -66,20 +225,70 @@ class SonarrClient:
             path = "/" + path
         return f"{self._base}{path}"
 
-    def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+    def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        stream: bool = False,
+        accept: Collection[int] = (),
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send with retries; with stream=True the caller closes the body.
+
+        Statuses in `accept` (e.g. 304) are returned instead of raised.
+        """
+        attempt = 0
+        while True:
+            try:
+                r = self._send(method, path, stream=stream, **kwargs)
+                if r.status_code in accept:
+                    return r
+                r.raise_for_status()
+                return r
+            except httpx.HTTPStatusError as e:
+                if stream:
+                    e.response.read()
+                    e.response.close()
+                status = e.response.status_code
+                if not self._retry.should_retry(method, attempt, status):
+                    raise _status_error(e) from e
+                retry_after = parse_retry_after(
+                    e.response.headers.get("Retry-After"))
+            except httpx.RequestError as e:
+                if not self._retry.should_retry(method, attempt, None):
+                    raise SonarrClientError(str(e)) from e
+                retry_after = None
+            time.sleep(self._retry.delay(attempt, retry_after))
+            attempt += 1
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        *,
+        stream: bool = False,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        if self._limiter is not None:
+            self._limiter.wait()
+        started = time.monotonic()
+        status: Optional[int] = None
         try:
-            r = self._session.request(method, self._url(path), **kwargs)
-            r.raise_for_status()
+            request = self._session.build_request(
+                method, self._url(path), **kwargs)
+            r = self._session.send(request, stream=stream)
+            status = r.status_code
             return r
-        except httpx.HTTPStatusError as e:
-            body = ""
-            if e.response is not None and e.response.text:
-                body = f" — {e.response.text[:500]}"
-            raise SonarrClientError(
-                f"HTTP {e.response.status_code}{body}"
-            ) from e
-        except httpx.RequestError as e:
-            raise SonarrClientError(str(e)) from e
+        finally:
+            elapsed = time.monotonic() - started
+            self.timings.append(RequestTiming(method, path, status, elapsed))
+            if self._limiter is not None:
+                retry_after = None
+                if status is not None:
+                    retry_after = parse_retry_after(
+                        r.headers.get("Retry-After"))
+                self._limiter.observe(elapsed, status, retry_after)
 
     def _get_json(self, path: str) -> Any:
         return self._request("GET", path).json()
@@ -87,37 +296,270 @@ class SonarrClient:
     def _verify_connection(self) -> None:
         self._get_json("/api/v3/system/status")
 
+    def close(self) -> None:
+        self._session.close()
+
     def root_folder(self) -> List[RootFolder]:
-        raw = self._get_json("/api/v3/rootfolder")
-        return [RootFolder(path=str(r["path"])) for r in raw]
+        return _parse_root_folders(self._get_json("/api/v3/rootfolder"))
 
     def all_tags(self) -> List[Tag]:
-        raw = self._get_json("/api/v3/tag")
-        return [Tag(id=int(t["id"]), label=str(t["label"])) for t in raw]
+        return _parse_tags(self._get_json("/api/v3/tag"))
+
+    def command(self, name: str, **body: Any) -> None:
+        """Queue a Sonarr command, e.g. RefreshSeries (not retried)."""
+        self._request("POST", "/api/v3/command", json={"name": name, **body})
 
     def all_series(self) -> List[Series]:
-        raw = self._get_json("/api/v3/series")
-        out: List[Series] = []
-        for s in raw:
-            seasons: List[Season] = []
-            for se in s.get("seasons") or []:
-                stats = se.get("statistics") or {}
-                seasons.append(
-                    Season(
-                        seasonNumber=int(se["seasonNumber"]),
-                        totalEpisodeCount=int(stats.get("totalEpisodeCount", 0)),
-                        episodeFileCount=int(stats.get("episodeFileCount", 0)),
-                    )
-                )
-            title = s.get("title") or ""
-            out.append(
-                Series(
-                    sortTitle=str(s.get("sortTitle") or title),
-                    title=str(title),
-                    year=int(s.get("year") or 0),
-                    path=str(s.get("path") or ""),
-                    tagsIds=[int(x) for x in (s.get("tags") or [])],
-                    seasons=seasons,
-                )
+        return list(self.iter_series())
+
+    def iter_series(self) -> Iterator[Series]:
+        """Yield series one by one while the response is still arriving."""
+        with self.series_snapshot() as snapshot:
+            yield from snapshot
+
+    def episode_files(self, series_id: int) -> List[EpisodeFile]:
+        return _parse_episode_files(
+            self._get_json(f"/api/v3/episodefile?seriesId={series_id}"))
+
+    def delete_episode_files(
+        self,
+        ids: Sequence[int],
+        *,
+        batch_size: int = EPISODE_FILE_BATCH_SIZE,
+        on_batch: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """Delete episode files (and their media) through Sonarr.
+
+        Uses the bulk endpoint in batches of `batch_size`, so Sonarr updates
+        its own database and no library rescan is needed afterwards.
+        `on_batch` is called with the number of files deleted so far after
+        each batch, so a caller can account for them if a later one fails.
+        Returns the number of files deleted.
+        """
+        deleted = 0
+        for start in range(0, len(ids), max(1, batch_size)):
+            batch = list(ids[start:start + max(1, batch_size)])
+            self._request(
+                "DELETE",
+                "/api/v3/episodefile/bulk",
+                json={"episodeFileIds": batch},
             )
-        return out
+            deleted += len(batch)
+            if on_batch is not None:
+                on_batch(deleted)
+        return deleted
+
+    def series_snapshot(
+        self,
+        *,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> "SeriesSnapshot":
+        """Streamed series listing, conditional when validators are given."""
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        r = self._request(
+            "GET", "/api/v3/series",
+            stream=True, accept=(304,), headers=headers,
+        )
+        return SeriesSnapshot(r)
+
+
+class SeriesSnapshot:
+    """An open /api/v3/series response plus its cache validators.
+
+    Iterating parses series incrementally and hashes the raw body, so a
+    caller can tell an unchanged library apart even without ETags.
+    """
+
+    def __init__(self, response: httpx.Response) -> None:
+        self._response = response
+        self._hash = hashlib.sha256()
+        self.not_modified = response.status_code == 304
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+
+    @property
+    def sha256(self) -> str:
+        """Digest of the body read so far (complete after iteration)."""
+        return self._hash.hexdigest()
+
+    def _chunks(self) -> Iterator[bytes]:
+        for chunk in self._response.iter_bytes():
+            self._hash.update(chunk)
+            yield chunk
+
+    def __iter__(self) -> Iterator[Series]:
+        if self.not_modified:
+            return
+        try:
+            for raw in iter_json_array(self._chunks()):
+                yield _parse_series(raw)
+        except httpx.RequestError as e:
+            raise SonarrClientError(str(e)) from e
+        except ValueError as e:
+            raise SonarrClientError(f"Invalid series response: {e}") from e
+
+    def close(self) -> None:
+        self._response.close()
+
+    def __enter__(self) -> "SeriesSnapshot":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class AsyncSonarrClient:
+    """Async counterpart of SonarrClient on a pooled `httpx.AsyncClient`.
+
+    Use as `async with AsyncSonarrClient(...) as client:`; entering the
+    context verifies the connection unless `verify=False`.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        *,
+        timeout: float = 60.0,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 5,
+        http2: bool = False,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        verify: bool = True,
+    ) -> None:
+        self._base = base_url.rstrip("/")
+        self._limiter = rate_limiter
+        self._retry = retry or RetryPolicy()
+        self._verify = verify
+        self.timings: Deque[RequestTiming] = deque(maxlen=TIMINGS_KEPT)
+        if http2 and not _http2_available():
+            logging.warning(
+                "HTTP/2 requested for Sonarr but the 'h2' package is not "
+                "installed; using HTTP/1.1.")
+            http2 = False
+        self._session = httpx.AsyncClient(
+            timeout=timeout,
+            headers=_headers(api_key),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            http2=http2,
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "AsyncSonarrClient":
+        if self._verify:
+            try:
+                await self._verify_connection()
+            except BaseException:
+                await self.aclose()
+                raise
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._session.aclose()
+
+    def _url(self, path: str) -> str:
+        if not path.startswith("/"):
+            path = "/" + path
+        return f"{self._base}{path}"
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        stream: bool = False,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                r = await self._send(method, path, stream=stream, **kwargs)
+                r.raise_for_status()
+                return r
+            except httpx.HTTPStatusError as e:
+                if stream:
+                    await e.response.aread()
+                    await e.response.aclose()
+                status = e.response.status_code
+                if not self._retry.should_retry(method, attempt, status):
+                    raise _status_error(e) from e
+                retry_after = parse_retry_after(
+                    e.response.headers.get("Retry-After"))
+            except httpx.RequestError as e:
+                if not self._retry.should_retry(method, attempt, None):
+                    raise SonarrClientError(str(e)) from e
+                retry_after = None
+            await asyncio.sleep(self._retry.delay(attempt, retry_after))
+            attempt += 1
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        *,
+        stream: bool = False,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        if self._limiter is not None:
+            await self._limiter.wait_async()
+        started = time.monotonic()
+        status: Optional[int] = None
+        try:
+            request = self._session.build_request(
+                method, self._url(path), **kwargs)
+            r = await self._session.send(request, stream=stream)
+            status = r.status_code
+            return r
+        finally:
+            elapsed = time.monotonic() - started
+            self.timings.append(RequestTiming(method, path, status, elapsed))
+            if self._limiter is not None:
+                retry_after = None
+                if status is not None:
+                    retry_after = parse_retry_after(
+                        r.headers.get("Retry-After"))
+                self._limiter.observe(elapsed, status, retry_after)
+
+    async def _get_json(self, path: str) -> Any:
+        return (await self._request("GET", path)).json()
+
+    async def _verify_connection(self) -> None:
+        await self._get_json("/api/v3/system/status")
+
+    async def root_folder(self) -> List[RootFolder]:
+        return _parse_root_folders(await self._get_json("/api/v3/rootfolder"))
+
+    async def all_tags(self) -> List[Tag]:
+        return _parse_tags(await self._get_json("/api/v3/tag"))
+
+    async def all_series(self) -> List[Series]:
+        return [s async for s in self.iter_series()]
+
+    async def iter_series(self) -> AsyncIterator[Series]:
+        r = await self._request("GET", "/api/v3/series", stream=True)
+        try:
+            async for raw in aiter_json_array(r.aiter_bytes()):
+                yield _parse_series(raw)
+        except httpx.RequestError as e:
+            raise SonarrClientError(str(e)) from e
+        except ValueError as e:
+            raise SonarrClientError(f"Invalid series response: {e}") from e
+        finally:
+            await r.aclose()
@@ -7,10 +7,11 @@ decide_season_prune(). Side effects (delete, log, notify) stay outside.
 
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Iterable, List, Mapping, Optional, Sequence
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Tuple
 
 
 class SeasonActionKind(Enum):
@@ -89,6 +90,145 @@ def decide_season_prune(
     return SeasonDecision(SeasonActionKind.ACTIVE)
 
 
+# Batch evaluation works on integer microseconds of the same naive clock
+# the scalar function uses, so both give identical results (no float
+# rounding, and DST is handled exactly like naive datetime subtraction).
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_US_PER_DAY = 86_400_000_000
+
+
+def datetime_to_us(dt: datetime) -> int:
+    """Naive datetime -> microseconds on the clock used by the batch API."""
+    return (dt - _EPOCH) // _MICROSECOND
+
+
+@dataclass(frozen=True)
+class BatchDecisions:
+    kinds: List[SeasonActionKind]
+    # Microseconds until removal for WARN entries, None otherwise
+    time_until_removal_us: List[Optional[int]]
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def decision(self, index: int) -> SeasonDecision:
+        """The SeasonDecision decide_season_prune() would return."""
+        left = self.time_until_removal_us[index]
+        return SeasonDecision(
+            self.kinds[index],
+            None if left is None else timedelta(microseconds=left),
+        )
+
+
+def decide_season_prune_batch(
+    now: datetime,
+    first_complete_us: Sequence[Optional[int]],
+    *,
+    remove_after_days: int,
+    warn_days_infront: int,
+) -> BatchDecisions:
+    """
+    decide_season_prune() for many seasons in one pass.
+
+    first_complete_us holds datetime_to_us() values (None = no date). All
+    thresholds are computed once; per season only integer comparisons run.
+    """
+    now_us = datetime_to_us(now)
+    remove_after = remove_after_days * _US_PER_DAY
+    warn_infront = warn_days_infront * _US_PER_DAY
+    warn_floor = warn_infront - _US_PER_DAY
+
+    noop = SeasonActionKind.NOOP
+    active = SeasonActionKind.ACTIVE
+    warn = SeasonActionKind.WARN
+    remove = SeasonActionKind.REMOVE
+
+    kinds: List[SeasonActionKind] = []
+    lefts: List[Optional[int]] = []
+    for sd in first_complete_us:
+        if sd is None:
+            kinds.append(noop)
+            lefts.append(None)
+            continue
+        age = now_us - sd
+        left = sd + remove_after - now_us
+        if remove_after > age and warn_floor < left <= warn_infront:
+            kinds.append(warn)
+            lefts.append(left)
+        elif age >= remove_after:
+            kinds.append(remove)
+            lefts.append(None)
+        else:
+            kinds.append(active)
+            lefts.append(None)
+    return BatchDecisions(kinds, lefts)
+
+
+def series_fingerprint(serie: Any, settings: Sequence[Any] = ()) -> str:
+    """Digest of everything a series' decisions depend on besides time.
+
+    Covers the path, tags and per-season statistics, plus `settings` (the
+    prune rules in effect), so a change to any of them forces a new
+    evaluation.
+    """
+    seasons = sorted(
+        (s.seasonNumber, s.totalEpisodeCount, s.episodeFileCount)
+        for s in serie.seasons
+    )
+    data = repr((
+        serie.path, sorted(serie.tagsIds), seasons, tuple(settings)))
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def season_event_times(
+    first_complete_at: datetime,
+    *,
+    remove_after_days: int,
+    warn_days_infront: int,
+) -> List[Tuple[SeasonActionKind, datetime]]:
+    """(kind, when) for the season's WARN start and REMOVE eligibility.
+
+    These are the instants at which decide_season_prune() changes its answer
+    for the season; no WARN event exists when warn_days_infront is 0.
+    """
+    remove_at = first_complete_at + timedelta(days=remove_after_days)
+    events = []
+    if warn_days_infront > 0:
+        events.append((
+            SeasonActionKind.WARN,
+            remove_at - timedelta(days=warn_days_infront),
+        ))
+    events.append((SeasonActionKind.REMOVE, remove_at))
+    return events
+
+
+def series_next_due(
+    first_complete_at: Iterable[Optional[datetime]],
+    *,
+    remove_after_days: int,
+    warn_days_infront: int,
+) -> Optional[datetime]:
+    """Earliest time a tracked season of the series leaves ACTIVE.
+
+    Before that time (and with an unchanged fingerprint) every season keeps
+    its decision, so the series does not need to be evaluated. None when no
+    season is tracked yet.
+    """
+    due: Optional[datetime] = None
+    for sd in first_complete_at:
+        if sd is None:
+            continue
+        for _kind, at in season_event_times(
+            sd,
+            remove_after_days=remove_after_days,
+            warn_days_infront=warn_days_infront,
+        ):
+            if due is None or at < due:
+                due = at
+    return due
+
+
 def format_warning_time_left(time_left: timedelta) -> str:
     """Same formatting as legacy script ('h' between hours and minutes)."""
     return "h".join(str(time_left).split(":")[:2])
@@ -4,41 +4,86 @@
 # update: 2024-03-09 22:14:00
 
 import argparse
+import asyncio
+import functools
+import importlib
+import itertools
 import logging
 import configparser
+import re
 import sys
 import shutil
-import smtplib
 import os
 import httpx
+import signal
+import threading
 import time
 
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from chump import Application
-
 try:
-    from app.sonarr_client import SonarrClient, SonarrClientError
+    from app.event_log import EventLog
+    from app.metrics import MetricsServer, RunMetrics
+    from app.prune_calendar import CalendarEvent, PruneCalendar
+    from app.rate_limiter import AdaptiveRateLimiter
+    from app.season_scan import (
+        SCAN_BATCH_SIZE,
+        ProbeStats,
+        SeasonScanner,
+        batched,
+        probe_series,
+    )
+    from app.sonarr_client import (
+        AsyncSonarrClient,
+        RetryPolicy,
+        SonarrClient,
+        SonarrClientError,
+        SonarrInstance,
+    )
     from app.sonarr_prune_logic import (
         SeasonActionKind,
+        datetime_to_us,
         decide_season_prune,
+        decide_season_prune_batch,
         format_warning_time_left,
         resolve_keep_tag_ids,
         season_directory_name,
+        season_event_times,
+        series_fingerprint,
+        series_next_due,
         series_should_keep,
     )
 except ImportError:
-    from sonarr_client import SonarrClient, SonarrClientError
+    from event_log import EventLog
+    from metrics import MetricsServer, RunMetrics
+    from prune_calendar import CalendarEvent, PruneCalendar
+    from rate_limiter import AdaptiveRateLimiter
+    from season_scan import (
+        SCAN_BATCH_SIZE,
+        ProbeStats,
+        SeasonScanner,
+        batched,
+        probe_series,
+    )
+    from sonarr_client import (
+        AsyncSonarrClient,
+        RetryPolicy,
+        SonarrClient,
+        SonarrClientError,
+        SonarrInstance,
+    )
     from sonarr_prune_logic import (
         SeasonActionKind,
+        datetime_to_us,
         decide_season_prune,
+        decide_season_prune_batch,
         format_warning_time_left,
         resolve_keep_tag_ids,
         season_directory_name,
+        season_event_times,
+        series_fingerprint,
+        series_next_due,
         series_should_keep,
     )
 from socket import gaierror
@@ -49,9 +94,27 @@ except ImportError:
     from version import __version__
 
 
+def _app_module(name):
+    """Import a sibling module on first use.
+
+    Optional integrations (mail, Emby, profiling) and the modules behind
+    optional features (state database, snapshot cache, sorting, deletion
+    queue, free-space target, Pushover queue, daemon schedule) are only
+    loaded when they are enabled, which keeps the start of a cron run
+    short.
+    """
+    return importlib.import_module(
+        f"{__package__}.{name}" if __package__ else name)
+
+
+def _instance_slug(name):
+    """File name safe form of a [SONARR:<name>] name."""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+
+
 class SONARRPRUNE():
 
-    def __init__(self, config_path=None):
+    def __init__(self, config_path=None, daemon=False, instance=None):
         logging.basicConfig(
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             level=logging.INFO)
@@ -74,6 +137,56 @@ class SONARRPRUNE():
         else:
             self.config_filePath = f"{config_dir}{self.config_file}"
         self.log_filePath = f"{log_dir}{self.log_file}"
+        # Cache lives next to the config file (/config/cache by default)
+        self.cache_dir = os.path.join(
+            os.path.dirname(self.config_filePath), "cache")
+        self.state_db_path = os.path.join(
+            os.path.dirname(self.config_filePath), "sonarr_prune_state.db")
+        # Opened by run() when STATE_DB is enabled
+        self.state_store = None
+        self._state_index = None
+        self.probe_stats = ProbeStats()
+        # Created by run() when DELETE_WORKERS > 0
+        self.deletion_queue = None
+        # Seasons to delete through the Sonarr API (REMOVE_MODE = api)
+        self._api_removals = []
+        # Series with removed seasons (path -> Series), refreshed at the end
+        self.touched_series = {}
+        # Background Pushover sender, started by run()
+        self.notifier = None
+        # Buffered run log, opened on first write
+        self.event_log = None
+        # Incremental runs (INCREMENTAL = ON), opened by run()
+        self.series_state = None
+        self._series_index = {}
+        self._fingerprint_settings = ()
+        self.series_evaluated = 0
+        self.series_skipped = 0
+        # Upcoming warnings/removals, kept next to the config file
+        self.calendar_path = os.path.join(
+            os.path.dirname(self.config_filePath), "prune_calendar.json")
+        self.calendar = None
+        # Free space per disk and removal candidates (FREE_SPACE_TARGET_GB)
+        self.free_space = None
+        # httpx transports for the Sonarr and media server clients (fakes
+        # in tests and benchmarks)
+        self.sonarr_transport = None
+        self.media_transport = None
+        # Counters and timings; a daemon hands them on across reloads
+        self.metrics = RunMetrics()
+        # Kept between runs in daemon mode (warm connection pools); the
+        # async client for the sorted fetch keeps its event loop too.
+        self.sonarrNode = None
+        self._async_sonarr = None
+        self._async_runner = None
+        self._emby_clients = {}
+        self._media_session = None
+        # [SONARR:<name>] pruners (name -> SONARRPRUNE), see run()
+        self.instance_name = None
+        self._instance_pruners = {}
+        self._scanned = []
+        # RunProfiler of the current run (--profile), see profiled_run()
+        self.profiler = None
 
         try:
             if not os.path.isfile(self.config_filePath):
@@ -95,6 +208,16 @@ class SONARRPRUNE():
                     'SONARRDV', 'TOKEN', fallback=''
                 )
 
+                self.sonarrdv_max_connections = self.config.getint(
+                    'SONARRDV', 'MAX_CONNECTIONS', fallback=10
+                )
+                self.sonarrdv_retries = self.config.getint(
+                    'SONARRDV', 'RETRIES', fallback=3
+                )
+                self.sonarrdv_retry_backoff = self.config.getfloat(
+                    'SONARRDV', 'RETRY_BACKOFF', fallback=0.5
+                )
+
                 def _cfg_boolean(section, option, fallback=False):
                     """Robust boolean parser that accepts ON/OFF as well as
                     true/false/1/0. ConfigParser.getboolean already supports
@@ -112,23 +235,65 @@ class SONARRPRUNE():
                         v = str(raw).strip().lower()
                         return v in ("1", "true", "yes", "on")
 
-                # EMBY1
-                self.emby_enabled1 = _cfg_boolean('EMBY1', 'ENABLED', False)
-                self.emby_url1 = self.config.get(
-                    'EMBY1', 'URL', fallback=''
-                )
-                self.emby_token1 = self.config.get(
-                    'EMBY1', 'TOKEN', fallback=''
+                self.sonarrdv_http2 = _cfg_boolean(
+                    'SONARRDV', 'HTTP2', False
                 )
 
-                # EMBY2
-                self.emby_enabled2 = _cfg_boolean('EMBY2', 'ENABLED', False)
-                self.emby_url2 = self.config.get(
-                    'EMBY2', 'URL', fallback=''
-                )
-                self.emby_token2 = self.config.get(
-                    'EMBY2', 'TOKEN', fallback=''
-                )
+                # SONARR:<name>: more Sonarr servers, scanned concurrently
+                # with [SONARRDV] (if enabled) in one run
+                self.sonarr_instances = []
+                for section in self.config.sections():
+                    if not section.startswith('SONARR:'):
+                        continue
+                    if not _cfg_boolean(section, 'ENABLED', True):
+                        continue
+                    name = section.split(':', 1)[1].strip()
+                    url = self.config.get(section, 'URL', fallback='')
+                    if not name or not url:
+                        raise ValueError(f"[{section}] needs a name and URL")
+                    self.sonarr_instances.append(SonarrInstance(
+                        name=name,
+                        url=url,
+                        token=self.config.get(section, 'TOKEN', fallback=''),
+                        max_connections=self.config.getint(
+                            section, 'MAX_CONNECTIONS',
+                            fallback=self.sonarrdv_max_connections),
+                        http2=_cfg_boolean(
+                            section, 'HTTP2', self.sonarrdv_http2),
+                        retries=self.config.getint(
+                            section, 'RETRIES',
+                            fallback=self.sonarrdv_retries),
+                        retry_backoff=self.config.getfloat(
+                            section, 'RETRY_BACKOFF',
+                            fallback=self.sonarrdv_retry_backoff),
+                    ))
+
+                # EMBY1, EMBY2, EMBY:<name>, JELLYFIN:<name>: media
+                # servers refreshed (concurrently) after a run
+                self.media_servers = []
+                for section in self.config.sections():
+                    if section in ('EMBY1', 'EMBY2'):
+                        kind, name = 'emby', section.capitalize()
+                        enabled = _cfg_boolean(section, 'ENABLED', False)
+                    elif section.startswith(('EMBY:', 'JELLYFIN:')):
+                        kind, name = section.split(':', 1)
+                        kind, name = kind.lower(), name.strip()
+                        enabled = _cfg_boolean(section, 'ENABLED', True)
+                    else:
+                        continue
+                    if not enabled:
+                        continue
+                    url = self.config.get(section, 'URL', fallback='')
+                    if not name or not url:
+                        raise ValueError(f"[{section}] needs a name and URL")
+                    self.media_servers.append(
+                        _app_module("emby_client").MediaServer(
+                            name=name,
+                            url=url,
+                            token=self.config.get(
+                                section, 'TOKEN', fallback=''),
+                            kind=kind,
+                        ))
 
                 # PRUNE
                 self.remove_after_days = self.config.getint(
@@ -152,6 +317,8 @@ class SONARRPRUNE():
                 self.verbose_logging = _cfg_boolean(
                     'PRUNE', 'VERBOSE_LOGGING', False
                 )
+                # Also write decisions as JSON lines next to the log file
+                self.jsonl_log = _cfg_boolean('PRUNE', 'JSONL_LOG', False)
                 self.mail_enabled = _cfg_boolean(
                     'PRUNE', 'MAIL_ENABLED', False
                 )
@@ -179,6 +346,95 @@ class SONARRPRUNE():
                 self.mail_receiver = [
                     r.strip() for r in raw_receivers.split(',') if r.strip()
                 ]
+                # Seconds per SMTP operation before the mail is given up
+                self.mail_timeout = self.config.getfloat(
+                    'PRUNE', 'MAIL_TIMEOUT', fallback=30.0
+                )
+                # Outbound API throttling (Sonarr, Pushover, Emby)
+                self.api_min_interval = self.config.getfloat(
+                    'PRUNE', 'API_MIN_INTERVAL', fallback=0.0
+                )
+                self.api_max_interval = self.config.getfloat(
+                    'PRUNE', 'API_MAX_INTERVAL', fallback=5.0
+                )
+                self.api_slow_latency = self.config.getfloat(
+                    'PRUNE', 'API_SLOW_LATENCY', fallback=2.0
+                )
+                # Sort series by title; spill to disk past the threshold
+                self.sort_series = _cfg_boolean(
+                    'PRUNE', 'SORT_SERIES', True
+                )
+                self.sort_spill_threshold = self.config.getint(
+                    'PRUNE', 'SORT_SPILL_THRESHOLD', fallback=5000
+                )
+                # Local snapshot of the Sonarr series/tag listings
+                self.cache_enabled = _cfg_boolean(
+                    'PRUNE', 'CACHE_ENABLED', False
+                )
+                self.cache_ttl_minutes = self.config.getfloat(
+                    'PRUNE', 'CACHE_TTL_MINUTES', fallback=60.0
+                )
+                # Seasons per batch above which decisions are vectorised
+                self.batch_decide_min_seasons = self.config.getint(
+                    'PRUNE', 'BATCH_DECIDE_MIN_SEASONS', fallback=200
+                )
+                # First-complete times in a SQLite index instead of markers
+                self.state_db_enabled = _cfg_boolean(
+                    'PRUNE', 'STATE_DB', False
+                )
+                self.write_marker_files = _cfg_boolean(
+                    'PRUNE', 'WRITE_MARKER_FILES', True
+                )
+                # Skip series unchanged since the previous run
+                self.incremental = _cfg_boolean(
+                    'PRUNE', 'INCREMENTAL', False
+                )
+                self.full_sweep_hours = self.config.getfloat(
+                    'PRUNE', 'FULL_SWEEP_HOURS', fallback=24.0
+                )
+                # Threads probing season folders; 1 keeps the serial scan
+                self.scan_workers = self.config.getint(
+                    'PRUNE', 'SCAN_WORKERS', fallback=1
+                )
+                # Background season removal; 0 deletes inline during the scan
+                self.delete_workers = self.config.getint(
+                    'PRUNE', 'DELETE_WORKERS', fallback=0
+                )
+                self.delete_files_per_second = self.config.getfloat(
+                    'PRUNE', 'DELETE_FILES_PER_SECOND', fallback=0.0
+                )
+                self.delete_mb_per_second = self.config.getfloat(
+                    'PRUNE', 'DELETE_MB_PER_SECOND', fallback=0.0
+                )
+                # filesystem: rmtree + refresh; api: Sonarr deletes the files
+                self.remove_mode = self.config.get(
+                    'PRUNE', 'REMOVE_MODE', fallback='filesystem'
+                ).strip().lower()
+                if self.remove_mode not in ('filesystem', 'api'):
+                    logging.warning(
+                        f"Unknown REMOVE_MODE '{self.remove_mode}', "
+                        f"using filesystem."
+                    )
+                    self.remove_mode = 'filesystem'
+                # Above this many touched series, refresh whole libraries
+                self.refresh_full_threshold = self.config.getint(
+                    'PRUNE', 'REFRESH_FULL_THRESHOLD', fallback=25
+                )
+                # Above 0, due seasons are only removed (oldest first)
+                # while their disk has less free space than this
+                self.free_space_target_gb = self.config.getfloat(
+                    'PRUNE', 'FREE_SPACE_TARGET_GB', fallback=0.0
+                )
+                # Media server refreshes: a dead server fails fast
+                self.refresh_connect_timeout = self.config.getfloat(
+                    'PRUNE', 'REFRESH_CONNECT_TIMEOUT', fallback=5.0
+                )
+                self.refresh_timeout = self.config.getfloat(
+                    'PRUNE', 'REFRESH_TIMEOUT', fallback=30.0
+                )
+                self.refresh_retries = self.config.getint(
+                    'PRUNE', 'REFRESH_RETRIES', fallback=2
+                )
 
                 # PUSHOVER
                 self.pushover_enabled = _cfg_boolean(
@@ -193,6 +449,45 @@ class SONARRPRUNE():
                 self.pushover_sound = self.config.get(
                     'PUSHOVER', 'SOUND', fallback=''
                 )
+                # Messages arriving within this many seconds share a digest
+                self.pushover_digest_seconds = self.config.getfloat(
+                    'PUSHOVER', 'DIGEST_SECONDS', fallback=2.0
+                )
+
+                # DAEMON (--daemon): CRON wins over INTERVAL_MINUTES
+                self.daemon_cron = self.config.get(
+                    'DAEMON', 'CRON', fallback=''
+                ).strip()
+                self.daemon_interval_minutes = self.config.getfloat(
+                    'DAEMON', 'INTERVAL_MINUTES', fallback=60.0
+                )
+                # Also wake up when a season's warning/removal is due
+                self.daemon_wake_for_due = _cfg_boolean(
+                    'DAEMON', 'WAKE_FOR_DUE_SEASONS', True
+                )
+
+                # METRICS: OpenMetrics textfile (node_exporter) and/or an
+                # HTTP endpoint in daemon mode
+                self.metrics_textfile = self.config.get(
+                    'METRICS', 'TEXTFILE', fallback=''
+                ).strip()
+                self.metrics_port = self.config.getint(
+                    'METRICS', 'PORT', fallback=0
+                )
+                self.metrics_address = self.config.get(
+                    'METRICS', 'ADDRESS', fallback=''
+                ).strip()
+
+                # Only --daemon runs on it; a bad CRON must not stop a
+                # one-shot run.
+                self.daemon_schedule = None
+                if daemon and self.daemon_cron:
+                    self.daemon_schedule = _app_module(
+                        "scheduler").CronSchedule(self.daemon_cron)
+                elif daemon:
+                    self.daemon_schedule = _app_module(
+                        "scheduler").IntervalSchedule(
+                            self.daemon_interval_minutes * 60)
 
             except KeyError as e:
                 logging.error(
@@ -221,101 +516,448 @@ class SONARRPRUNE():
                             f'{config_dir}{self.exampleconfigfile}')
             sys.exit()
 
-    def trigger_database_update_emby(self, base_url: str, api_key: str, name: str):
-        url = f"{base_url}/Emby/Library/Refresh?api_key={api_key}"
-        response = httpx.post(url, data={}, headers={}, timeout=60.0)
-        if response.status_code == 204:
-            logging.info(
-                f"Database update triggered successfully for {name}.")
-        else:
-            logging.error(
-                f"Failed to trigger database update for {name}. Status code: "
-                f"{response.status_code}")
+        # One limiter per service so a slow Sonarr does not delay Pushover.
+        self.sonarr_limiter = self._make_limiter("sonarr")
+        self.pushover_limiter = self._make_limiter()
+        if instance is not None:
+            self._use_instance(instance)
+
+    def _use_instance(self, instance):
+        """Prune `instance` with its own client, state files and calendar."""
+        self.instance_name = instance.name
+        self.sonarrdv_enabled = True
+        self.sonarrdv_url = instance.url
+        self.sonarrdv_token = instance.token
+        self.sonarrdv_max_connections = instance.max_connections
+        self.sonarrdv_http2 = instance.http2
+        self.sonarrdv_retries = instance.retries
+        self.sonarrdv_retry_backoff = instance.retry_backoff
+        if instance.name is None:
+            return
+        self.sonarr_limiter = self._make_limiter(f"sonarr:{instance.name}")
+        self.state_db_path = self._instance_path(
+            self.state_db_path, instance.name)
+        self.calendar_path = self._instance_path(
+            self.calendar_path, instance.name)
+        self.cache_dir = os.path.join(
+            self.cache_dir, _instance_slug(instance.name))
+
+    def _make_limiter(self, service=None):
+        """Limiter for one service; calls to `service` feed the metrics."""
+        def observe(seconds, status):
+            self.metrics.api_call(service, seconds, status)
+
+        return AdaptiveRateLimiter(
+            self.api_min_interval,
+            self.api_max_interval,
+            slow_latency=self.api_slow_latency,
+            observer=None if service is None else observe,
+        )
+
+    def _emby_client(self, server):
+        """Client for one media server, reused across daemon runs.
+
+        All servers share one connection pool with a short connect
+        timeout, so an unreachable server fails within seconds.
+        """
+        if self._media_session is None:
+            self._media_session = httpx.Client(
+                timeout=httpx.Timeout(
+                    self.refresh_timeout,
+                    connect=self.refresh_connect_timeout,
+                ),
+                transport=self.media_transport,
+            )
+        if server not in self._emby_clients:
+            self._emby_clients[server] = _app_module("emby_client").EmbyClient(
+                server.url,
+                server.token,
+                kind=server.kind,
+                rate_limiter=self._make_limiter(
+                    f"{server.kind}:{server.name}"),
+                retry=RetryPolicy(
+                    retries=self.refresh_retries,
+                    backoff=self.sonarrdv_retry_backoff,
+                ),
+                session=self._media_session,
+            )
+        return self._emby_clients[server]
+
+    def close(self):
+        """Close the HTTP clients kept between runs."""
+        for pruner in self._instance_pruners.values():
+            pruner.close()
+        if self.sonarrNode is not None:
+            self.sonarrNode.close()
+            self.sonarrNode = None
+        if self._async_runner is not None:
+            self._async_runner.run(self._async_sonarr.aclose())
+            self._async_runner.close()
+            self._async_sonarr = self._async_runner = None
+        for client in self._emby_clients.values():
+            client.close()
+        self._emby_clients = {}
+        if self._media_session is not None:
+            self._media_session.close()
+            self._media_session = None
+
+    def refresh_media_server(self, server, series_paths=None):
+        """Refresh the items of `series_paths`, or the whole library.
+
+        Falls back to a library refresh when a series is not found on the
+        server. Returns a RefreshResult; errors are reported, not raised.
+        """
+        emby_client = _app_module("emby_client")
+        name = server.name
+        started = time.perf_counter()
+        try:
+            emby = self._emby_client(server)
+            detail = "library"
+            if series_paths:
+                item_ids = emby.series_item_ids(series_paths)
+                if len(item_ids) == len(series_paths):
+                    for item_id in item_ids.values():
+                        emby.refresh_item(item_id)
+                    detail = f"{len(item_ids)} series"
+                else:
+                    logging.info(
+                        f"{len(series_paths) - len(item_ids)} series not "
+                        f"found in {name}, refreshing the whole library.")
+            if detail == "library":
+                emby.refresh_library()
+        except emby_client.EmbyClientError as e:
+            return emby_client.RefreshResult(
+                name, False, time.perf_counter() - started, str(e))
+        return emby_client.RefreshResult(
+            name, True, time.perf_counter() - started, detail)
 
     # Trigger a database update in Sonarr
-    def trigger_database_update_sonarr(self):
-        headers = {
-            'X-Api-Key': self.sonarrdv_token,
-            'Content-Type': 'application/json'
-            }
-        payload = {'name': 'refreshseries'}
-        endpoint = "/api/v3/command"
+    def trigger_database_update_sonarr(self, series_ids=None):
+        """RefreshSeries for `series_ids`, or for every series if None."""
+        if series_ids is None:
+            payloads = [{'name': 'refreshseries'}]
+        else:
+            payloads = [
+                {'name': 'RefreshSeries', 'seriesId': series_id}
+                for series_id in series_ids
+            ]
 
         if self.sonarrdv_enabled:
-            response = httpx.post(
-                self.sonarrdv_url + endpoint,
-                json=payload,
-                headers=headers,
-                timeout=60.0,
-            )
+            # Over the pooled client; its limiter also feeds the metrics.
+            self._connect_sonarr()
+            failed = []
+            for payload in payloads:
+                try:
+                    self.sonarrNode.command(**payload)
+                except SonarrClientError as e:
+                    failed.append(str(e))
 
-            if response.status_code == 201:
+            if not failed:
+                scope = (
+                    "" if series_ids is None else f" ({len(payloads)} series)")
                 logging.info(
-                    "Database update triggered successfully for Sonarr (DV).")
+                    f"Database update triggered successfully for "
+                    f"Sonarr ({self.instance_name or 'DV'}){scope}.")
             else:
                 logging.error(
-                    f"Failed to trigger database update for Sonarr (DV). "
-                    f"Status code: {response.status_code}"
+                    f"Failed to trigger database update for Sonarr "
+                    f"({self.instance_name or 'DV'}). "
+                    f"{'; '.join(failed)}"
                     )
 
+    def _get_event_log(self):
+        if self.event_log is None:
+            jsonl_path = None
+            if self.jsonl_log:
+                jsonl_path = os.path.splitext(self.log_filePath)[0] + ".jsonl"
+            self.event_log = EventLog(self.log_filePath, jsonl_path=jsonl_path)
+        return self.event_log
+
     def writeLog(self, init, msg):
 
         try:
-            if init:
-                logfile = open(self.log_filePath, "w")
-            else:
-                logfile = open(self.log_filePath, "a")
-            logfile.write(f"{datetime.now()} - {msg}")
-            logfile.close()
+            self._get_event_log().write(msg, truncate=init)
         except IOError:
             logging.error(
                 f"Can't write file {self.log_filePath}."
             )
 
+    def _record(self, kind, serie=None, season=None, **fields):
+        """Structured (JSONL) event for a run, series or season."""
+        if not self.jsonl_log:
+            return
+        if serie is not None:
+            fields["series"] = serie.title
+            fields["year"] = serie.year
+            fields["path"] = serie.path
+        if season is not None:
+            fields["season"] = season.seasonNumber
+        if self.instance_name is not None:
+            fields["instance"] = self.instance_name
+        try:
+            self._get_event_log().event(kind, **fields)
+        except IOError:
+            logging.error(f"Can't write JSONL events for {self.log_filePath}.")
+
+    def close_log(self):
+        """Flush and close the run log (also done at interpreter exit)."""
+        if self.event_log is not None:
+            try:
+                self.event_log.close()
+            except IOError:
+                logging.error(
+                    f"Can't write file {self.log_filePath}."
+                )
+
     def _log_event(self, msg: str):
         self.writeLog(False, f"{msg}\n")
         logging.info(msg)
 
     def _send_pushover(self, message: str):
-        if self.pushover_enabled:
+        """Queue a notification (sent as part of a digest by run())."""
+        if not self.pushover_enabled:
+            return
+        if self.notifier is not None:
+            self.notifier.notify(message)
+        else:
+            self._pushover_deliver(message)
+
+    def _pushover_deliver(self, message: str):
+        started = time.perf_counter()
+        try:
             self.message = self.userPushover.send_message(
                 message=message,
                 sound=self.pushover_sound,
             )
+        except Exception:
+            self.metrics.notifications.inc(outcome="failed")
+            raise
+        finally:
+            self.metrics.notification_seconds.observe(
+                time.perf_counter() - started)
+        self.metrics.notifications.inc(outcome="sent")
+
+    def _close_notifier(self):
+        """Send every queued notification and stop the dispatcher."""
+        if self.notifier is not None:
+            self.notifier.close()
+            if self.verbose_logging:
+                logging.info(
+                    f"Prune - Pushover: {self.notifier.messages} "
+                    f"notifications in {self.notifier.sent} messages"
+                    f" ({self.notifier.failed} failed).")
+            self.notifier = None
+
+    def _probe_series(self, serie):
+        """Filesystem probe for all seasons of a series (thread-safe)."""
+        return probe_series(
+            serie.path,
+            serie.seasons,
+            self.firstcomplete,
+            index=self._state_index,
+            write_marker=self.write_marker_files,
+            stats=self.probe_stats,
+        )
 
-    def _season_first_complete_at(self, serie, season):
-        """First-complete time from marker file mtime, or None if N/A."""
-        sdir = season_directory_name(season.seasonNumber)
-        base = os.path.join(serie.path, sdir)
-        if not os.path.isdir(base):
-            return None
-        if season.totalEpisodeCount != season.episodeFileCount:
-            return None
-        fc_path = os.path.join(base, self.firstcomplete)
-        if not os.path.isfile(fc_path):
-            open(fc_path, "w").close()
-            if not self.only_show_remove_messages:
-                txt_first = (
-                    f"PRUNE: COMPLETE - {serie.title} "
-                    f"S{str(season.seasonNumber)} ({serie.year})"
-                )
-                self._log_event(txt_first)
-        mtime = os.stat(fc_path).st_mtime
-        return datetime.fromtimestamp(mtime)
-
-    def evalSeason(self, serie, season):
-        """Filesystem + notifications; prune rules live in sonarr_prune_logic."""
-        season_download_date = self._season_first_complete_at(serie, season)
+    def _probe_season(self, serie, season):
+        return probe_series(
+            serie.path,
+            [season],
+            self.firstcomplete,
+            index=self._state_index,
+            write_marker=self.write_marker_files,
+            stats=self.probe_stats,
+        )[0]
+
+    def _forget_first_complete(self, serie, season):
+        """Drop the index entry of a removed season."""
+        if self.state_store is not None:
+            self.state_store.forget(serie.path, season.seasonNumber)
+
+    def _removal_failed(self, serie, season, error):
+        if isinstance(error, FileNotFoundError):
+            logging.error(
+                f"Season Not Found {serie.title} "
+                f"season {season.seasonNumber}"
+            )
+            self._forget_first_complete(serie, season)
+        else:
+            logging.error(
+                f"Error removing {serie.title} "
+                f"season {season.seasonNumber}: {error}"
+            )
+
+    def _finish_deletions(self, results):
+        """Apply results of queued removals (main thread, submission order)."""
+        freed = 0
+        seconds = 0.0
+        for result in results:
+            serie, season = result.context
+            self._record(
+                "deleted", serie, season,
+                files=result.files,
+                bytes_freed=result.bytes_freed,
+                seconds=round(result.seconds, 3),
+                error=None if result.error is None else str(result.error),
+            )
+            if result.error is not None:
+                self._removal_failed(serie, season, result.error)
+                continue
+            self._forget_first_complete(serie, season)
+            self.metrics.deleted_files.inc(result.files)
+            self.metrics.deleted_bytes.inc(result.bytes_freed)
+            freed += result.bytes_freed
+            seconds += result.seconds
+            if self.verbose_logging:
+                logging.info(
+                    f"Prune - Deleted {serie.title} "
+                    f"season {season.seasonNumber}: {result.files} files, "
+                    f"{result.bytes_freed / 1024 ** 2:.1f} MB "
+                    f"in {result.seconds:.2f}s."
+                )
+        if results and self.verbose_logging:
+            logging.info(
+                f"Prune - Deletion queue freed {freed / 1024 ** 3:.2f} GB "
+                f"from {len(results)} seasons in {seconds:.1f}s."
+            )
+
+    def _drop_first_complete(self, serie, season):
+        """Clean up a season whose files Sonarr deleted.
+
+        The folder may survive the API delete; its marker must not, or a
+        later re-download would be pruned straight away.
+        """
+        season_path = os.path.join(
+            serie.path, season_directory_name(season.seasonNumber))
+        try:
+            os.remove(os.path.join(season_path, self.firstcomplete))
+        except FileNotFoundError:
+            pass
+        except OSError as error:
+            logging.error(
+                f"Error removing marker of {serie.title} "
+                f"season {season.seasonNumber}: {error}"
+            )
+        try:
+            os.rmdir(season_path)
+        except OSError:
+            pass  # not empty (extras Sonarr keeps) or already gone
+        self._forget_first_complete(serie, season)
+
+    def _remove_via_api(self):
+        """Delete the episode files of queued seasons through Sonarr."""
+        removals, self._api_removals = self._api_removals, []
+        by_series = {}
+        for serie, season in removals:
+            by_series.setdefault(serie.id, (serie, []))[1].append(season)
+
+        file_ids = []
+        sizes = []
+        # (number of file ids up to and including the season's, serie, season)
+        queued = []
+        for serie, seasons in by_series.values():
+            try:
+                files = self.sonarrNode.episode_files(serie.id)
+            except SonarrClientError as error:
+                for season in seasons:
+                    self._removal_failed(serie, season, error)
+                continue
+            by_season = {}
+            for f in files:
+                by_season.setdefault(f.seasonNumber, []).append(f)
+            for season in seasons:
+                season_files = by_season.get(season.seasonNumber, ())
+                if not season_files:
+                    # Nothing deleted: keep the marker and say so.
+                    txt_kept = (
+                        f"PRUNE: KEPT - {serie.title} ({serie.year}) - "
+                        f"Season {str(season.seasonNumber).zfill(2)} has "
+                        f"no episode files in Sonarr, nothing removed."
+                    )
+                    self.writeLog(False, f"{txt_kept}\n")
+                    logging.warning(txt_kept)
+                    continue
+                start = len(file_ids)
+                for f in season_files:
+                    file_ids.append(f.id)
+                    sizes.append(f.size)
+                queued.append((start, len(file_ids), serie, season))
+
+        deleted = removed = 0
+
+        def batch_done(count):
+            # Seasons whose files are all gone lose their marker right away,
+            # so a failing later batch does not leave them to be retried.
+            nonlocal deleted, removed
+            deleted = count
+            while removed < len(queued) and queued[removed][1] <= count:
+                start, end, serie, season = queued[removed]
+                self._drop_first_complete(serie, season)
+                self._record(
+                    "deleted", serie, season,
+                    files=end - start,
+                    bytes_freed=sum(sizes[start:end]),
+                )
+                removed += 1
+
+        try:
+            self.sonarrNode.delete_episode_files(file_ids, on_batch=batch_done)
+        except SonarrClientError as error:
+            logging.error(
+                f"Error removing episode files through Sonarr: {error}")
+        self.metrics.deleted_files.inc(deleted)
+        self.metrics.deleted_bytes.inc(sum(sizes[:deleted]))
+        if self.verbose_logging:
+            logging.info(
+                f"Prune - Sonarr deleted {deleted} episode files "
+                f"of {removed} seasons."
+            )
+
+    def _season_first_complete_at(self, serie, season, probe=None):
+        """First-complete time from marker file mtime, or None if N/A.
+
+        A probe computed ahead of time (parallel scan) can be passed in;
+        otherwise the filesystem is probed here.
+        """
+        if probe is None:
+            probe = self._probe_season(serie, season)
+        if probe.forget:
+            self._forget_first_complete(serie, season)
+        if probe.store_timestamp is not None and self.state_store:
+            self.state_store.record(
+                serie.path, season.seasonNumber, probe.store_timestamp)
+        if probe.created and not self.only_show_remove_messages:
+            txt_first = (
+                f"PRUNE: COMPLETE - {serie.title} "
+                f"S{str(season.seasonNumber)} ({serie.year})"
+            )
+            self._log_event(txt_first)
+        if probe.created:
+            self._record(
+                "complete", serie, season,
+                first_complete=probe.first_complete_at)
+        return probe.first_complete_at
+
+    def evalSeason(self, serie, season, probe=None, dec=None):
+        """Filesystem + notifications; prune rules live in sonarr_prune_logic.
+
+        `probe` and `dec` may be precomputed by a batched scan.
+        """
+        started = time.perf_counter()
+        season_download_date = self._season_first_complete_at(
+            serie, season, probe)
         if not season_download_date:
+            self.metrics.season("incomplete", started)
             return False, False
 
-        now = datetime.now()
-        dec = decide_season_prune(
-            now,
-            season_download_date,
-            remove_after_days=self.remove_after_days,
-            warn_days_infront=self.warn_days_infront,
-        )
+        if dec is None:
+            now = datetime.now()
+            dec = decide_season_prune(
+                now,
+                season_download_date,
+                remove_after_days=self.remove_after_days,
+                warn_days_infront=self.warn_days_infront,
+            )
 
         sdir = season_directory_name(season.seasonNumber)
         season_path = os.path.join(serie.path, sdir)
@@ -337,35 +979,22 @@ class SONARRPRUNE():
                 f"({serie.year}) will be removed in {txt_time}."
             )
             self._log_event(txt_warn)
+            self._record(
+                "warn", serie, season,
+                first_complete=season_download_date,
+                seconds_until_removal=dec.time_until_removal.total_seconds(),
+            )
+            self.metrics.season("warn", started)
             return False, True
 
         if dec.kind == SeasonActionKind.REMOVE:
-            if not self.dry_run and self.sonarrdv_enabled:
-                try:
-                    shutil.rmtree(season_path)
-                except FileNotFoundError:
-                    logging.error(
-                        f"Season Not Found {serie.title} "
-                        f"season {season.seasonNumber}"
-                    )
-                except OSError as error:
-                    logging.error(
-                        f"Error removing {serie.title} "
-                        f"season {season.seasonNumber}: {error}"
-                    )
-            txt_title = (
-                f"{serie.title} ({serie.year}) - "
-                f"Season {str(season.seasonNumber).zfill(2)}"
-            )
-            self._send_pushover(
-                f"PRUNE: REMOVED - {txt_title} "
-                f"(removed: {season_download_date})"
-            )
-            txt_removed = (
-                f"PRUNE: REMOVED - {txt_title} "
-                f"(removed: {season_download_date})"
-            )
-            self._log_event(txt_removed)
+            if self.free_space is not None:
+                self._add_space_candidate(
+                    serie, season, season_download_date, season_path)
+                self.metrics.season("candidate", started)
+                return False, False
+            self._remove_season(serie, season, season_download_date)
+            self.metrics.season("remove", started)
             return True, False
 
         # ACTIVE
@@ -377,8 +1006,697 @@ class SONARRPRUNE():
                 f"{season_download_date}"
             )
             self._log_event(txt_active)
+        self._record(
+            "active", serie, season, first_complete=season_download_date)
+        self.metrics.season("active", started)
         return False, False
 
+    def _remove_season(self, serie, season, season_download_date):
+        """Remove (or queue) a due season, then log and notify.
+
+        Returns the bytes freed when they are known right away (inline
+        filesystem removal), otherwise None.
+        """
+        season_path = os.path.join(
+            serie.path, season_directory_name(season.seasonNumber))
+        freed = None
+        if not self.dry_run and self.sonarrdv_enabled:
+            self.touched_series[serie.path] = serie
+            if self.remove_mode == 'api':
+                self._api_removals.append((serie, season))
+            elif self.deletion_queue is not None:
+                self.deletion_queue.submit(season_path, (serie, season))
+            else:
+                try:
+                    files, freed = _app_module(
+                        "deletion_queue").remove_tree(season_path)
+                except OSError as error:
+                    self._removal_failed(serie, season, error)
+                    freed = 0
+                else:
+                    self._forget_first_complete(serie, season)
+                    self.metrics.deleted_files.inc(files)
+                    self.metrics.deleted_bytes.inc(freed)
+        txt_title = (
+            f"{serie.title} ({serie.year}) - "
+            f"Season {str(season.seasonNumber).zfill(2)}"
+        )
+        self._send_pushover(
+            f"PRUNE: REMOVED - {txt_title} "
+            f"(removed: {season_download_date})"
+        )
+        txt_removed = (
+            f"PRUNE: REMOVED - {txt_title} "
+            f"(removed: {season_download_date})"
+        )
+        self._log_event(txt_removed)
+        extra = {} if freed is None else {"bytes_freed": freed}
+        self._record(
+            "remove", serie, season,
+            first_complete=season_download_date,
+            dry_run=self.dry_run,
+            **extra,
+        )
+        return freed
+
+    def _add_space_candidate(
+        self, serie, season, season_download_date, season_path
+    ):
+        """Queue a due season on its disk's heap (FREE_SPACE_TARGET_GB)."""
+        try:
+            volume = self.free_space.volume_for(serie.path)
+        except OSError as e:
+            logging.error(f"Can't read free space of {serie.path}: {e}")
+            self.free_space.hold_unreadable()
+            return
+        if volume.short == 0:
+            volume.hold()  # enough space; skip sizing the season
+            return
+        size = season.sizeOnDisk or _app_module(
+            "free_space").directory_size(season_path)
+        volume.push(
+            season_download_date.timestamp(),
+            size,
+            (self, serie, season, season_download_date),
+        )
+
+    def _open_free_space(self):
+        """Free-space target shared by this run's scans, or None in age
+        mode. Each scan adds its Sonarr's root folders."""
+        if self.free_space_target_gb <= 0:
+            return None
+        return _app_module("free_space").FreeSpaceTarget(
+            [], int(self.free_space_target_gb * 1024 ** 3))
+
+    def _add_root_folders(self):
+        try:
+            roots = [root.path for root in self.sonarrNode.root_folder()]
+        except SonarrClientError as e:
+            logging.error(f"Can't fetch root folders from Sonarr: {e}")
+            return
+        self.free_space.add_roots(roots)
+
+    def _reclaim_space(self, pruners):
+        """Remove the oldest candidates until each disk meets the target.
+
+        Runs once after all scans. Each candidate is removed by the pruner
+        that found it; those of pruners not in `pruners` (failed scans)
+        stay. Returns {pruner: number of seasons removed}.
+        """
+        removed = dict.fromkeys(pruners, 0)
+        gb = 1024 ** 3
+        for volume in self.free_space.volumes.values():
+            for size, (pruner, serie, season, at) in volume.pop_needed():
+                if pruner not in removed:
+                    volume.hold()
+                    continue
+                freed = pruner._remove_season(serie, season, at)
+                # Queued and API removals finish later: count the estimate.
+                volume.reclaimed += size if freed is None else freed
+                volume.removed += 1
+                removed[pruner] += 1
+            txtSpace = (
+                f"Prune - Free space on {volume.root}: "
+                f"{volume.free / gb:.1f} GB free, target "
+                f"{volume.target / gb:.1f} GB. Reclaimed "
+                f"{volume.reclaimed / gb:.2f} GB from {volume.removed} "
+                f"seasons, kept {volume.held} due seasons."
+            )
+            logging.info(txtSpace)
+            self.writeLog(False, f"{txtSpace}\n")
+            self._record(
+                "free_space",
+                root=volume.root,
+                free_bytes=volume.free,
+                target_bytes=volume.target,
+                reclaimed_bytes=volume.reclaimed,
+                removed=volume.removed,
+                kept=volume.held,
+                dry_run=self.dry_run,
+            )
+        if self.free_space.unreadable:
+            txtSpace = (
+                f"Prune - Free space: kept {self.free_space.unreadable} "
+                f"due seasons on disks that could not be read."
+            )
+            logging.warning(txtSpace)
+            self.writeLog(False, f"{txtSpace}\n")
+        return removed
+
+    def _retry_policy(self):
+        return RetryPolicy(
+            retries=self.sonarrdv_retries,
+            backoff=self.sonarrdv_retry_backoff,
+        )
+
+    def _fetch_library(self):
+        """Return (series iterable, tags).
+
+        Sorted (default): series stream in over the async pool while tags
+        are fetched concurrently; sorting spills to disk past
+        SORT_SPILL_THRESHOLD series. Unsorted: series are parsed straight
+        off the response and fed to the scan as they arrive.
+        """
+        if self.cache_enabled:
+            media, tags = self._fetch_library_cached()
+            if self.sort_series:
+                media = _app_module("external_sort").sorted_spilling(
+                    media,
+                    key=lambda s: s.sortTitle,
+                    max_in_memory=self.sort_spill_threshold,
+                )
+            return media, tags
+        if self.sort_series:
+            if self._async_runner is None:
+                self._async_runner = asyncio.Runner()
+            return self._async_runner.run(self._fetch_library_sorted())
+        tags = self.sonarrNode.all_tags() if self.tags_to_keep else []
+        return self.sonarrNode.iter_series(), tags
+
+    def _fetch_library_cached(self):
+        """Series and tags through the on-disk snapshot cache."""
+        cache = _app_module("series_cache").SnapshotCache(
+            self.cache_dir, self.cache_ttl_minutes * 60)
+        media = cache.cached_series(self.sonarrNode)
+        tags = []
+        if self.tags_to_keep:
+            tags = list(cache.cached_list("tags", self.sonarrNode.all_tags))
+        logging.info("Prune - Sonarr cache: %s.", cache.stats.summary())
+        return media, tags
+
+    async def _fetch_library_sorted(self):
+        sorter = _app_module("external_sort").ExternalSorter(
+            key=lambda s: s.sortTitle,
+            max_in_memory=self.sort_spill_threshold,
+        )
+        if self._async_sonarr is None:
+            self._async_sonarr = AsyncSonarrClient(
+                self.sonarrdv_url,
+                self.sonarrdv_token,
+                max_connections=self.sonarrdv_max_connections,
+                http2=self.sonarrdv_http2,
+                rate_limiter=self.sonarr_limiter,
+                retry=self._retry_policy(),
+                transport=self.sonarr_transport,
+                verify=False,
+            )
+        client = self._async_sonarr
+        client.timings.clear()
+
+        async def collect():
+            async for serie in client.iter_series():
+                sorter.add(serie)
+
+        if self.tags_to_keep:
+            _, tags = await asyncio.gather(collect(), client.all_tags())
+        else:
+            await collect()
+            tags = []
+        if self.verbose_logging:
+            for t in client.timings:
+                logging.info(
+                    "Prune - Sonarr %s %s took %.3fs",
+                    t.method, t.path, t.seconds)
+        if self.verbose_logging and sorter.spilled_runs:
+            logging.info(
+                "Prune - Sorting spilled %d runs to disk.",
+                sorter.spilled_runs)
+        return iter(sorter), tags
+
+    def _prune_batch(self, batch, tags_ids_to_keep, scanner):
+        """Evaluate a batch of series in library order.
+
+        With a scanner, the filesystem probes of all series in the batch run
+        on its worker pool first; logging, notifications and removals then
+        happen sequentially so output stays the same as a serial run. Large
+        batches are decided in one pass by decide_season_prune_batch().
+        """
+        keep = [
+            series_should_keep(serie.tagsIds, tags_ids_to_keep)
+            for serie in batch
+        ]
+        fingerprints = [
+            None if kept or self.series_state is None
+            else series_fingerprint(serie, self._fingerprint_settings)
+            for serie, kept in zip(batch, keep)
+        ]
+        skip = [
+            fp is not None and self._series_unchanged(serie, fp)
+            for serie, fp in zip(batch, fingerprints)
+        ]
+        self.series_skipped += sum(skip)
+        todo = [
+            serie for serie, kept, skipped in zip(batch, keep, skip)
+            if not (kept or skipped)
+        ]
+        self.series_evaluated += len(todo)
+        n_seasons = sum(len(serie.seasons) for serie in todo)
+        batch_decide = 0 < self.batch_decide_min_seasons <= n_seasons
+
+        probes = None
+        if scanner is not None:
+            probes = scanner.probe_many(todo)
+        elif batch_decide:
+            probes = [self._probe_series(serie) for serie in todo]
+        decisions = None
+        if batch_decide:
+            decisions = decide_season_prune_batch(
+                datetime.now(),
+                [
+                    None if p.first_complete_at is None
+                    else datetime_to_us(p.first_complete_at)
+                    for series_probes in probes
+                    for p in series_probes
+                ],
+                remove_after_days=self.remove_after_days,
+                warn_days_infront=self.warn_days_infront,
+            )
+
+        numDeleted = 0
+        numNotified = 0
+        done = 0
+        index = 0
+        for serie, kept, skipped, fp in zip(batch, keep, skip, fingerprints):
+            if skipped:
+                continue
+            if kept:
+                if self.calendar is not None:
+                    self.calendar.drop_series(serie.path)
+                if not self.only_show_remove_messages:
+                    txtKeeping = (
+                        f"Prune - KEEPING - {serie.title} ({serie.year})."
+                        f" Skipping."
+                    )
+                    self._log_event(txtKeeping)
+                self._record("keep", serie)
+                continue
+
+            if probes is not None:
+                series_probes = probes[done]
+            else:
+                series_probes = self._probe_series(serie)
+            done += 1
+            for season, probe in zip(serie.seasons, series_probes):
+                dec = (
+                    decisions.decision(index)
+                    if decisions is not None else None
+                )
+                index += 1
+                removed, planned = self.evalSeason(serie, season, probe, dec)
+                if removed:
+                    numDeleted += 1
+                if planned:
+                    numNotified += 1
+            if fp is not None:
+                self._remember_series(serie, fp, series_probes)
+            if self.calendar is not None:
+                self._schedule_series(serie, series_probes)
+        return numDeleted, numNotified
+
+    def _schedule_series(self, serie, series_probes):
+        """Put the series' future warning/removal times in the calendar."""
+        events = []
+        for season, probe in zip(serie.seasons, series_probes):
+            if probe.first_complete_at is None:
+                continue
+            for kind, at in season_event_times(
+                probe.first_complete_at,
+                remove_after_days=self.remove_after_days,
+                warn_days_infront=self.warn_days_infront,
+            ):
+                events.append(CalendarEvent(
+                    at.timestamp(),
+                    kind.value,
+                    serie.path,
+                    season.seasonNumber,
+                    serie.title,
+                    serie.year,
+                ))
+        self.calendar.replace_series(serie.path, events)
+
+    def _save_calendar(self):
+        try:
+            self.calendar.save(self.calendar_path)
+        except OSError as e:
+            logging.error(f"Can't write file {self.calendar_path}: {e}")
+
+    def _load_calendars(self):
+        """Saved calendars of all configured Sonarr instances, merged."""
+        if not self.sonarr_instances:
+            return PruneCalendar.load(self.calendar_path)
+        return PruneCalendar(itertools.chain.from_iterable(
+            PruneCalendar.load(
+                self._instance_path(self.calendar_path, instance.name))
+            for instance in self._all_instances()
+        ))
+
+    def upcoming_removals(self, days, now=None):
+        """Calendar removals due within `days` days (no Sonarr, no scan)."""
+        now = now or datetime.now()
+        calendar = self._load_calendars()
+        start = now.timestamp()
+        return [
+            event for event in calendar.between(start, start + days * 86400)
+            if event.kind == SeasonActionKind.REMOVE.value
+        ]
+
+    def next_run_after(self, now):
+        """Next daemon run: the schedule, or earlier for a due season."""
+        due = self.daemon_schedule.next_after(now)
+        if not self.daemon_wake_for_due:
+            return due
+        if self.calendar is None:
+            self.calendar = self._load_calendars()
+        event = self.calendar.next_after(now.timestamp())
+        if event is not None:
+            # A second late, so the season is surely inside its window.
+            due = min(due, datetime.fromtimestamp(event.due + 1))
+        return due
+
+    def _open_series_state(self, tags_ids_to_keep):
+        """Open the incremental-run state; returns True for a full sweep.
+
+        A full sweep (every FULL_SWEEP_HOURS, or without earlier state)
+        evaluates every series and rebuilds the state from scratch.
+        """
+        self.series_evaluated = 0
+        self.series_skipped = 0
+        if not self.incremental:
+            return False
+        self.series_state = _app_module("state_store").SeriesStateStore(
+            self.state_db_path)
+        self._fingerprint_settings = (
+            self.remove_after_days,
+            self.warn_days_infront,
+            tuple(sorted(tags_ids_to_keep)),
+            self.firstcomplete,
+        )
+        last = self.series_state.get_meta("last_full_sweep")
+        if last is None or time.time() - last >= self.full_sweep_hours * 3600:
+            self.series_state.clear()
+            self._series_index = {}
+            return True
+        self._series_index = self.series_state.load_all()
+        return False
+
+    def _series_unchanged(self, serie, fingerprint):
+        """True when the previous run's result for `serie` still holds."""
+        known = self._series_index.get(serie.path)
+        if known is None or known[0] != fingerprint:
+            return False
+        next_due = known[1]
+        return next_due is None or time.time() < next_due
+
+    def _remember_series(self, serie, fingerprint, series_probes):
+        due = series_next_due(
+            (p.first_complete_at for p in series_probes),
+            remove_after_days=self.remove_after_days,
+            warn_days_infront=self.warn_days_infront,
+        )
+        self.series_state.update(
+            serie.path,
+            fingerprint,
+            None if due is None else due.timestamp(),
+        )
+
+    def _connect_sonarr(self):
+        """Connect to Sonarr (a daemon keeps the verified client)."""
+        if self.sonarrNode is not None:
+            return
+        try:
+            self.sonarrNode = SonarrClient(
+                self.sonarrdv_url,
+                self.sonarrdv_token,
+                rate_limiter=self.sonarr_limiter,
+                retry=self._retry_policy(),
+                transport=self.sonarr_transport,
+            )
+        except SonarrClientError as e:
+            logging.error(
+                f"Can't connect to Sonarr source {e}"
+            )
+            sys.exit()
+        except Exception as e:
+            logging.error(
+                f"Unexpected error connecting Sonarr source: {e}")
+            sys.exit(1)
+
+    def _log_started(self):
+        logging.info("Sonarr Prune %s", __version__)
+        if self.verbose_logging:
+            logging.info("Prune - Sonarr Prune %s started.", __version__)
+        self.writeLog(
+            True,
+            f"Prune - Sonarr Prune {__version__} started.\n",
+        )
+
+    def _scan_instance(self, start_log=False):
+        """Fetch and evaluate the library of this pruner's Sonarr.
+
+        Returns (removed, planned, full_sweep). With `start_log` the run
+        log is started once the library has been fetched. Free-space
+        candidates wait for _reclaim_space(), and queued and API removals
+        for _finish_scan(), which the caller runs after a successful scan.
+        """
+        self.touched_series = {}
+        self._api_removals = []
+        self._connect_sonarr()
+
+        # Get all Series (and keep-tags) from the server.
+        try:
+            with self.metrics.phase("fetch"):
+                media, tags = self._fetch_library()
+        except SonarrClientError as e:
+            logging.error(f"Can't fetch library from Sonarr source {e}")
+            sys.exit(1)
+
+        if start_log:
+            self._log_started()
+        if self.free_space is not None:
+            self._add_root_folders()
+
+        numDeleted = 0
+        numNotified = 0
+
+        tags_ids_to_keep = []
+        if self.tags_to_keep:
+            label_to_id = {tag.label: tag.id for tag in tags}
+            tags_ids_to_keep = resolve_keep_tag_ids(
+                self.tags_to_keep, label_to_id)
+
+        # Series are processed as a pipeline, one batch at a time.
+        self.probe_stats = ProbeStats()
+        if self.state_db_enabled:
+            self.state_store = _app_module(
+                "state_store").FirstCompleteStore(self.state_db_path)
+            self._state_index = self.state_store.load_all()
+        full_sweep = self._open_series_state(tags_ids_to_keep)
+        # Skipped series keep their calendar entries from earlier runs.
+        self.calendar = PruneCalendar.load(self.calendar_path)
+        if full_sweep or not self.incremental:
+            self.calendar.clear()
+
+        scanner = None
+        if self.scan_workers > 1:
+            scanner = SeasonScanner(self._probe_series, self.scan_workers)
+        if self.delete_workers > 0:
+            self.deletion_queue = _app_module("deletion_queue").DeletionQueue(
+                self.delete_workers,
+                files_per_second=self.delete_files_per_second,
+                bytes_per_second=self.delete_mb_per_second * 1024 ** 2,
+            )
+        try:
+            # Unsorted, the series are still streaming in during the scan.
+            with self.metrics.phase("scan"):
+                for batch in batched(media, SCAN_BATCH_SIZE):
+                    subNumDeleted, subNumNotified = self._prune_batch(
+                        batch, tags_ids_to_keep, scanner)
+                    numDeleted += subNumDeleted
+                    numNotified += subNumNotified
+                    if self.state_store is not None:
+                        self.state_store.commit()
+                    if self.series_state is not None:
+                        self.series_state.commit()
+            if full_sweep:
+                self.series_state.set_meta("last_full_sweep", time.time())
+            self._save_calendar()
+        except SonarrClientError as e:
+            self._close_scan()
+            logging.error(f"Can't fetch library from Sonarr source {e}")
+            sys.exit(1)
+        except BaseException:
+            self._close_scan()
+            raise
+        finally:
+            if scanner is not None:
+                scanner.close()
+
+        if self.verbose_logging:
+            logging.info("Prune - Filesystem: %s.", self.probe_stats.summary())
+        return numDeleted, numNotified, full_sweep
+
+    def _finish_scan(self):
+        """Finish the scan's queued and API removals, then close its
+        stores."""
+        try:
+            # Removals must be finished before the summary and refreshes.
+            with self.metrics.phase("delete"):
+                if self.deletion_queue is not None:
+                    self._finish_deletions(self.deletion_queue.drain())
+                if self._api_removals:
+                    self._remove_via_api()
+            if self.touched_series and self.cache_enabled:
+                # The cached episode counts predate this run's removals.
+                _app_module("series_cache").SnapshotCache(
+                    self.cache_dir, self.cache_ttl_minutes * 60
+                ).expire("series")
+        finally:
+            self._close_scan()
+
+    def _close_scan(self):
+        self.free_space = None
+        if self.deletion_queue is not None:
+            self.deletion_queue.close()
+            self.deletion_queue = None
+        if self.state_store is not None:
+            self.state_store.close()
+            self.state_store = None
+            self._state_index = None
+        if self.series_state is not None:
+            self.series_state.close()
+            self.series_state = None
+            self._series_index = {}
+
+    def _all_instances(self):
+        """[SONARRDV] (when enabled) followed by the [SONARR:<name>]s."""
+        instances = list(self.sonarr_instances)
+        if self.sonarrdv_enabled:
+            instances.insert(0, SonarrInstance(
+                None,
+                self.sonarrdv_url,
+                self.sonarrdv_token,
+                self.sonarrdv_max_connections,
+                self.sonarrdv_http2,
+                self.sonarrdv_retries,
+                self.sonarrdv_retry_backoff,
+            ))
+        return instances
+
+    def _instance_path(self, path, name):
+        """`path` with the instance name before the extension."""
+        if name is None:
+            return path
+        root, ext = os.path.splitext(path)
+        return f"{root}.{_instance_slug(name)}{ext}"
+
+    def _instance_pruner(self, instance):
+        """Pruner for one Sonarr instance, kept for the next daemon run.
+
+        It is built from the same config file, so it has its own client,
+        connection pool, state files and calendar; the log, notifier and
+        metrics of this run are handed over before every scan.
+        """
+        pruner = self._instance_pruners.get(instance.name)
+        if pruner is None:
+            pruner = SONARRPRUNE(self.config_filePath, instance=instance)
+            self._instance_pruners[instance.name] = pruner
+        pruner.log_filePath = self.log_filePath
+        pruner.sonarr_transport = self.sonarr_transport
+        pruner.media_transport = self.media_transport
+        pruner.event_log = self._get_event_log()
+        pruner.notifier = self.notifier
+        pruner.metrics = self.metrics
+        pruner.free_space = self.free_space
+        if self.profiler is not None:
+            self.profiler.attach(pruner)
+        return pruner
+
+    def _on_instance_threads(self, pruners, name):
+        """Call method `name` of every pruner, one thread each.
+
+        Returns, per pruner, the result or the exception it raised.
+        """
+        if not pruners:
+            return []
+        with ThreadPoolExecutor(
+            max_workers=len(pruners), thread_name_prefix="sonarr"
+        ) as pool:
+            futures = []
+            for pruner in pruners:
+                method = getattr(pruner, name)
+                if self.profiler is not None:
+                    method = self.profiler.in_thread(method)
+                futures.append(pool.submit(method))
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except (SystemExit, Exception) as e:
+                outcomes.append(e)
+        return outcomes
+
+    def _scan_instances(self):
+        """Scan all Sonarr instances concurrently, one thread each.
+
+        With FREE_SPACE_TARGET_GB the due seasons of all instances compete
+        for the shared target once every scan is done; each instance then
+        finishes its removals on its own thread again. Returns (removed,
+        planned, report lines). A failing instance is reported and left
+        out; the others are still pruned.
+        """
+        self._log_started()
+        pruners = [self._instance_pruner(i) for i in self._all_instances()]
+        outcomes = dict(zip(
+            pruners, self._on_instance_threads(pruners, "_scan_instance")))
+        scanned = [
+            p for p in pruners if not isinstance(outcomes[p], BaseException)]
+        reclaimed = {}
+        try:
+            if self.free_space is not None:
+                with self.metrics.phase("delete"):
+                    reclaimed = self._reclaim_space(scanned)
+        finally:
+            finished = self._on_instance_threads(scanned, "_finish_scan")
+            self.free_space = None
+        for pruner, error in zip(scanned, finished):
+            if error is not None:
+                outcomes[pruner] = error
+
+        numDeleted = 0
+        numNotified = 0
+        report = []
+        for pruner in pruners:
+            name = pruner.instance_name or "DV"
+            outcome = outcomes[pruner]
+            if isinstance(outcome, BaseException):
+                if not isinstance(outcome, SystemExit):
+                    logging.error(f"Prune - Sonarr {name} failed: {outcome}")
+                txtInstance = f"Prune - Sonarr {name}: failed, skipped."
+            else:
+                removed, planned, full_sweep = outcome
+                removed += reclaimed.get(pruner, 0)
+                self._scanned.append(pruner)
+                numDeleted += removed
+                numNotified += planned
+                txtInstance = (
+                    f"Prune - Sonarr {name}: {removed} seasons removed, "
+                    f"{planned} planned for removal."
+                )
+                if self.incremental:
+                    txtInstance += (
+                        f" Evaluated {pruner.series_evaluated} series, "
+                        f"skipped {pruner.series_skipped} unchanged"
+                        f" ({'full sweep' if full_sweep else 'incremental'})."
+                    )
+            logging.info(txtInstance)
+            self.writeLog(False, f"{txtInstance}\n")
+            report.append(txtInstance)
+
+        # One calendar across instances for the daemon's wake-up time.
+        self.calendar = PruneCalendar(itertools.chain.from_iterable(
+            p.calendar for p in pruners if p.calendar is not None))
+        return numDeleted, numNotified, report
+
     def run(self):
         if not self.enabled_run:
             logging.info(
@@ -386,26 +1704,19 @@ class SONARRPRUNE():
             self.writeLog(False, "Prune - Library purge disabled.\n")
             sys.exit()
 
-        # Connect to Sonarr DV
-        if self.sonarrdv_enabled:
-            try:
-                self.sonarrNode = SonarrClient(
-                    self.sonarrdv_url, self.sonarrdv_token)
-            except SonarrClientError as e:
-                logging.error(
-                    f"Can't connect to Sonarr source {e}"
-                )
-                sys.exit()
-            except Exception as e:
-                logging.error(
-                    f"Unexpected error connecting Sonarr source: {e}")
-                sys.exit(1)
-        else:
+        if not self.sonarrdv_enabled and not self.sonarr_instances:
             logging.info(
                 "Prune - Sonarr DV disabled in INI, exiting.")
             self.writeLog(False, "Sonarr disabled in INI, exiting.\n")
             sys.exit()
 
+        self.touched_series = {}
+        self._api_removals = []
+        self._scanned = []
+        self.series_evaluated = 0
+        self.series_skipped = 0
+        run_started = time.perf_counter()
+
         if self.dry_run:
             logging.info(
                 "*****************************************************")
@@ -417,153 +1728,301 @@ class SONARRPRUNE():
 
         # Setting for PushOver
         if self.pushover_enabled:
+            from chump import Application
+
             self.appPushover = Application(self.pushover_token_api)
             self.userPushover = \
                 self.appPushover.get_user(self.pushover_user_key)
+            self.notifier = _app_module("notifier").NotificationDispatcher(
+                self._pushover_deliver,
+                limiter=self.pushover_limiter,
+                linger=self.pushover_digest_seconds,
+            )
 
-        # Get all Series from the server.
-        media = self.sonarrNode.all_series()
-
-        logging.info("Sonarr Prune %s", __version__)
-        if self.verbose_logging:
-            logging.info("Prune - Sonarr Prune %s started.", __version__)
-        self.writeLog(
-            True,
-            f"Prune - Sonarr Prune {__version__} started.\n",
-        )
-
-        # Make sure the library is not empty.
-        numDeleted = 0
-        numNotified = 0
-
-        if media:
-            media.sort(key=lambda s: s.sortTitle)
-            tags_ids_to_keep = []
-            if self.tags_to_keep:
-                label_to_id = {
-                    tag.label: tag.id for tag in self.sonarrNode.all_tags()
-                }
-                tags_ids_to_keep = resolve_keep_tag_ids(
-                    self.tags_to_keep, label_to_id)
-
-            for serie in media:
-
-                if series_should_keep(serie.tagsIds, tags_ids_to_keep):
-                    if not self.only_show_remove_messages:
-                        txtKeeping = (
-                            f"Prune - KEEPING - {serie.title} ({serie.year})."
-                            f" Skipping."
-                        )
-                        self._log_event(txtKeeping)
-                else:
-                    subNumDeleted = 0
-                    subNumNotified = 0
-
-                    for season in serie.seasons:
-                        removed, planned = self.evalSeason(serie, season)
-                        if removed:
-                            subNumDeleted += 1
-                        if planned:
-                            subNumNotified += 1
-
-                    numDeleted += subNumDeleted
-                    numNotified += subNumNotified
-
-                time.sleep(0.2)
+        # One free-space target for all instances (FREE_SPACE_TARGET_GB)
+        self.free_space = self._open_free_space()
+        report = []
+        try:
+            if self.sonarr_instances:
+                numDeleted, numNotified, report = self._scan_instances()
+            else:
+                numDeleted, numNotified, full_sweep = self._scan_instance(
+                    start_log=True)
+                try:
+                    if self.free_space is not None:
+                        with self.metrics.phase("delete"):
+                            numDeleted += self._reclaim_space([self])[self]
+                finally:
+                    self._finish_scan()
+                if self.incremental:
+                    sweep = 'full sweep' if full_sweep else 'incremental run'
+                    txtSeries = (
+                        f"Prune - Evaluated {self.series_evaluated} series, "
+                        f"skipped {self.series_skipped} unchanged ({sweep})."
+                    )
+                    logging.info(txtSeries)
+                    self.writeLog(False, f"{txtSeries}\n")
+        except SystemExit:
+            # Send what was queued before giving up.
+            self._close_notifier()
+            raise
 
         txtEnd = (
             f"Prune - There were {numDeleted} seasons removed."
         )
 
         self._send_pushover(txtEnd)
+        with self.metrics.phase("notify"):
+            self._close_notifier()
 
         if self.verbose_logging:
             logging.info(txtEnd)
         self.writeLog(False, f"{txtEnd}\n")
+        scanned = self._scanned or [self]
+        self._record(
+            "summary",
+            removed=numDeleted,
+            notified=numNotified,
+            series_evaluated=sum(p.series_evaluated for p in scanned),
+            series_skipped=sum(p.series_skipped for p in scanned),
+            dry_run=self.dry_run,
+        )
 
         should_send_mail = self.mail_enabled and (
             not self.only_mail_when_removed
             or numDeleted > 0
             or numNotified > 0
         )
+        # Call the function to trigger a database update; first, so the
+        # mail can report each media server's refresh.
+        with self.metrics.phase("refresh"):
+            report += self.refresh_libraries()
         if should_send_mail:
+            # The mail attaches the log file, so write out the buffer first.
+            self._get_event_log().flush()
+            self._mail_summary(numDeleted, numNotified, report)
+        self.close_log()
+
+        self.metrics.phase_seconds.observe(
+            time.perf_counter() - run_started, phase="run")
+        self.metrics.run_finished(numDeleted, numNotified)
+        self._write_metrics()
+
+    def profiled_run(self):
+        """run() under cProfile, with a per-series latency table.
+
+        Output goes next to the log: sonarr_prune.profile.pstats/.txt.
+        """
+        prefix = os.path.splitext(self.log_filePath)[0] + ".profile"
+        with _app_module("profiler").RunProfiler(self, prefix):
+            self.run()
+
+    def _write_metrics(self):
+        """Write the metrics textfile for node_exporter, if configured."""
+        if not self.metrics_textfile:
+            return
+        try:
+            self.metrics.registry.write_textfile(self.metrics_textfile)
+        except OSError as e:
+            logging.error(
+                f"Can't write metrics file {self.metrics_textfile}: {e}")
 
-            sender_email = self.mail_sender
-            receiver_email = self.mail_receiver
+    def _mail_summary(self, numDeleted, numNotified, details=()):
+        """Build and send the summary mail (bounded by MAIL_TIMEOUT)."""
+        import smtplib
 
-            message = MIMEMultipart()
-            message["From"] = sender_email
-            message['To'] = ", ".join(receiver_email)
-            message['Subject'] = (
-                f"Sonarr - Pruned {numDeleted} seasons "
-                f"and {numNotified} planned for removal"
+        try:
+            message = _app_module("mailer").build_summary_mail(
+                sender=self.mail_sender,
+                receivers=self.mail_receiver,
+                subject=(
+                    f"Sonarr - Pruned {numDeleted} seasons "
+                    f"and {numNotified} planned for removal"
+                ),
+                log_path=self.log_filePath,
+                log_name=self.log_file,
+                removed=numDeleted,
+                notified=numNotified,
+                details=details,
             )
-
-            attachment = open(self.log_filePath, 'rb')
-            obj = MIMEBase('application', 'octet-stream')
-            obj.set_payload((attachment).read())
-            encoders.encode_base64(obj)
-            obj.add_header(
-                'Content-Disposition',
-                "attachment; filename= "+self.log_file
+        except OSError as e:
+            logging.error(f"Can't build the prune mail: {e}")
+            return
+        try:
+            with self.metrics.phase("mail"):
+                _app_module("mailer").send_mail(
+                    message,
+                    server=self.mail_server,
+                    port=self.mail_port,
+                    login=self.mail_login,
+                    password=self.mail_password,
+                    timeout=self.mail_timeout,
+                )
+            logging.info(f"Prune - Mail Sent to {message['To']}.")
+            self.writeLog(
+                False, f"Prune - Mail Sent to {message['To']}.\n")
+        except (gaierror, ConnectionRefusedError):
+            logging.error(
+                "Failed to connect to the server. "
+                "Bad connection settings?")
+        except smtplib.SMTPServerDisconnected:
+            logging.error(
+                "Failed to connect to the server. "
+                "Wrong user/password?"
             )
-            message.attach(obj)
-
-            body = (
-                "Hi,\n\n Attached is the prunelog from sonarr Prune.\n\n"
-                "Have a nice day.\n\n"
+        except smtplib.SMTPException as e:
+            logging.error(
+                "SMTP error occurred: " + str(e))
+        except TimeoutError:
+            logging.error(
+                f"Mail server did not answer within "
+                f"{self.mail_timeout:g} seconds.")
+        except OSError as e:
+            logging.error(f"Failed to send mail: {e}")
+
+    def refresh_libraries(self):
+        """Refresh the series touched by this run in Sonarr and Emby.
+
+        Nothing is refreshed when no season was removed; past
+        REFRESH_FULL_THRESHOLD series the whole libraries are rescanned.
+        All Sonarr instances and media servers are refreshed at once, and
+        each media server's outcome and time go into the run log. Returns
+        those log lines for the summary mail.
+        """
+        pruners = self._scanned or [self]
+        touched = [
+            serie for pruner in pruners
+            for serie in pruner.touched_series.values()
+        ]
+        if not touched:
+            if self.verbose_logging:
+                logging.info("Prune - Nothing removed, no refresh needed.")
+            return []
+        full = len(touched) > self.refresh_full_threshold
+        series_paths = None if full else [serie.path for serie in touched]
+
+        jobs = []
+        # API removals keep Sonarr's database in sync; no rescan needed.
+        if self.remove_mode != 'api':
+            for pruner in pruners:
+                series_ids = [
+                    serie.id for serie in pruner.touched_series.values()]
+                if not series_ids or not pruner.sonarrdv_enabled:
+                    continue
+                if full or not all(series_ids):
+                    series_ids = None
+                jobs.append(
+                    (pruner.trigger_database_update_sonarr, series_ids))
+        for server in self.media_servers:
+            # Built here, not on the refresh threads, so every server
+            # shares one session and no client is created twice.
+            self._emby_client(server)
+            jobs.append((
+                functools.partial(self.refresh_media_server, server),
+                series_paths,
+            ))
+        if not jobs:
+            return []
+
+        with ThreadPoolExecutor(
+            max_workers=len(jobs), thread_name_prefix="refresh"
+        ) as pool:
+            futures = [pool.submit(job, arg) for job, arg in jobs]
+        results = [f.result() for f in futures]
+
+        lines = []
+        for result in results:
+            if result is None:  # Sonarr logs its own outcome
+                continue
+            if result.ok:
+                txtRefresh = (
+                    f"Prune - Refresh {result.name}: {result.detail} "
+                    f"in {result.seconds:.2f} s."
+                )
+                logging.info(txtRefresh)
+            else:
+                txtRefresh = (
+                    f"Prune - Refresh {result.name} failed after "
+                    f"{result.seconds:.2f} s: {result.detail}"
+                )
+                logging.error(txtRefresh)
+            self.writeLog(False, f"{txtRefresh}\n")
+            lines.append(txtRefresh)
+            self._record(
+                "refresh",
+                server=result.name,
+                ok=result.ok,
+                seconds=round(result.seconds, 3),
+                detail=result.detail,
             )
+        return lines
 
-            logfile = open(self.log_filePath, "r")
 
-            body += ''.join(logfile.readlines())
+def run_daemon(config_path=None, profile=False):
+    """Run on the [DAEMON] schedule until SIGTERM/SIGINT.
 
-            logfile.close()
+    Clients stay connected between runs. The INI is re-read before a run
+    when it changed; an invalid new config keeps the previous one. With
+    `profile`, every run is profiled (the files hold the latest run).
+    """
+    stop = threading.Event()
 
-            plain_text = MIMEText(
-                body, _subtype='plain', _charset='UTF-8')
-            message.attach(plain_text)
+    def _stop(signum, frame):
+        logging.info("Prune - Stop requested, finishing current run.")
+        stop.set()
 
-            my_message = message.as_string()
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    pruner = SONARRPRUNE(config_path, daemon=True)
+    config_mtime = os.stat(pruner.config_filePath).st_mtime
+    logging.info(
+        f"Prune - Daemon started, running {pruner.daemon_schedule!r}.")
+    server = None
+    if pruner.metrics_port:
+        try:
+            server = MetricsServer(
+                pruner.metrics.registry,
+                pruner.metrics_port,
+                pruner.metrics_address,
+            )
+            logging.info(
+                f"Prune - Metrics on port {server.port} (/metrics).")
+        except OSError as e:
+            logging.error(f"Can't serve metrics: {e}")
 
+    def job():
+        nonlocal pruner, config_mtime
+        try:
+            mtime = os.stat(pruner.config_filePath).st_mtime
+        except OSError:
+            mtime = config_mtime
+        if mtime != config_mtime:
+            config_mtime = mtime
             try:
-                email_session = smtplib.SMTP(
-                    self.mail_server, self.mail_port)
-                email_session.starttls()
-                email_session.login(
-                    self.mail_login, self.mail_password)
-                email_session.sendmail(
-                    self.mail_sender, self.mail_receiver, my_message)
-                email_session.quit()
-                logging.info(f"Prune - Mail Sent to {message['To']}.")
-                self.writeLog(
-                    False, f"Prune - Mail Sent to {message['To']}.\n")
-
-            except (gaierror, ConnectionRefusedError):
-                logging.error(
-                    "Failed to connect to the server. "
-                    "Bad connection settings?")
-            except smtplib.SMTPServerDisconnected:
+                reloaded = SONARRPRUNE(config_path, daemon=True)
+            except SystemExit:
                 logging.error(
-                    "Failed to connect to the server. "
-                    "Wrong user/password?"
-                )
-            except smtplib.SMTPException as e:
-                logging.error(
-                    "SMTP error occurred: " + str(e))
-
-        # Call the function to trigger a database update
-
-        if self.sonarrdv_enabled:
-            self.trigger_database_update_sonarr()
-
-        if self.emby_enabled1:
-            self.trigger_database_update_emby(
-                self.emby_url1, self.emby_token1, "Emby1")
+                    "Prune - Config reload failed, keeping the old one.")
+            else:
+                logging.info("Prune - Config file changed, reloaded.")
+                pruner.close()
+                # Counters keep counting; the endpoint serves this registry.
+                reloaded.metrics = pruner.metrics
+                pruner = reloaded
+        if profile:
+            pruner.profiled_run()
+        else:
+            pruner.run()
 
-        if self.emby_enabled2:
-            self.trigger_database_update_emby(
-                self.emby_url2, self.emby_token2, "Emby2")
+    try:
+        _app_module("scheduler").run_forever(
+            job, lambda now: pruner.next_run_after(now), stop)
+    finally:
+        pruner.close()
+        if server is not None:
+            server.close()
+        logging.info("Prune - Daemon stopped.")
 
 
 if __name__ == '__main__':
@@ -576,8 +2035,44 @@ if __name__ == '__main__':
         action="version",
         version=f"sonarr_prune {__version__}",
     )
-    parser.parse_args()
-
-    sonarrprune = SONARRPRUNE()
-    sonarrprune.run()
-    sonarrprune = None
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running and prune on the [DAEMON] schedule",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="profile the run: cProfile stats and the slowest series, "
+             "written next to the log file",
+    )
+    commands = parser.add_subparsers(dest="command")
+    upcoming = commands.add_parser(
+        "upcoming",
+        help="list seasons due for removal (from the last run's calendar)",
+    )
+    upcoming.add_argument(
+        "days", type=int, nargs="?", default=7,
+        help="how many days ahead to look (default: 7)",
+    )
+    args = parser.parse_args()
+
+    if args.command == "upcoming":
+        events = SONARRPRUNE().upcoming_removals(args.days)
+        for event in events:
+            print(
+                f"{datetime.fromtimestamp(event.due):%Y-%m-%d %H:%M}  "
+                f"{event.title} ({event.year}) - "
+                f"Season {str(event.season).zfill(2)}"
+            )
+        if not events:
+            print(f"No removals due in the next {args.days} days.")
+    elif args.daemon:
+        run_daemon(profile=args.profile)
+    else:
+        sonarrprune = SONARRPRUNE()
+        if args.profile:
+            sonarrprune.profiled_run()
+        else:
+            sonarrprune.run()
+        sonarrprune.close()
@@ -0,0 +1,162 @@
+"""
+SQLite run state: "first complete" times (replacing per-season marker
+files) and per-series fingerprints for incremental runs.
+
+First-complete rows are keyed by (series path, season number). Each index
+is read with a single query at the start of a run; new and removed entries
+are buffered and written in one transaction per commit().
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+Key = Tuple[str, int]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS first_complete (
+    series_path TEXT NOT NULL,
+    season_number INTEGER NOT NULL,
+    first_complete REAL NOT NULL,
+    PRIMARY KEY (series_path, season_number)
+) WITHOUT ROWID
+"""
+
+
+class FirstCompleteStore:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._upserts: Dict[Key, float] = {}
+        self._deletes: List[Key] = []
+
+    def load_all(self) -> Dict[Key, float]:
+        """Every known first-complete timestamp (epoch seconds)."""
+        rows = self._conn.execute(
+            "SELECT series_path, season_number, first_complete "
+            "FROM first_complete"
+        )
+        return {(path, season): ts for path, season, ts in rows}
+
+    def get(self, series_path: str, season_number: int) -> Optional[float]:
+        row = self._conn.execute(
+            "SELECT first_complete FROM first_complete "
+            "WHERE series_path = ? AND season_number = ?",
+            (series_path, season_number),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def record(
+        self, series_path: str, season_number: int, timestamp: float
+    ) -> None:
+        with self._lock:
+            self._upserts[(series_path, season_number)] = timestamp
+
+    def forget(self, series_path: str, season_number: int) -> None:
+        with self._lock:
+            key = (series_path, season_number)
+            self._upserts.pop(key, None)
+            self._deletes.append(key)
+
+    def commit(self) -> None:
+        with self._lock:
+            upserts, self._upserts = self._upserts, {}
+            deletes, self._deletes = self._deletes, []
+        if not upserts and not deletes:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM first_complete "
+                "WHERE series_path = ? AND season_number = ?",
+                deletes,
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO first_complete "
+                "(series_path, season_number, first_complete) "
+                "VALUES (?, ?, ?)",
+                [(p, n, ts) for (p, n), ts in upserts.items()],
+            )
+
+    def close(self) -> None:
+        self.commit()
+        self._conn.close()
+
+
+_SERIES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS series_state (
+    series_path TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    next_due REAL
+) WITHOUT ROWID
+"""
+_META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value REAL
+) WITHOUT ROWID
+"""
+
+
+class SeriesStateStore:
+    """Per-series fingerprint and next due time from the previous run."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(_SERIES_SCHEMA)
+            self._conn.execute(_META_SCHEMA)
+        self._lock = threading.Lock()
+        self._updates: Dict[str, Tuple[str, Optional[float]]] = {}
+
+    def load_all(self) -> Dict[str, Tuple[str, Optional[float]]]:
+        """series path -> (fingerprint, next due epoch seconds or None)."""
+        rows = self._conn.execute(
+            "SELECT series_path, fingerprint, next_due FROM series_state")
+        return {path: (fp, due) for path, fp, due in rows}
+
+    def update(
+        self, series_path: str, fingerprint: str, next_due: Optional[float]
+    ) -> None:
+        with self._lock:
+            self._updates[series_path] = (fingerprint, next_due)
+
+    def clear(self) -> None:
+        """Forget every series (e.g. before a full sweep)."""
+        with self._lock:
+            self._updates = {}
+        with self._conn:
+            self._conn.execute("DELETE FROM series_state")
+
+    def get_meta(self, key: str) -> Optional[float]:
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def set_meta(self, key: str, value: float) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, value),
+            )
+
+    def commit(self) -> None:
+        with self._lock:
+            updates, self._updates = self._updates, {}
+        if not updates:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO series_state "
+                "(series_path, fingerprint, next_due) VALUES (?, ?, ?)",
+                [(p, fp, due) for p, (fp, due) in updates.items()],
+            )
+
+    def close(self) -> None:
+        self.commit()
+        self._conn.close()
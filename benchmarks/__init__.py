@@ -0,0 +1 @@
+"""Scale benchmarks for sonarr_prune (synthetic library + fake Sonarr)."""
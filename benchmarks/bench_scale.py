@@ -0,0 +1,63 @@
+"""
+pytest-benchmark scenarios at library scale.
+
+    pytest benchmarks/bench_scale.py -p no:cacheprovider \
+        --benchmark-autosave
+    pytest benchmarks/bench_scale.py --benchmark-compare
+
+BENCH_SIZES picks the library sizes (default "1000,10000"; add 50000 for
+the large run). Phase timings, read/write calls and memory peaks are
+stored in each result's extra_info, so autosaved runs can be compared per
+phase.
+"""
+
+import os
+
+import pytest
+
+from benchmarks.harness import run_scenario
+
+pytest.importorskip("pytest_benchmark")
+
+SIZES = [
+    int(size)
+    for size in os.environ.get("BENCH_SIZES", "1000,10000").split(",")
+]
+
+SCENARIOS = {
+    "serial": {},
+    "scan_workers": {"SCAN_WORKERS": 8},
+    "state_db": {"STATE_DB": "ON"},
+    "unsorted": {"SORT_SERIES": "OFF"},
+}
+
+
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+@pytest.mark.parametrize("n_series", SIZES)
+def test_prune_run(benchmark, tmp_path_factory, n_series, scenario):
+    reports = []
+
+    def setup():
+        workdir = tmp_path_factory.mktemp(f"{scenario}-{n_series}")
+        return (str(workdir), n_series), {}
+
+    def run(workdir, size):
+        reports.append(run_scenario(
+            workdir, size, settings=SCENARIOS[scenario], trace_memory=False))
+
+    # Every round needs a fresh library, so the run is timed as a whole.
+    benchmark.pedantic(run, setup=setup, rounds=3, iterations=1)
+
+    # Memory peaks from one extra, untimed run (tracemalloc is slow).
+    traced = run_scenario(
+        *setup()[0], settings=SCENARIOS[scenario], trace_memory=True)
+    last = reports[-1]
+    for name, phase in last["phases"].items():
+        phase["peak_bytes"] = traced["phases"][name]["peak_bytes"]
+    benchmark.extra_info.update({
+        "series": last["series"],
+        "fs_calls": last["fs_calls"],
+        "http_requests": last["http_requests"],
+        "phases": last["phases"],
+    })
+    assert last["series_evaluated"] > 0
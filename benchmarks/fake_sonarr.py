@@ -0,0 +1,48 @@
+"""In-process fake Sonarr API served through `httpx.MockTransport`."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Sequence
+
+import httpx
+
+
+class FakeSonarr:
+    """Serves a fixed library; the same transport works sync and async."""
+
+    def __init__(
+        self,
+        series: List[Dict[str, Any]],
+        tags: List[Dict[str, Any]],
+        *,
+        api_key: str = "secret",
+        root_folders: Sequence[str] = (),
+    ) -> None:
+        self.api_key = api_key
+        self._root_folders = [{"path": path} for path in root_folders]
+        # Encoded once, like a server answering from its own cache.
+        self._series = json.dumps(series).encode()
+        self._tags = json.dumps(tags).encode()
+        # "METHOD /path" of every request, in order
+        self.requests: List[str] = []
+        self.transport = httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.requests.append(f"{request.method} {path}")
+        if request.headers.get("X-Api-Key") != self.api_key:
+            return httpx.Response(401)
+        if path == "/api/v3/system/status":
+            return httpx.Response(200, json={"version": "4.0.0"})
+        if path == "/api/v3/series":
+            return httpx.Response(200, content=self._series)
+        if path == "/api/v3/tag":
+            return httpx.Response(200, content=self._tags)
+        if path == "/api/v3/rootfolder":
+            return httpx.Response(200, json=self._root_folders)
+        if path == "/api/v3/command":
+            return httpx.Response(201, json={"id": 1})
+        if path == "/api/v3/episodefile":
+            return httpx.Response(200, json=[])
+        return httpx.Response(404)
@@ -0,0 +1,210 @@
+"""
+Run a complete prune against a synthetic library and measure each phase.
+
+Phases are `fetch` (series and tags from the fake Sonarr, including the
+sort), `scan` (evaluating all batches: probes, decisions, log lines) and
+`report` (everything else in run(): setup, summary, log and calendar
+writes). With SORT_SERIES = OFF the series are parsed while they are
+scanned, so that parse time shows up under `scan`.
+
+Per phase the report holds wall time, peak traced Python memory, read and
+write calls (`rw_calls`, the syscr/syscw counters of /proc/self/io; Linux
+only, None elsewhere) and, for the run as a whole, the filesystem calls
+counted by the season probes and the requests served by the fake Sonarr.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from app.sonarrdv_prune import SONARRPRUNE
+from benchmarks.fake_sonarr import FakeSonarr
+from benchmarks.library import make_library
+
+PHASES = ("fetch", "scan", "report")
+
+INI_TEMPLATE = """
+[SONARRDV]
+ENABLED = ON
+URL = http://sonarr.bench
+TOKEN = secret
+
+[EMBY1]
+ENABLED = OFF
+
+[EMBY2]
+ENABLED = OFF
+
+[PRUNE]
+ENABLED = ON
+DRY_RUN = {dry_run}
+TAGS_KEEP_MOVIES_ANYWAY = keep
+REMOVE_SERIES_AFTER_DAYS = {remove_after_days}
+WARN_DAYS_INFRONT = 1
+ONLY_SHOW_REMOVE_MESSAGES = OFF
+VERBOSE_LOGGING = OFF
+MAIL_ENABLED = OFF
+{extra}
+
+[PUSHOVER]
+ENABLED = OFF
+"""
+
+
+def _rw_calls() -> Optional[int]:
+    """Read- and write-type system calls made by this process so far.
+
+    /proc/self/io only counts those (syscr/syscw), not stat, open or other
+    calls; the probes' filesystem calls are counted separately.
+    """
+    try:
+        with open("/proc/self/io", "r") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return int(fields["syscr"]) + int(fields["syscw"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+class PhaseRecorder:
+    """Accumulates wall time, read/write calls and peak memory per phase."""
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.phases: Dict[str, Dict[str, Any]] = {
+            name: {"seconds": 0.0, "rw_calls": None, "peak_bytes": None}
+            for name in PHASES
+        }
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        calls = _rw_calls()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - started, calls)
+
+    def _add(self, name: str, seconds: float, calls: Optional[int]) -> None:
+        stats = self.phases[name]
+        stats["seconds"] += seconds
+        after = _rw_calls()
+        if calls is not None and after is not None:
+            stats["rw_calls"] = (stats["rw_calls"] or 0) + after - calls
+        if self.trace_memory:
+            stats["peak_bytes"] = max(
+                stats["peak_bytes"] or 0, tracemalloc.get_traced_memory()[1])
+
+    def close(self, total_seconds: float, total_calls: Optional[int]) -> None:
+        """Book the part of the run outside fetch and scan as `report`.
+
+        Its memory peak is not measured (it would include the scan).
+        """
+        report = self.phases["report"]
+        report["seconds"] = max(0.0, total_seconds - sum(
+            self.phases[name]["seconds"] for name in ("fetch", "scan")))
+        if total_calls is not None:
+            report["rw_calls"] = total_calls - sum(
+                self.phases[name]["rw_calls"] or 0
+                for name in ("fetch", "scan"))
+
+
+def write_config(workdir: str, *, dry_run: bool, remove_after_days: int,
+                 settings: Optional[Dict[str, Any]] = None) -> str:
+    extra = "\n".join(
+        f"{key} = {value}" for key, value in (settings or {}).items())
+    path = os.path.join(workdir, "sonarrdv_prune.ini")
+    with open(path, "w") as f:
+        f.write(INI_TEMPLATE.format(
+            dry_run="ON" if dry_run else "OFF",
+            remove_after_days=remove_after_days,
+            extra=extra,
+        ))
+    return path
+
+
+def run_scenario(
+    workdir: str,
+    n_series: int,
+    *,
+    seasons_per_series: int = 3,
+    dry_run: bool = True,
+    remove_after_days: int = 30,
+    settings: Optional[Dict[str, Any]] = None,
+    trace_memory: bool = True,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Generate a library in `workdir`, prune it once and report.
+
+    `settings` are extra [PRUNE] keys, e.g. {"SCAN_WORKERS": 8}.
+    """
+    library_root = os.path.join(workdir, "library")
+    started = time.perf_counter()
+    series = make_library(
+        library_root,
+        n_series,
+        seasons_per_series=seasons_per_series,
+        remove_after_days=remove_after_days,
+        seed=seed,
+    )
+    generate_seconds = time.perf_counter() - started
+    sonarr = FakeSonarr(series, [{"id": 1, "label": "keep"}])
+
+    pruner = SONARRPRUNE(config_path=write_config(
+        workdir,
+        dry_run=dry_run,
+        remove_after_days=remove_after_days,
+        settings=settings,
+    ))
+    pruner.log_filePath = os.path.join(workdir, "sonarr_prune.log")
+    pruner.sonarr_transport = sonarr.transport
+
+    recorder = PhaseRecorder(trace_memory)
+    fetch, prune_batch = pruner._fetch_library, pruner._prune_batch
+
+    def timed_fetch():
+        with recorder.phase("fetch"):
+            return fetch()
+
+    def timed_batch(*args, **kwargs):
+        with recorder.phase("scan"):
+            return prune_batch(*args, **kwargs)
+
+    pruner._fetch_library = timed_fetch
+    pruner._prune_batch = timed_batch
+
+    tracing = trace_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    try:
+        calls = _rw_calls()
+        started = time.perf_counter()
+        pruner.run()
+        total = time.perf_counter() - started
+        after = _rw_calls()
+        recorder.close(
+            total,
+            after - calls if calls is not None and after is not None
+            else None,
+        )
+    finally:
+        if tracing:
+            tracemalloc.stop()
+        pruner.close()
+
+    return {
+        "series": n_series,
+        "seasons": n_series * seasons_per_series,
+        "generate_seconds": generate_seconds,
+        "total_seconds": total,
+        "phases": recorder.phases,
+        "fs_calls": pruner.probe_stats.calls,
+        "http_requests": len(sonarr.requests),
+        "series_evaluated": pruner.series_evaluated,
+        "series_skipped": pruner.series_skipped,
+    }
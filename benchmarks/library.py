@@ -0,0 +1,76 @@
+"""
+Synthetic Sonarr library: series/season folders on disk plus the matching
+`/api/v3/series` records.
+
+Complete seasons get a `.firstcomplete` marker whose age decides what the
+prune does with them: `due_ratio` of them are older than the removal age,
+the rest are recent. Incomplete seasons have a folder but no marker.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+DAY = 86400
+
+
+def make_library(
+    root: str,
+    n_series: int,
+    *,
+    seasons_per_series: int = 3,
+    complete_ratio: float = 0.8,
+    due_ratio: float = 0.1,
+    keep_ratio: float = 0.02,
+    keep_tag_id: int = 1,
+    remove_after_days: int = 30,
+    marker: str = ".firstcomplete",
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """Create the library under `root`; returns Sonarr series JSON."""
+    rng = random.Random(seed)
+    now = time.time()
+    series = []
+    for i in range(n_series):
+        title = f"Series {i:05d}"
+        path = os.path.join(root, title)
+        seasons = []
+        for n in range(1, seasons_per_series + 1):
+            season_dir = os.path.join(path, f"Season {n}")
+            os.makedirs(season_dir, exist_ok=True)
+            total = 10
+            files = total
+            if rng.random() < complete_ratio:
+                age = (
+                    rng.uniform(remove_after_days + 1, remove_after_days + 60)
+                    if rng.random() < due_ratio
+                    else rng.uniform(0, remove_after_days - 2)
+                )
+                marker_path = os.path.join(season_dir, marker)
+                open(marker_path, "w").close()
+                ts = now - age * DAY
+                os.utime(marker_path, (ts, ts))
+            else:
+                files = rng.randrange(0, total)
+            seasons.append({
+                "seasonNumber": n,
+                "statistics": {
+                    "totalEpisodeCount": total,
+                    "episodeFileCount": files,
+                },
+            })
+        series.append({
+            "id": i + 1,
+            "title": title,
+            "sortTitle": title.lower(),
+            "year": 2000 + i % 25,
+            "path": path,
+            "tags": [keep_tag_id] if rng.random() < keep_ratio else [],
+            "seasons": seasons,
+        })
+    # Sonarr returns series in database order, not by title.
+    rng.shuffle(series)
+    return series
@@ -0,0 +1,134 @@
+"""
+Standalone benchmark runner (no pytest-benchmark needed).
+
+    python -m benchmarks.run --series 1000 10000 50000
+    python -m benchmarks.run --series 1000 --compare OLD.json
+
+Results are written to benchmarks/results/<version>-<timestamp>.json;
+--compare prints the change per phase against an earlier result file.
+"""
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+from app.version import __version__
+from benchmarks.harness import PHASES, run_scenario
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _key(result):
+    return (result["series"], result.get("scenario", ""))
+
+
+def _format_row(result):
+    cells = [f"{result['series']:>7}", f"{result['scenario']:<12}"]
+    for name in PHASES:
+        phase = result["phases"][name]
+        cells.append(f"{phase['seconds']:>8.3f}s")
+    cells.append(f"{result['total_seconds']:>8.3f}s")
+    cells.append(f"{result['fs_calls']:>8}")
+    peak = max(
+        phase["peak_bytes"] or 0 for phase in result["phases"].values())
+    cells.append(f"{peak / 1024 ** 2:>7.1f}MB")
+    return " ".join(cells)
+
+
+def _compare(results, old_path):
+    with open(old_path, "r") as f:
+        old = {_key(r): r for r in json.load(f)["results"]}
+    print(f"\nChange against {old_path}:")
+    for result in results:
+        before = old.get(_key(result))
+        if before is None:
+            continue
+        deltas = []
+        for name in PHASES + ("total",):
+            if name == "total":
+                a, b = before["total_seconds"], result["total_seconds"]
+            else:
+                a = before["phases"][name]["seconds"]
+                b = result["phases"][name]["seconds"]
+            pct = (b - a) / a * 100 if a else 0.0
+            deltas.append(f"{name} {pct:+.1f}%")
+        print(f"{result['series']:>7} {result['scenario']:<12} "
+              + ", ".join(deltas))
+
+
+def _run(n_series, seasons, settings, *, trace_memory):
+    with tempfile.TemporaryDirectory(prefix="prune-bench-") as workdir:
+        return run_scenario(
+            workdir,
+            n_series,
+            seasons_per_series=seasons,
+            settings=settings,
+            trace_memory=trace_memory,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark sonarr_prune on a synthetic library.")
+    parser.add_argument(
+        "--series", type=int, nargs="+", default=[1000, 10000],
+        help="library sizes to run (default: 1000 10000)")
+    parser.add_argument(
+        "--seasons", type=int, default=3, help="seasons per series")
+    parser.add_argument(
+        "--scan-workers", type=int, default=1, help="SCAN_WORKERS setting")
+    parser.add_argument(
+        "--no-memory", action="store_true",
+        help="skip the second, memory-traced run of each size")
+    parser.add_argument("--output", help="result file to write")
+    parser.add_argument("--compare", help="earlier result file")
+    args = parser.parse_args(argv)
+
+    # The run logs every season; keep the terminal for the results.
+    logging.basicConfig(level=logging.WARNING)
+
+    scenario = "serial"
+    settings = {}
+    if args.scan_workers > 1:
+        scenario = f"workers={args.scan_workers}"
+        settings["SCAN_WORKERS"] = args.scan_workers
+
+    print(f"{'series':>7} {'scenario':<12} "
+          + " ".join(f"{name:>9}" for name in PHASES + ("total",))
+          + f" {'fs calls':>8} {'peak':>9}")
+    results = []
+    for n_series in args.series:
+        result = _run(n_series, args.seasons, settings, trace_memory=False)
+        if not args.no_memory:
+            # tracemalloc slows Python down several times, so memory peaks
+            # come from a separate run and timings from the untraced one.
+            traced = _run(n_series, args.seasons, settings, trace_memory=True)
+            for name in PHASES:
+                result["phases"][name]["peak_bytes"] = \
+                    traced["phases"][name]["peak_bytes"]
+        result["scenario"] = scenario
+        results.append(result)
+        print(_format_row(result))
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(
+            RESULTS_DIR,
+            f"{__version__}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w") as f:
+        json.dump(
+            {"version": __version__, "created": time.time(),
+             "results": results},
+            f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        _compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+
+import httpx
+
+from benchmarks.fake_sonarr import FakeSonarr
+from benchmarks.harness import PHASES, run_scenario
+from benchmarks.library import make_library
+
+
+def test_make_library_creates_folders_and_markers(tmp_path):
+    series = make_library(
+        str(tmp_path), 20, seasons_per_series=2, complete_ratio=1.0)
+
+    assert len(series) == 20
+    assert len({s["id"] for s in series}) == 20
+    for serie in series:
+        for season in serie["seasons"]:
+            stats = season["statistics"]
+            assert stats["episodeFileCount"] == stats["totalEpisodeCount"]
+            marker = os.path.join(
+                serie["path"], f"Season {season['seasonNumber']}",
+                ".firstcomplete")
+            assert os.path.isfile(marker)
+
+
+def test_make_library_is_reproducible(tmp_path):
+    a = make_library(str(tmp_path / "a"), 10, seed=3)
+    b = make_library(str(tmp_path / "b"), 10, seed=3)
+    assert [s["title"] for s in a] == [s["title"] for s in b]
+    assert [s["tags"] for s in a] == [s["tags"] for s in b]
+
+
+def test_fake_sonarr_checks_api_key():
+    sonarr = FakeSonarr([{"id": 1, "title": "A"}], [])
+    with httpx.Client(transport=sonarr.transport) as client:
+        denied = client.get("http://sonarr/api/v3/series")
+        ok = client.get(
+            "http://sonarr/api/v3/series", headers={"X-Api-Key": "secret"})
+    assert denied.status_code == 401
+    assert ok.json() == [{"id": 1, "title": "A"}]
+    assert sonarr.requests == ["GET /api/v3/series"] * 2
+
+
+def test_run_scenario_reports_every_phase(tmp_path):
+    report = run_scenario(str(tmp_path), 30)
+
+    assert report["series"] == 30
+    assert report["series_evaluated"] > 0
+    assert report["fs_calls"] > 0
+    # status check, series and tags
+    assert report["http_requests"] >= 3
+    assert set(report["phases"]) == set(PHASES)
+    assert report["phases"]["scan"]["seconds"] > 0
+    assert report["phases"]["scan"]["peak_bytes"] > 0
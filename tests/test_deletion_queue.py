@@ -0,0 +1,93 @@
+"""Tests for the background season deletion queue."""
+
+import os
+import threading
+
+import pytest
+
+from app.deletion_queue import DeletionQueue, remove_tree
+
+
+def make_tree(root, files=3, size=100):
+    (root / "sub").mkdir(parents=True)
+    for i in range(files):
+        (root / f"f{i}.mkv").write_bytes(b"x" * size)
+    (root / "sub" / "g.srt").write_bytes(b"y" * size)
+    return root
+
+
+def test_remove_tree_counts_files_and_bytes(tmp_path):
+    root = make_tree(tmp_path / "Season 1")
+    assert remove_tree(str(root)) == (4, 400)
+    assert not root.exists()
+
+
+def test_remove_tree_missing_path(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        remove_tree(str(tmp_path / "gone"))
+
+
+def test_queue_returns_results_in_submission_order(tmp_path):
+    paths = [make_tree(tmp_path / f"S{i}", files=i) for i in range(1, 9)]
+    release = threading.Event()
+
+    def remover(path, **limits):
+        # The first submitted deletion is the last to finish.
+        if path.endswith("S1"):
+            release.wait(5)
+        result = remove_tree(path, **limits)
+        if path.endswith("S8"):
+            release.set()
+        return result
+
+    queue = DeletionQueue(4, remover=remover)
+    for i, path in enumerate(paths):
+        queue.submit(str(path), i)
+    queue.submit(str(tmp_path / "missing"), "missing")
+    results = queue.close()
+
+    assert [r.context for r in results] == list(range(8)) + ["missing"]
+    assert [r.files for r in results[:8]] == [i + 1 for i in range(1, 9)]
+    assert all(r.error is None for r in results[:8])
+    assert isinstance(results[-1].error, FileNotFoundError)
+    assert not any(os.path.exists(p) for p in paths)
+
+
+def test_queue_survives_unexpected_remover_errors(tmp_path):
+    path = make_tree(tmp_path / "S1")
+
+    def remover(path, **limits):
+        if path.endswith("bad"):
+            raise RuntimeError("boom")
+        return remove_tree(path, **limits)
+
+    queue = DeletionQueue(1, remover=remover)
+    queue.submit(str(tmp_path / "bad"), "bad")
+    queue.submit(str(path), "good")
+    results = queue.close()
+
+    assert [r.context for r in results] == ["bad", "good"]
+    assert isinstance(results[0].error, RuntimeError)
+    assert results[1].error is None and results[1].files == 4
+
+
+def test_queue_shares_limits_between_workers(tmp_path):
+    seen = []
+
+    def remover(path, *, files_bucket, bytes_bucket):
+        seen.append((files_bucket, bytes_bucket))
+        return 0, 0
+
+    queue = DeletionQueue(3, files_per_second=50, bytes_per_second=1e6,
+                          remover=remover)
+    for i in range(6):
+        queue.submit(f"/x/{i}")
+    queue.close()
+    assert len({(id(f), id(b)) for f, b in seen}) == 1
+    files_bucket, bytes_bucket = seen[0]
+    assert (files_bucket.rate, bytes_bucket.rate) == (50, 1e6)
+
+    unlimited = DeletionQueue(1, remover=remover)
+    unlimited.submit("/x/y")
+    unlimited.close()
+    assert seen[-1] == (None, None)
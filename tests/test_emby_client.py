@@ -0,0 +1,113 @@
+"""Tests for the Emby client against an in-process fake (MockTransport)."""
+
+import httpx
+import pytest
+
+from app.emby_client import EmbyClient, EmbyClientError
+
+ITEMS = [
+    {"Id": "1", "Name": "Beta", "Path": "/mnt/media/tv/Beta"},
+    {"Id": "2", "Name": "Alpha", "Path": "/mnt/media/tv/Alpha (2001)/"},
+    {"Id": "3", "Name": "No path"},
+]
+
+
+def fake_emby():
+    calls = []
+
+    def handler(request):
+        calls.append((request.method, request.url.path, request.url.params))
+        if request.url.params.get("api_key") != "secret":
+            return httpx.Response(401)
+        if request.url.path == "/Emby/Items":
+            return httpx.Response(200, json={"Items": ITEMS})
+        if request.method == "POST":
+            return httpx.Response(204)
+        return httpx.Response(404)
+
+    return handler, calls
+
+
+def make_client(handler, api_key="secret"):
+    return EmbyClient(
+        "http://emby/", api_key, transport=httpx.MockTransport(handler))
+
+
+def test_series_item_ids_match_on_folder_name():
+    handler, calls = fake_emby()
+    with make_client(handler) as emby:
+        found = emby.series_item_ids(
+            ["/tv/beta", "/tv/Alpha (2001)", "/tv/Gamma"])
+    assert found == {"/tv/beta": "1", "/tv/Alpha (2001)": "2"}
+    method, path, params = calls[0]
+    assert (method, path) == ("GET", "/Emby/Items")
+    assert params["IncludeItemTypes"] == "Series"
+
+
+def test_refresh_item_and_library():
+    handler, calls = fake_emby()
+    with make_client(handler) as emby:
+        emby.refresh_item("2")
+        emby.refresh_library()
+    assert [(m, p) for m, p, _ in calls] == [
+        ("POST", "/Emby/Items/2/Refresh"),
+        ("POST", "/Emby/Library/Refresh"),
+    ]
+    assert calls[0][2]["Recursive"] == "true"
+
+
+def test_errors_raise_emby_client_error():
+    handler, _ = fake_emby()
+    with make_client(handler, api_key="wrong") as emby:
+        with pytest.raises(EmbyClientError, match="401"):
+            emby.refresh_library()
+
+
+def test_bad_items_response_raises_emby_client_error():
+    def not_json(request):
+        return httpx.Response(200, text="<html>proxy login</html>")
+
+    def no_id(request):
+        return httpx.Response(
+            200, json={"Items": [{"Path": "/mnt/media/tv/Beta"}]})
+
+    for handler in (not_json, no_id):
+        with make_client(handler) as emby:
+            with pytest.raises(EmbyClientError, match="Invalid items"):
+                emby.series_item_ids(["/tv/Beta"])
+
+
+def test_jellyfin_uses_plain_paths_and_auth_header():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(204)
+
+    with EmbyClient(
+        "http://jellyfin", "jelly", kind="jellyfin",
+        transport=httpx.MockTransport(handler),
+    ) as jellyfin:
+        jellyfin.refresh_item("7")
+    assert seen[0].url.path == "/Items/7/Refresh"
+    assert "api_key" not in seen[0].url.params
+    assert seen[0].headers["Authorization"] == 'MediaBrowser Token="jelly"'
+
+
+def test_transient_errors_are_retried_on_a_shared_session():
+    from app.sonarr_client import RetryPolicy
+
+    statuses = [503, 204]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0))
+
+    session = httpx.Client(transport=httpx.MockTransport(handler))
+    emby = EmbyClient(
+        "http://emby", "secret", session=session,
+        retry=RetryPolicy(retries=1, backoff=0.001))
+    emby.refresh_library()
+    emby.close()
+    assert statuses == []
+    assert not session.is_closed
+    session.close()
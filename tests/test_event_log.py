@@ -0,0 +1,61 @@
+"""Tests for the buffered run log."""
+
+import json
+
+from app.event_log import EventLog
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_text_log_is_buffered_and_flushed_in_batches(tmp_path):
+    path = tmp_path / "run.log"
+    clock = FakeClock()
+    log = EventLog(str(path), flush_lines=3, clock=clock)
+    log.write("one\n", truncate=True)
+    log.write("two\n")
+    assert path.read_text() == ""
+    log.write("three\n")
+    assert [line.split(" - ", 1)[1] for line in
+            path.read_text().splitlines()] == ["one", "two", "three"]
+
+    log.write("four\n")
+    clock.now += 10  # flush_seconds elapsed
+    log.write("five\n")
+    assert path.read_text().endswith(" - five\n")
+    log.close()
+
+
+def test_truncate_starts_a_new_file(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text("old run\n")
+    log = EventLog(str(path))
+    log.write("appended\n")
+    log.flush()
+    assert path.read_text().startswith("old run\n")
+    log.write("fresh\n", truncate=True)
+    log.close()
+    assert path.read_text().endswith(" - fresh\n")
+    assert "old run" not in path.read_text()
+
+
+def test_jsonl_events(tmp_path):
+    log = EventLog(str(tmp_path / "run.log"))
+    log.event("ignored")  # no JSONL path configured
+    log.close()
+    assert not (tmp_path / "run.jsonl").exists()
+
+    log = EventLog(str(tmp_path / "run.log"),
+                   jsonl_path=str(tmp_path / "run.jsonl"))
+    log.event("remove", series="Show", season=2, bytes_freed=10)
+    log.close()
+    record, = map(json.loads, open(tmp_path / "run.jsonl"))
+    assert record["event"] == "remove"
+    assert (record["series"], record["season"], record["bytes_freed"]) == (
+        "Show", 2, 10)
+    log.close()  # closing twice is harmless
@@ -0,0 +1,39 @@
+"""Tests for the spill-to-disk sorter."""
+
+import random
+
+from app.external_sort import ExternalSorter, sorted_spilling
+from app.sonarr_client import Season, Series
+
+
+def test_matches_builtin_sort_and_is_stable():
+    rng = random.Random(4)
+    items = [(rng.randint(0, 20), i) for i in range(500)]
+    out = list(sorted_spilling(items, key=lambda t: t[0], max_in_memory=37))
+    assert out == sorted(items, key=lambda t: t[0])
+
+
+def test_spills_only_past_threshold():
+    sorter = ExternalSorter(key=lambda x: x, max_in_memory=10)
+    sorter.extend(range(9, -1, -1))
+    assert sorter.spilled_runs == 1
+    assert list(sorter) == list(range(10))
+    assert sorter.spilled_runs == 0
+
+    small = ExternalSorter(key=lambda x: x, max_in_memory=10)
+    small.extend([3, 1, 2])
+    assert small.spilled_runs == 0
+    assert list(small) == [1, 2, 3]
+
+
+def test_series_round_trip_through_spill():
+    series = [
+        Series(f"s{i:03d}", f"S{i}", 2000, f"/tv/{i}", [i],
+               [Season(1, 2, 2)])
+        for i in range(50)
+    ]
+    shuffled = series[:]
+    random.Random(1).shuffle(shuffled)
+    out = list(sorted_spilling(
+        shuffled, key=lambda s: s.sortTitle, max_in_memory=8))
+    assert out == series
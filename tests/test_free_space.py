@@ -0,0 +1,81 @@
+import os
+
+from app.free_space import FreeSpaceTarget, Volume, directory_size
+
+GB = 1024 ** 3
+
+
+def test_volume_pops_oldest_then_largest_until_target():
+    volume = Volume("/tv", free=10 * GB, target=25 * GB)
+    volume.push(300.0, 4 * GB, "newest")
+    volume.push(100.0, 6 * GB, "old small")
+    volume.push(100.0, 8 * GB, "old large")
+    volume.push(200.0, 5 * GB, "middle")
+
+    removed = []
+    for size, item in volume.pop_needed():
+        removed.append(item)
+        volume.reclaimed += size
+    assert removed == ["old large", "old small", "middle"]
+    assert volume.short == 0
+    assert volume.held == 1
+
+
+def test_volume_counts_actual_bytes_freed():
+    volume = Volume("/tv", free=0, target=2 * GB)
+    for age in range(3):
+        volume.push(float(age), GB, age)
+    removed = []
+    for _size, item in volume.pop_needed():
+        removed.append(item)
+        volume.reclaimed += GB // 4  # less than Sonarr's size estimate
+    assert removed == [0, 1, 2]
+    assert volume.short > 0
+    assert volume.held == 0
+
+
+def test_roots_on_one_filesystem_share_a_volume():
+    devices = {"/tv": 1, "/tv/anime": 1, "/4k": 2, "/other/Show": 3}
+
+    def device(path):
+        if path not in devices:
+            raise FileNotFoundError(path)
+        return devices[path]
+
+    target = FreeSpaceTarget(
+        ["/tv", "/tv/anime", "/4k", "/gone"],
+        100,
+        free_bytes=lambda path: {1: 10, 2: 500, 3: 0}[devices[path]],
+        device=device,
+    )
+    assert len(target.volumes) == 2
+    tv = target.volume_for("/tv/anime/Show")
+    assert tv is target.volume_for("/tv/Show")
+    assert (tv.root, tv.free, tv.short) == ("/tv", 10, 90)
+    assert target.volume_for("/4k/Show").short == 0
+    # Outside the root folders the series' own filesystem is used
+    assert target.volume_for("/other/Show").free == 0
+    assert len(target.volumes) == 3
+
+
+def test_roots_added_later_join_existing_volumes():
+    devices = {"/tv": 1, "/anime": 1, "/4k": 2}
+
+    def device(path):
+        if path not in devices:
+            raise FileNotFoundError(path)
+        return devices[path]
+
+    target = FreeSpaceTarget(
+        ["/tv"], 100, free_bytes=lambda path: 10, device=device)
+    target.add_roots(["/anime", "/4k", "/gone"])
+    assert len(target.volumes) == 2
+    assert target.volume_for("/anime/Show") is target.volume_for("/tv/Show")
+
+
+def test_directory_size(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "one.mkv").write_bytes(b"x" * 100)
+    (tmp_path / "two.mkv").write_bytes(b"x" * 23)
+    assert directory_size(str(tmp_path)) == 123
+    assert directory_size(os.path.join(str(tmp_path), "missing")) == 0
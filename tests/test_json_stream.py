@@ -0,0 +1,58 @@
+"""Tests for the incremental JSON array parser."""
+
+import asyncio
+import json
+
+import pytest
+
+from app.json_stream import JsonArrayParser, aiter_json_array, iter_json_array
+
+DOC = [
+    {"title": "Café \"quoted\" [x]", "seasons": [{"n": 1}, {"n": 2}]},
+    {"title": "Plain", "tags": [], "nested": {"a": {"b": "}"}}},
+    42,
+    "str, with comma",
+    None,
+]
+
+
+def chunks_of(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 10_000])
+def test_any_chunking_gives_same_items(size):
+    raw = json.dumps(DOC, ensure_ascii=False).encode("utf-8")
+    assert list(iter_json_array(chunks_of(raw, size))) == DOC
+
+
+def test_empty_array_and_whitespace():
+    assert list(iter_json_array([b"  [ ", b" ]\n"])) == []
+
+
+def test_items_are_yielded_before_the_array_ends():
+    parser = JsonArrayParser()
+    assert parser.feed(b'[{"a": 1}, {"b"') == [{"a": 1}]
+    assert parser.feed(b': 2}]') == [{"b": 2}]
+    assert parser.close() == []
+
+
+def test_truncated_array_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'[{"a": 1}, {"b": 2']))
+
+
+def test_non_array_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"a": 1}']))
+
+
+def test_async_variant():
+    async def chunks():
+        for c in chunks_of(json.dumps(DOC).encode(), 5):
+            yield c
+
+    async def collect():
+        return [item async for item in aiter_json_array(chunks())]
+
+    assert asyncio.run(collect()) == DOC
@@ -0,0 +1,92 @@
+"""Tests for the prune summary mail."""
+
+import gzip
+
+from app.mailer import build_summary_mail, send_mail, summary_lines
+
+LOG = (
+    "2024-01-01 10:00:00 - Prune - Sonarr Prune 1.0 started.\n"
+    "2024-01-01 10:00:01 - PRUNE: ACTIVE - Show Season 01 (2020)\n"
+    "2024-01-01 10:00:02 - PRUNE: WARNING - Show Season 02 (2020) will be"
+    " removed in 1 day.\n"
+    "2024-01-01 10:00:03 - PRUNE: REMOVED - Show (2020) - Season 03\n"
+    "2024-01-01 10:00:04 - Prune - There were 1 seasons removed.\n"
+)
+
+
+def write_log(tmp_path, text=LOG):
+    path = tmp_path / "sonarr_prune.log"
+    path.write_text(text)
+    return str(path)
+
+
+def test_summary_lines_keep_warnings_and_removals(tmp_path):
+    lines = summary_lines(write_log(tmp_path))
+    assert len(lines) == 2
+    assert "PRUNE: WARNING" in lines[0] and "PRUNE: REMOVED" in lines[1]
+
+
+def test_mail_has_short_body_and_gzip_attachment(tmp_path):
+    log_path = write_log(tmp_path, LOG * 200)
+    message = build_summary_mail(
+        sender="from@example.test",
+        receivers=["a@example.test", "b@example.test"],
+        subject="Sonarr - Pruned 1 seasons",
+        log_path=log_path,
+        log_name="sonarr_prune.log",
+        removed=1,
+        notified=1,
+        max_lines=10,
+    )
+    assert message["To"] == "a@example.test, b@example.test"
+    body = message.get_body(("plain",)).get_content()
+    assert "removed 1 seasons and planned 1" in body
+    assert "PRUNE: ACTIVE" not in body
+    assert body.count("PRUNE: ") == 10
+    assert "390 more" in body
+
+    attachment, = message.iter_attachments()
+    assert attachment.get_filename() == "sonarr_prune.log.gz"
+    data = attachment.get_content()
+    assert gzip.decompress(data).decode() == LOG * 200
+    assert len(data) < len(LOG * 200) / 10
+
+
+def test_send_mail_uses_timeout_and_starttls(tmp_path):
+    calls = []
+
+    class FakeSMTP:
+        def __init__(self, server, port, timeout):
+            calls.append(("connect", server, port, timeout))
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            calls.append(("quit",))
+
+        def starttls(self):
+            calls.append(("starttls",))
+
+        def login(self, user, password):
+            calls.append(("login", user))
+
+        def send_message(self, message):
+            calls.append(("send", message["Subject"]))
+
+    message = build_summary_mail(
+        sender="s", receivers=["r"], subject="hi",
+        log_path=write_log(tmp_path), log_name="x.log",
+        removed=0, notified=0,
+    )
+    send_mail(
+        message, server="smtp", port=587, login="u", password="p",
+        timeout=5, smtp_factory=FakeSMTP,
+    )
+    assert calls == [
+        ("connect", "smtp", 587, 5),
+        ("starttls",),
+        ("login", "u"),
+        ("send", "hi"),
+        ("quit",),
+    ]
@@ -0,0 +1,109 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from app.metrics import MetricsRegistry, MetricsServer, RunMetrics
+
+
+def test_counter_and_gauge_text_format():
+    registry = MetricsRegistry()
+    runs = registry.counter("prune_runs", "Runs.", ["result"])
+    last = registry.gauge("prune_last", "Last run.")
+    runs.inc(result="ok")
+    runs.inc(2, result="ok")
+    runs.inc(result='say "hi"\n')
+    last.set(1.5)
+
+    text = registry.render()
+    assert "# TYPE prune_runs_total counter" in text
+    assert 'prune_runs_total{result="ok"} 3' in text
+    assert 'prune_runs_total{result="say \\"hi\\"\\n"} 1' in text
+    assert "prune_last 1.5" in text
+    assert "# EOF" not in text
+
+
+def test_openmetrics_counter_family_and_eof():
+    registry = MetricsRegistry()
+    registry.counter("prune_runs", "Runs.").inc()
+
+    text = registry.render(openmetrics=True)
+    assert "# TYPE prune_runs counter" in text
+    assert "prune_runs_total 1" in text
+    assert text.endswith("# EOF\n")
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    hist = registry.histogram("phase_seconds", "Phases.", ["phase"],
+                              buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 7.0):
+        hist.observe(value, phase="scan")
+
+    lines = registry.render().splitlines()
+    assert 'phase_seconds_bucket{phase="scan",le="0.1"} 2' in lines
+    assert 'phase_seconds_bucket{phase="scan",le="1"} 3' in lines
+    assert 'phase_seconds_bucket{phase="scan",le="+Inf"} 4' in lines
+    assert 'phase_seconds_count{phase="scan"} 4' in lines
+    assert 'phase_seconds_sum{phase="scan"} 7.65' in lines
+    assert hist.count(phase="scan") == 4
+
+
+def test_wrong_labels_are_rejected():
+    registry = MetricsRegistry()
+    counter = registry.counter("calls", "Calls.", ["service"])
+    with pytest.raises(ValueError):
+        counter.inc(status=200)
+
+
+def test_metric_kinds_must_render():
+    from app.metrics import _Metric
+
+    class Unrendered(_Metric):
+        kind = "gauge"
+
+    with pytest.raises(TypeError):
+        Unrendered("calls", "Calls.")
+
+
+def test_write_textfile_replaces_file(tmp_path):
+    metrics = RunMetrics()
+    metrics.run_finished(removed=3, planned=1)
+    path = tmp_path / "sonarr_prune.prom"
+    path.write_text("stale\n")
+
+    metrics.registry.write_textfile(str(path))
+
+    text = path.read_text()
+    assert "stale" not in text
+    assert "sonarr_prune_runs_total 1" in text
+    assert 'sonarr_prune_last_run_seasons{result="removed"} 3' in text
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_server_negotiates_format():
+    metrics = RunMetrics()
+    metrics.api_call("sonarr", 0.02, 200)
+    server = MetricsServer(metrics.registry, 0, "127.0.0.1")
+    url = f"http://127.0.0.1:{server.port}"
+    try:
+        with urllib.request.urlopen(f"{url}/metrics") as r:
+            text = r.read().decode()
+            assert r.headers["Content-Type"].startswith("text/plain")
+        assert (
+            'sonarr_prune_api_requests_total{service="sonarr",status="200"} 1'
+            in text)
+
+        request = urllib.request.Request(
+            f"{url}/metrics",
+            headers={"Accept": "application/openmetrics-text"})
+        with urllib.request.urlopen(request) as r:
+            assert r.read().decode().endswith("# EOF\n")
+            assert r.headers["Content-Type"].startswith(
+                "application/openmetrics-text")
+
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(f"{url}/other")
+        assert e.value.code == 404
+    finally:
+        server.close()
@@ -0,0 +1,103 @@
+"""Tests for the batched Pushover notification dispatcher."""
+
+import threading
+
+from app.notifier import NotificationDispatcher, build_digests
+
+
+def test_build_digests_packs_in_order_within_limit():
+    messages = [f"message {i:02d}" for i in range(10)]  # 10 chars each
+    digests = build_digests(messages, max_length=32)
+    assert all(len(d) <= 32 for d in digests)
+    assert "\n".join(digests).split("\n") == messages
+    assert len(digests) == 4  # 2 messages + newlines fit in 32, 3 do not
+
+    long, = build_digests(["x" * 50], max_length=20)
+    assert len(long) == 20 and long.endswith("…")
+    assert build_digests([]) == []
+
+
+def test_dispatcher_combines_messages_on_flush():
+    sent = []
+    dispatcher = NotificationDispatcher(sent.append, linger=60)
+    for i in range(5):
+        dispatcher.notify(f"season {i}")
+    dispatcher.flush()
+    assert sent == ["\n".join(f"season {i}" for i in range(5))]
+    dispatcher.notify("done")
+    dispatcher.close()
+    assert sent[-1] == "done"
+    assert (dispatcher.messages, dispatcher.sent) == (6, 2)
+
+
+def test_dispatcher_counts_messages_from_several_threads():
+    dispatcher = NotificationDispatcher(lambda text: None, linger=60)
+    threads = [
+        threading.Thread(target=lambda: [
+            dispatcher.notify("season") for _ in range(500)])
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    dispatcher.close()
+    assert dispatcher.messages == 2000
+
+
+def test_dispatcher_sends_full_digests_without_waiting_for_flush():
+    sent = []
+    full = threading.Event()
+
+    def send(text):
+        sent.append(text)
+        full.set()
+
+    dispatcher = NotificationDispatcher(send, linger=60, max_length=30)
+    for i in range(4):
+        dispatcher.notify(f"removed season {i}")  # 16 chars
+    assert full.wait(5)
+    dispatcher.close()
+    assert len(sent) == 4
+    assert all(len(d) <= 30 for d in sent)
+
+
+def test_notify_does_not_block_on_slow_sends():
+    release = threading.Event()
+    sent = []
+
+    def send(text):
+        release.wait(5)
+        sent.append(text)
+
+    dispatcher = NotificationDispatcher(send, linger=0)
+    for i in range(100):
+        dispatcher.notify(f"event {i}")
+    assert sent == []
+    release.set()
+    dispatcher.close()
+    assert "\n".join(sent).split("\n") == [f"event {i}" for i in range(100)]
+
+
+def test_failed_sends_are_retried_with_backoff():
+    attempts = []
+    slept = []
+
+    def send(text):
+        attempts.append(text)
+        if len(attempts) < 3:
+            raise OSError("rate limited")
+
+    dispatcher = NotificationDispatcher(
+        send, linger=0, retries=3, backoff=0.5, sleep=slept.append)
+    dispatcher.notify("hello")
+    dispatcher.close()
+    assert attempts == ["hello"] * 3
+    assert slept == [0.5, 1.0]
+    assert (dispatcher.sent, dispatcher.failed) == (1, 0)
+
+    failing = NotificationDispatcher(
+        lambda text: 1 / 0, linger=0, retries=1, sleep=slept.append)
+    failing.notify("lost")
+    failing.close()
+    assert (failing.sent, failing.failed) == (0, 1)
@@ -0,0 +1,75 @@
+import time
+from types import SimpleNamespace
+
+from app.profiler import RunProfiler, SeriesLatency
+
+
+def _serie(name, year=2020):
+    return SimpleNamespace(title=name, year=year, path=f"/tv/{name}")
+
+
+class FakePruner:
+    def __init__(self, series):
+        self.series = series
+        self.sent = []
+
+    def _probe_series(self, serie):
+        time.sleep(0.05 if serie.title == "Slow" else 0)
+        return [None]
+
+    def _season_first_complete_at(self, serie, season, probe=None):
+        return None
+
+    def _send_pushover(self, message):
+        self.sent.append(message)
+
+    def evalSeason(self, serie, season, probe=None, dec=None):
+        self._season_first_complete_at(serie, season, probe)
+        self._send_pushover(f"{serie.title} S{season}")
+        return False, False
+
+    def run(self):
+        for serie in self.series:
+            probes = self._probe_series(serie)
+            for season, probe in enumerate(probes, 1):
+                self.evalSeason(serie, season, probe)
+        self._send_pushover("summary")
+
+
+def test_series_latency_attributes_nested_calls():
+    latency = SeriesLatency()
+    calls = []
+    notify = latency.timed(calls.append, "notify", per_series=False)
+    evaluate = latency.timed(
+        lambda serie: notify(serie.title), "evaluate", per_series=True)
+
+    serie = _serie("A")
+    evaluate(serie)
+    evaluate(serie)
+    notify("outside any series")
+
+    timing = latency.series["/tv/A"]
+    assert calls == ["A", "A", "outside any series"]
+    assert timing.seasons == 2
+    assert timing.seconds["notify"] > 0
+    assert timing.seconds["evaluate"] >= timing.seconds["notify"]
+    assert list(latency.series) == ["/tv/A"]
+
+
+def test_run_profiler_writes_stats_and_slowest_series(tmp_path):
+    pruner = FakePruner([_serie("Fast"), _serie("Slow"), _serie("Other")])
+    prefix = str(tmp_path / "prune.profile")
+
+    with RunProfiler(pruner, prefix) as profiler:
+        pruner.run()
+
+    assert (tmp_path / "prune.profile.pstats").stat().st_size > 0
+    report = (tmp_path / "prune.profile.txt").read_text()
+    table = report.split("\n\n")[1].splitlines()
+    assert table[1].endswith("Slow (2020)")
+    assert "function calls" in report
+    assert profiler.latency.slowest(1)[0].title == "Slow"
+    assert pruner.sent == ["Fast S1", "Slow S1", "Other S1", "summary"]
+    # Wrappers are removed again
+    assert "evalSeason" not in vars(pruner)
+    assert "_probe_series" not in vars(pruner)
@@ -0,0 +1,39 @@
+"""Tests for the prune calendar (sorted index of upcoming events)."""
+
+from app.prune_calendar import CalendarEvent, PruneCalendar
+
+
+def event(due, path="/tv/A", season=1, kind="remove"):
+    return CalendarEvent(due, kind, path, season, path.rsplit("/", 1)[-1])
+
+
+def test_next_after_and_between_follow_due_order():
+    calendar = PruneCalendar([event(30), event(10, "/tv/B"), event(20)])
+    assert calendar.next_after(0).due == 10
+    assert calendar.next_after(10).due == 20
+    assert calendar.next_after(30) is None
+    assert [e.due for e in calendar.between(10, 30)] == [10, 20]
+
+
+def test_replace_and_drop_series():
+    calendar = PruneCalendar([event(10), event(20, "/tv/B")])
+    calendar.replace_series("/tv/A", [event(50), event(5, kind="warn")])
+    assert [(e.due, e.kind) for e in calendar.between(0, 100)] == [
+        (5, "warn"), (20, "remove"), (50, "remove")]
+    calendar.drop_series("/tv/B")
+    calendar.replace_series("/tv/A", [])
+    assert len(calendar) == 0
+    assert calendar.next_after(0) is None
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "calendar.json")
+    calendar = PruneCalendar([event(20, season=2), event(10)])
+    calendar.save(path)
+    loaded = PruneCalendar.load(path)
+    assert loaded.between(0, 100) == calendar.between(0, 100)
+    assert loaded.next_after(0).title == "A"
+
+    assert len(PruneCalendar.load(str(tmp_path / "missing.json"))) == 0
+    (tmp_path / "bad.json").write_text("[1, 2")
+    assert len(PruneCalendar.load(str(tmp_path / "bad.json"))) == 0
@@ -0,0 +1,120 @@
+"""Unit tests for the adaptive API rate limiter (fake clock, no sleeping)."""
+
+from app.rate_limiter import (
+    AdaptiveRateLimiter,
+    TokenBucket,
+    parse_retry_after,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(clock, **kwargs):
+    kwargs.setdefault("slow_latency", 2.0)
+    return AdaptiveRateLimiter(
+        kwargs.pop("min_interval", 0.0),
+        kwargs.pop("max_interval", 5.0),
+        clock=clock,
+        sleep=clock.sleep,
+        **kwargs,
+    )
+
+
+def test_no_delay_when_fast():
+    clock = FakeClock()
+    lim = make_limiter(clock)
+    for _ in range(5):
+        lim.wait()
+        lim.observe(0.05, 200)
+    assert clock.slept == []
+    assert lim.interval == 0.0
+
+
+def test_min_interval_spaces_calls():
+    clock = FakeClock()
+    lim = make_limiter(clock, min_interval=0.5)
+    lim.wait()
+    lim.wait()
+    assert clock.slept == [0.5]
+
+
+def test_backs_off_on_throttle_status_and_recovers():
+    clock = FakeClock()
+    lim = make_limiter(clock)
+    lim.observe(0.1, 429)
+    assert lim.interval == 0.25
+    lim.observe(0.1, 503)
+    assert lim.interval == 0.5
+    lim.observe(0.1, 200)
+    assert lim.interval == 0.25
+    lim.observe(0.1, 200)
+    assert lim.interval == 0.0
+
+
+def test_backs_off_on_slow_latency_capped_at_max():
+    clock = FakeClock()
+    lim = make_limiter(clock, max_interval=1.0)
+    for _ in range(10):
+        lim.observe(3.0, 200)
+    assert lim.interval == 1.0
+
+
+def test_retry_after_delays_next_call():
+    clock = FakeClock()
+    lim = make_limiter(clock)
+    lim.observe(0.1, 429, retry_after=3.0)
+    lim.wait()
+    assert clock.slept == [3.0]
+
+
+def test_retry_after_is_capped_at_max_interval():
+    clock = FakeClock()
+    lim = make_limiter(clock, max_interval=5.0)
+    lim.observe(0.1, 503, retry_after=86400.0)
+    lim.wait()
+    assert clock.slept == [5.0]
+    assert lim.interval == 5.0
+
+
+def test_observer_sees_every_call():
+    clock = FakeClock()
+    seen = []
+    limiter = make_limiter(
+        clock, observer=lambda seconds, status: seen.append((seconds, status)))
+    limiter.observe(0.2, 200)
+    limiter.observe(3.0)
+    assert seen == [(0.2, 200), (3.0, None)]
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("garbage") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_token_bucket_waits_for_deficit():
+    clock = FakeClock()
+    bucket = TokenBucket(10, clock=clock, sleep=clock.sleep)
+    for _ in range(10):
+        bucket.consume()
+    assert clock.slept == []
+    bucket.consume(5)
+    assert clock.slept == [0.5]
+    clock.now += 2.0
+    bucket.consume(10)
+    assert len(clock.slept) == 1
+
+    TokenBucket(0, clock=clock, sleep=clock.sleep).consume(1_000)
+    assert len(clock.slept) == 1
@@ -0,0 +1,63 @@
+"""Tests for daemon schedules (interval and cron)."""
+
+import threading
+from datetime import datetime
+
+import pytest
+
+from app.scheduler import CronSchedule, IntervalSchedule, run_forever
+
+
+def test_interval_schedule():
+    when = datetime(2024, 1, 1, 12, 0)
+    assert IntervalSchedule(90).next_after(when) == datetime(
+        2024, 1, 1, 12, 1, 30)
+    with pytest.raises(ValueError):
+        IntervalSchedule(0)
+
+
+@pytest.mark.parametrize(
+    "expression, after, expected",
+    [
+        ("*/15 * * * *", (2024, 1, 1, 12, 7, 30), (2024, 1, 1, 12, 15)),
+        ("0 3 * * *", (2024, 1, 1, 3, 0), (2024, 1, 2, 3, 0)),
+        ("30 4 1 * *", (2024, 1, 31, 5, 0), (2024, 2, 1, 4, 30)),
+        # 2024-01-06 is a Saturday; 0 and 7 are both Sunday
+        ("0 0 * * 0", (2024, 1, 6, 12, 0), (2024, 1, 7, 0, 0)),
+        ("0 0 * * 7", (2024, 1, 6, 12, 0), (2024, 1, 7, 0, 0)),
+        ("0 9 * * 1-5", (2024, 1, 5, 10, 0), (2024, 1, 8, 9, 0)),
+        ("0 0 29 2 *", (2024, 3, 1, 0, 0), (2028, 2, 29, 0, 0)),
+        # both day fields restricted: either matches (the 13th or Friday)
+        ("0 0 13 * 5", (2024, 1, 1, 0, 0), (2024, 1, 5, 0, 0)),
+        ("5,35 1-2 * 12 *", (2024, 1, 1, 0, 0), (2024, 12, 1, 1, 5)),
+    ],
+)
+def test_cron_next_after(expression, after, expected):
+    schedule = CronSchedule(expression)
+    assert schedule.next_after(datetime(*after)) == datetime(*expected)
+
+
+@pytest.mark.parametrize(
+    "expression", ["* * * *", "60 * * * *", "*/0 * * * *", "x * * * *"])
+def test_cron_rejects_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_run_forever_runs_until_stopped_and_survives_errors():
+    stop = threading.Event()
+    runs = []
+
+    def job():
+        runs.append(len(runs))
+        if len(runs) == 1:
+            raise RuntimeError("boom")
+        if len(runs) == 2:
+            raise SystemExit(1)
+        if len(runs) == 3:
+            stop.set()
+
+    now = datetime(2024, 1, 1)
+    count = run_forever(job, lambda when: when, stop, now=lambda: now)
+    assert count == 3
+    assert runs == [0, 1, 2]
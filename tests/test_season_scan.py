@@ -0,0 +1,192 @@
+"""Tests for the season folder probe and the threaded scanner."""
+
+import os
+from datetime import datetime
+
+from app.season_scan import (
+    ProbeStats,
+    SeasonScanner,
+    batched,
+    probe_season,
+    probe_series,
+)
+from app.sonarr_client import Season, Series
+
+
+def make_series(root, title, seasons):
+    path = root / title
+    path.mkdir()
+    for season in seasons:
+        name = (
+            "Specials" if season.seasonNumber == 0
+            else f"Season {season.seasonNumber}"
+        )
+        (path / name).mkdir()
+    return Series(
+        sortTitle=title.lower(),
+        title=title,
+        year=2020,
+        path=str(path),
+        tagsIds=[],
+        seasons=seasons,
+    )
+
+
+def test_probe_missing_folder(tmp_path):
+    season = Season(seasonNumber=1, totalEpisodeCount=5, episodeFileCount=5)
+    probe = probe_season(str(tmp_path), season, ".firstcomplete")
+    assert probe.first_complete_at is None
+    assert probe.created is False
+
+
+def test_probe_incomplete_season_creates_no_marker(tmp_path):
+    (tmp_path / "Season 1").mkdir()
+    season = Season(seasonNumber=1, totalEpisodeCount=5, episodeFileCount=4)
+    probe = probe_season(str(tmp_path), season, ".firstcomplete")
+    assert probe.first_complete_at is None
+    assert not (tmp_path / "Season 1" / ".firstcomplete").exists()
+
+
+def test_probe_creates_then_reads_marker(tmp_path):
+    (tmp_path / "Specials").mkdir()
+    season = Season(seasonNumber=0, totalEpisodeCount=2, episodeFileCount=2)
+    first = probe_season(str(tmp_path), season, ".firstcomplete")
+    assert first.created is True
+    assert isinstance(first.first_complete_at, datetime)
+
+    marker = tmp_path / "Specials" / ".firstcomplete"
+    os.utime(marker, (1_600_000_000, 1_600_000_000))
+    second = probe_season(str(tmp_path), season, ".firstcomplete")
+    assert second.created is False
+    assert second.first_complete_at == datetime.fromtimestamp(1_600_000_000)
+
+
+def test_scanner_keeps_input_order(tmp_path):
+    jobs = []
+    for i in range(20):
+        seasons = [
+            Season(seasonNumber=n, totalEpisodeCount=1, episodeFileCount=1)
+            for n in range(1, 4)
+        ]
+        serie = make_series(tmp_path, f"Show {i}", seasons)
+        for n, season in enumerate(seasons):
+            marker = os.path.join(serie.path, f"Season {n + 1}", ".fc")
+            open(marker, "w").close()
+            ts = 1_600_000_000 + i * 10 + n
+            os.utime(marker, (ts, ts))
+            jobs.append((serie, season))
+
+    def probe(job):
+        serie, season = job
+        return probe_season(serie.path, season, ".fc")
+
+    with SeasonScanner(probe, workers=4) as scanner:
+        probes = scanner.probe_many(jobs)
+
+    expected = [
+        probe_season(serie.path, season, ".fc") for serie, season in jobs
+    ]
+    assert probes == expected
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 3)) == []
+
+
+def test_indexed_probe_uses_index_without_touching_marker(tmp_path):
+    (tmp_path / "Season 1").mkdir()
+    season = Season(seasonNumber=1, totalEpisodeCount=3, episodeFileCount=3)
+    index = {(str(tmp_path), 1): 1_600_000_000.0}
+    probe, = probe_series(str(tmp_path), [season], ".fc", index=index)
+    assert probe.first_complete_at == datetime.fromtimestamp(1_600_000_000)
+    assert probe.store_timestamp is None
+    assert not (tmp_path / "Season 1" / ".fc").exists()
+
+
+def test_indexed_probe_imports_existing_marker(tmp_path):
+    (tmp_path / "Season 2").mkdir()
+    marker = tmp_path / "Season 2" / ".fc"
+    marker.touch()
+    os.utime(marker, (1_500_000_000, 1_500_000_000))
+    season = Season(seasonNumber=2, totalEpisodeCount=3, episodeFileCount=3)
+    probe, = probe_series(str(tmp_path), [season], ".fc", index={})
+    assert probe.created is False
+    assert probe.store_timestamp == 1_500_000_000
+
+
+def test_indexed_probe_new_season_without_marker(tmp_path):
+    (tmp_path / "Season 1").mkdir()
+    season = Season(seasonNumber=1, totalEpisodeCount=3, episodeFileCount=3)
+    probe, = probe_series(
+        str(tmp_path), [season], ".fc", index={}, write_marker=False)
+    assert probe.created is True
+    assert probe.store_timestamp is not None
+    assert not (tmp_path / "Season 1" / ".fc").exists()
+
+    probe_series(str(tmp_path), [season], ".fc", index={})
+    assert (tmp_path / "Season 1" / ".fc").exists()
+
+
+def test_probe_series_lists_folder_once_and_counts_calls(tmp_path):
+    seasons = [
+        Season(seasonNumber=0, totalEpisodeCount=1, episodeFileCount=1),
+        Season(seasonNumber=1, totalEpisodeCount=4, episodeFileCount=4),
+        Season(seasonNumber=2, totalEpisodeCount=4, episodeFileCount=1),
+        Season(seasonNumber=3, totalEpisodeCount=4, episodeFileCount=4),
+    ]
+    for name in ("Specials", "Season 1", "Season 2"):
+        (tmp_path / name).mkdir()
+    (tmp_path / "Season 1" / ".fc").touch()
+
+    stats = ProbeStats()
+    probes = probe_series(str(tmp_path), seasons, ".fc", stats=stats)
+    assert [p.first_complete_at is not None for p in probes] == [
+        True, True, False, False]
+    assert [p.created for p in probes] == [True, False, False, False]
+    # 1 scandir + stat of two markers + create/stat of the new one
+    assert (stats.scandir, stats.stat, stats.create) == (1, 3, 1)
+    # isdir x4, isfile+stat x2, create x1 for the per-season probe
+    assert stats.per_season_equivalent == 9
+    assert [p.first_complete_at for p in probes] == [
+        probe_season(str(tmp_path), season, ".fc").first_complete_at
+        for season in seasons
+    ]
+
+
+def test_probe_series_missing_folder(tmp_path):
+    season = Season(seasonNumber=1, totalEpisodeCount=1, episodeFileCount=1)
+    assert probe_series(str(tmp_path / "gone"), [season], ".fc") == [
+        probe_season(str(tmp_path / "gone"), season, ".fc")
+    ]
+    assert probe_series(str(tmp_path), [], ".fc") == []
+
+
+def test_indexed_probe_flags_gone_or_incomplete_seasons(tmp_path):
+    (tmp_path / "Season 2").mkdir()
+    seasons = [
+        Season(seasonNumber=1, totalEpisodeCount=3, episodeFileCount=3),
+        Season(seasonNumber=2, totalEpisodeCount=3, episodeFileCount=1),
+        Season(seasonNumber=3, totalEpisodeCount=3, episodeFileCount=0),
+    ]
+    index = {(str(tmp_path), 1): 1.0, (str(tmp_path), 2): 1.0}
+    probes = probe_series(str(tmp_path), seasons, ".fc", index=index)
+    assert [p.forget for p in probes] == [True, True, False]
+    assert all(p.first_complete_at is None for p in probes)
+    # Without an index there is nothing to forget
+    probes = probe_series(str(tmp_path), seasons, ".fc")
+    assert not any(p.forget for p in probes)
+
+
+def test_unreadable_series_folder_counts_as_empty(tmp_path, monkeypatch):
+    (tmp_path / "Season 1").mkdir()
+    season = Season(seasonNumber=1, totalEpisodeCount=3, episodeFileCount=3)
+
+    def denied(path):
+        raise PermissionError(13, "Permission denied", path)
+
+    monkeypatch.setattr(os, "scandir", denied)
+    index = {(str(tmp_path), 1): 1.0}
+    probe, = probe_series(str(tmp_path), [season], ".fc", index=index)
+    assert probe.first_complete_at is None
+    assert probe.forget is False  # may be readable again next run
@@ -0,0 +1,122 @@
+"""Tests for the on-disk Sonarr snapshot cache (fake Sonarr, fake clock)."""
+
+import httpx
+
+from app.series_cache import SnapshotCache
+from app.sonarr_client import SonarrClient, Tag
+
+SERIES = [
+    {"title": "One", "path": "/tv/One", "seasons": [{"seasonNumber": 1}]},
+    {"title": "Two", "path": "/tv/Two"},
+]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_client(etag=None):
+    calls = []
+    state = {"series": list(SERIES)}
+
+    def handler(request):
+        path = request.url.path
+        calls.append((path, dict(request.headers)))
+        if path == "/api/v3/series":
+            if etag and request.headers.get("If-None-Match") == etag:
+                return httpx.Response(304)
+            headers = {"ETag": etag} if etag else {}
+            return httpx.Response(200, json=state["series"], headers=headers)
+        return httpx.Response(200, json={})
+
+    client = SonarrClient(
+        "http://sonarr", "k", transport=httpx.MockTransport(handler))
+    calls.clear()
+    return client, calls, state
+
+
+def series_calls(calls):
+    return [c for c in calls if c[0] == "/api/v3/series"]
+
+
+def test_fresh_cache_skips_download(tmp_path):
+    clock = Clock()
+    client, calls, _ = make_client()
+    cache = SnapshotCache(str(tmp_path), ttl_seconds=600, clock=clock)
+    assert [s.title for s in cache.cached_series(client)] == ["One", "Two"]
+    clock.now += 60
+    assert [s.title for s in cache.cached_series(client)] == ["One", "Two"]
+    assert len(series_calls(calls)) == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_stale_cache_revalidates_with_etag(tmp_path):
+    clock = Clock()
+    client, calls, _ = make_client(etag='"v1"')
+    cache = SnapshotCache(str(tmp_path), ttl_seconds=600, clock=clock)
+    list(cache.cached_series(client))
+    clock.now += 601
+    assert [s.title for s in cache.cached_series(client)] == ["One", "Two"]
+    last = series_calls(calls)[-1][1]
+    assert last["if-none-match"] == '"v1"'
+    assert cache.stats.revalidated == 1
+    # Revalidation restarts the TTL.
+    clock.now += 60
+    list(cache.cached_series(client))
+    assert len(series_calls(calls)) == 2
+
+
+def test_stale_cache_without_validators_uses_content_hash(tmp_path):
+    clock = Clock()
+    client, calls, state = make_client()
+    cache = SnapshotCache(str(tmp_path), ttl_seconds=600, clock=clock)
+    list(cache.cached_series(client))
+    clock.now += 601
+    list(cache.cached_series(client))
+    assert cache.stats.revalidated == 1
+
+    state["series"] = SERIES[:1]
+    clock.now += 601
+    assert [s.title for s in cache.cached_series(client)] == ["One"]
+    assert cache.stats.misses == 2
+
+
+def test_corrupt_meta_is_a_miss(tmp_path):
+    clock = Clock()
+    client, calls, _ = make_client()
+    cache = SnapshotCache(str(tmp_path), ttl_seconds=600, clock=clock)
+    list(cache.cached_series(client))
+    (tmp_path / "series.meta.json").write_text("{not json")
+    list(cache.cached_series(client))
+    assert len(series_calls(calls)) == 2
+
+
+def test_cached_list(tmp_path):
+    clock = Clock()
+    fetched = []
+
+    def fetch():
+        fetched.append(1)
+        return [Tag(1, "keep")]
+
+    cache = SnapshotCache(str(tmp_path), ttl_seconds=600, clock=clock)
+    assert list(cache.cached_list("tags", fetch)) == [Tag(1, "keep")]
+    assert list(cache.cached_list("tags", fetch)) == [Tag(1, "keep")]
+    assert len(fetched) == 1
+
+
+def test_expire_forces_revalidation(tmp_path):
+    clock = Clock()
+    client, calls, state = make_client()
+    cache = SnapshotCache(str(tmp_path), ttl_seconds=600, clock=clock)
+    list(cache.cached_series(client))
+    state["series"] = SERIES[:1]
+    cache.expire("series")
+    clock.now += 60
+    assert [s.title for s in cache.cached_series(client)] == ["One"]
+    assert len(series_calls(calls)) == 2
+    cache.expire("missing")  # no entry, nothing to do
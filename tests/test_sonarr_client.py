@@ -0,0 +1,317 @@
+"""Tests for the Sonarr client against an in-process fake (MockTransport)."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.sonarr_client import (
+    AsyncSonarrClient,
+    RetryPolicy,
+    SonarrClient,
+    SonarrClientError,
+)
+
+SERIES = [
+    {
+        "id": 11,
+        "title": "Beta",
+        "sortTitle": "beta",
+        "year": 2019,
+        "path": "/tv/Beta",
+        "tags": [1],
+        "seasons": [
+            {
+                "seasonNumber": 1,
+                "statistics": {"totalEpisodeCount": 8, "episodeFileCount": 8},
+            },
+            {"seasonNumber": 2},
+        ],
+    },
+    {"title": "Alpha", "year": None, "path": "/tv/Alpha"},
+]
+TAGS = [{"id": 1, "label": "keep"}]
+EPISODE_FILES = {
+    11: [
+        {"id": 100 + n, "seasonNumber": 1 + n // 8, "size": 1000}
+        for n in range(10)
+    ],
+}
+
+NO_WAIT = RetryPolicy(retries=2, backoff=0.0)
+
+
+def fake_sonarr(fail_first=None, episode_files=None):
+    """Handler serving a tiny library; `fail_first` maps path -> statuses.
+
+    `episode_files` (series id -> file dicts) is modified by bulk deletes.
+    """
+    fail_first = {k: list(v) for k, v in (fail_first or {}).items()}
+    files = episode_files if episode_files is not None else {}
+    calls = []
+
+    def handler(request):
+        path = request.url.path
+        calls.append((request.method, path))
+        pending = fail_first.get(path)
+        if pending:
+            return httpx.Response(pending.pop(0))
+        if request.headers.get("X-Api-Key") != "secret":
+            return httpx.Response(401, text="Unauthorized")
+        if path == "/api/v3/system/status":
+            return httpx.Response(200, json={"version": "4.0.0"})
+        if path == "/api/v3/series":
+            return httpx.Response(200, json=SERIES)
+        if path == "/api/v3/tag":
+            return httpx.Response(200, json=TAGS)
+        if path == "/api/v3/rootfolder":
+            return httpx.Response(200, json=[{"path": "/tv"}])
+        if path == "/api/v3/episodefile" and request.method == "GET":
+            series_id = int(request.url.params["seriesId"])
+            return httpx.Response(200, json=files.get(series_id, []))
+        if path == "/api/v3/episodefile/bulk" and request.method == "DELETE":
+            ids = set(json.loads(request.content)["episodeFileIds"])
+            for series_id, entries in files.items():
+                files[series_id] = [f for f in entries if f["id"] not in ids]
+            return httpx.Response(200)
+        if path == "/api/v3/command" and request.method == "POST":
+            return httpx.Response(201, content=request.content)
+        return httpx.Response(404)
+
+    return handler, calls
+
+
+def test_parses_series_tags_and_root_folders():
+    handler, _ = fake_sonarr()
+    client = SonarrClient(
+        "http://sonarr/", "secret", transport=httpx.MockTransport(handler))
+    series = client.all_series()
+    assert [s.title for s in series] == ["Beta", "Alpha"]
+    assert list(series[0].tagsIds) == [1]
+    assert series[0].seasons[0].episodeFileCount == 8
+    assert series[0].seasons[1].totalEpisodeCount == 0
+    assert series[1].sortTitle == "Alpha"
+    assert series[1].year == 0
+    assert client.all_tags()[0].label == "keep"
+    assert client.root_folder()[0].path == "/tv"
+    assert len(client.timings) == 4
+
+
+def test_sync_client_retries_transient_get_failures():
+    handler, calls = fake_sonarr({"/api/v3/series": [502, 503]})
+    client = SonarrClient(
+        "http://sonarr", "secret",
+        retry=NO_WAIT, transport=httpx.MockTransport(handler))
+    assert len(client.all_series()) == 2
+    assert calls.count(("GET", "/api/v3/series")) == 3
+
+
+def test_sync_client_gives_up_after_retries():
+    handler, _ = fake_sonarr({"/api/v3/series": [502, 502, 502]})
+    client = SonarrClient(
+        "http://sonarr", "secret",
+        retry=NO_WAIT, transport=httpx.MockTransport(handler))
+    with pytest.raises(SonarrClientError, match="HTTP 502"):
+        client.all_series()
+
+
+def test_client_errors_are_not_retried():
+    handler, calls = fake_sonarr()
+    with pytest.raises(SonarrClientError, match="HTTP 401"):
+        SonarrClient(
+            "http://sonarr", "wrong",
+            retry=NO_WAIT, transport=httpx.MockTransport(handler))
+    assert len(calls) == 1
+
+
+def test_retry_policy_delay_is_bounded():
+    policy = RetryPolicy(retries=5, backoff=1.0, max_backoff=4.0)
+    for attempt in range(6):
+        assert 0 <= policy.delay(attempt) <= 4.0
+    assert policy.delay(0, retry_after=3.0) >= 3.0
+    assert not policy.should_retry("POST", 0, 503)
+    assert policy.should_retry("GET", 0, None)
+    assert not policy.should_retry("GET", 5, 503)
+
+
+def test_async_client_fetches_concurrently_with_retry():
+    handler, calls = fake_sonarr({"/api/v3/tag": [503]})
+
+    async def fetch():
+        async with AsyncSonarrClient(
+            "http://sonarr", "secret",
+            retry=NO_WAIT, transport=httpx.MockTransport(handler),
+        ) as client:
+            series, tags = await asyncio.gather(
+                client.all_series(), client.all_tags())
+            return series, tags, client.timings
+
+    series, tags, timings = asyncio.run(fetch())
+    assert [s.title for s in series] == ["Beta", "Alpha"]
+    assert tags[0].id == 1
+    assert calls[0] == ("GET", "/api/v3/system/status")
+    assert calls.count(("GET", "/api/v3/tag")) == 2
+    assert [t.status_code for t in timings if t.path == "/api/v3/tag"] == [
+        503, 200]
+
+
+def test_async_client_verify_failure_raises():
+    handler, _ = fake_sonarr()
+
+    async def connect():
+        async with AsyncSonarrClient(
+            "http://sonarr", "wrong",
+            retry=NO_WAIT, transport=httpx.MockTransport(handler),
+        ):
+            pass
+
+    with pytest.raises(SonarrClientError):
+        asyncio.run(connect())
+
+
+def test_iter_series_parses_chunked_stream():
+    body = json.dumps(SERIES).encode()
+    handler, _ = fake_sonarr()
+
+    def chunked(request):
+        if request.url.path == "/api/v3/series":
+            chunks = [body[i:i + 16] for i in range(0, len(body), 16)]
+            return httpx.Response(200, content=iter(chunks))
+        return handler(request)
+
+    client = SonarrClient(
+        "http://sonarr", "secret", transport=httpx.MockTransport(chunked))
+    it = client.iter_series()
+    assert next(it).title == "Beta"
+    assert [s.title for s in it] == ["Alpha"]
+
+
+def test_iter_series_rejects_truncated_body():
+    handler, _ = fake_sonarr()
+
+    def truncated(request):
+        if request.url.path == "/api/v3/series":
+            return httpx.Response(200, content=b'[{"title": "A"')
+        return handler(request)
+
+    client = SonarrClient(
+        "http://sonarr", "secret", transport=httpx.MockTransport(truncated))
+    with pytest.raises(SonarrClientError, match="Invalid series response"):
+        client.all_series()
+
+
+def test_series_records_are_compact():
+    """Slotted records with tuples use clearly less memory than the old
+    dict-backed dataclasses with lists (same input, tracemalloc)."""
+    import tracemalloc
+    from dataclasses import dataclass
+    from typing import List
+
+    from app.sonarr_client import _parse_series
+
+    @dataclass(frozen=True)
+    class OldSeason:
+        seasonNumber: int
+        totalEpisodeCount: int
+        episodeFileCount: int
+
+    @dataclass(frozen=True)
+    class OldSeries:
+        sortTitle: str
+        title: str
+        year: int
+        path: str
+        tagsIds: List[int]
+        seasons: List[OldSeason]
+
+    def old_parse(s):
+        return OldSeries(
+            s["sortTitle"], s["title"], s["year"], s["path"],
+            [int(x) for x in s["tags"]],
+            [
+                OldSeason(
+                    int(se["seasonNumber"]),
+                    int(se["statistics"]["totalEpisodeCount"]),
+                    int(se["statistics"]["episodeFileCount"]),
+                )
+                for se in s["seasons"]
+            ],
+        )
+
+    raw = [
+        {
+            "title": f"Show {i}", "sortTitle": f"show {i}", "year": 2000,
+            "path": f"/tv/Show {i}", "tags": [1, 2],
+            "seasons": [
+                {
+                    "seasonNumber": n,
+                    "statistics": {
+                        "totalEpisodeCount": 10, "episodeFileCount": 10},
+                }
+                for n in range(8)
+            ],
+        }
+        for i in range(500)
+    ]
+
+    def measure(parse):
+        tracemalloc.start()
+        try:
+            kept = [parse(r) for r in raw]
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert len(kept) == len(raw)
+        return size
+
+    assert measure(_parse_series) < 0.75 * measure(old_parse)
+    assert not hasattr(_parse_series(raw[0]), "__dict__")
+
+
+def test_episode_files_and_bulk_delete_in_batches():
+    files = {k: list(v) for k, v in EPISODE_FILES.items()}
+    handler, calls = fake_sonarr(episode_files=files)
+    client = SonarrClient(
+        "http://sonarr", "secret", transport=httpx.MockTransport(handler))
+    assert client.all_series()[0].id == 11
+
+    found = client.episode_files(11)
+    assert [f.seasonNumber for f in found] == [1] * 8 + [2] * 2
+    assert found[0].size == 1000
+
+    season_one = [f.id for f in found if f.seasonNumber == 1]
+    progress = []
+    assert client.delete_episode_files(
+        season_one, batch_size=3, on_batch=progress.append) == 8
+    assert calls.count(("DELETE", "/api/v3/episodefile/bulk")) == 3
+    assert progress == [3, 6, 8]
+    assert [f.seasonNumber for f in client.episode_files(11)] == [2, 2]
+    assert client.delete_episode_files([]) == 0
+
+
+def test_bulk_delete_is_not_retried():
+    handler, calls = fake_sonarr(
+        fail_first={"/api/v3/episodefile/bulk": [503]})
+    client = SonarrClient(
+        "http://sonarr", "secret",
+        retry=NO_WAIT, transport=httpx.MockTransport(handler))
+    with pytest.raises(SonarrClientError):
+        client.delete_episode_files([1, 2])
+    assert calls.count(("DELETE", "/api/v3/episodefile/bulk")) == 1
+
+
+def test_command_posts_over_the_pooled_client():
+    handler, calls = fake_sonarr()
+    client = SonarrClient(
+        "http://sonarr", "secret", transport=httpx.MockTransport(handler))
+    client.command("RefreshSeries", seriesId=11)
+    assert calls[-1] == ("POST", "/api/v3/command")
+
+    failing, calls = fake_sonarr(fail_first={"/api/v3/command": [503]})
+    client = SonarrClient(
+        "http://sonarr", "secret",
+        retry=NO_WAIT, transport=httpx.MockTransport(failing))
+    with pytest.raises(SonarrClientError, match="503"):
+        client.command("RefreshSeries", seriesId=11)
+    assert calls.count(("POST", "/api/v3/command")) == 1
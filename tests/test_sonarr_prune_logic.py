@@ -1,15 +1,20 @@
 """Unit tests for pure prune logic (no I/O)."""
 
+import random
 from datetime import datetime, timedelta
 
 import pytest
 
 from app.sonarr_prune_logic import (
     SeasonActionKind,
+    datetime_to_us,
     decide_season_prune,
+    decide_season_prune_batch,
     format_warning_time_left,
     resolve_keep_tag_ids,
     season_directory_name,
+    series_fingerprint,
+    series_next_due,
     series_should_keep,
 )
 
@@ -106,3 +111,114 @@ def test_warn_window_example(first, now, warn_days, expect_warn):
     if expect_warn:
         assert dec.kind == SeasonActionKind.WARN
         assert dec.time_until_removal is not None
+
+
+def _assert_batch_matches_scalar(now, firsts, remove_after_days, warn_days):
+    batch = decide_season_prune_batch(
+        now,
+        [None if f is None else datetime_to_us(f) for f in firsts],
+        remove_after_days=remove_after_days,
+        warn_days_infront=warn_days,
+    )
+    assert len(batch) == len(firsts)
+    for i, first in enumerate(firsts):
+        expected = decide_season_prune(
+            now,
+            first,
+            remove_after_days=remove_after_days,
+            warn_days_infront=warn_days,
+        )
+        assert batch.decision(i) == expected, (now, first)
+
+
+def test_batch_matches_scalar_on_random_inputs():
+    """Property check: batch and scalar agree on random dates/settings."""
+    rng = random.Random(20240601)
+    now = datetime(2024, 6, 30, 13, 0, 0, 123456)
+    for _ in range(200):
+        remove_after = rng.randint(0, 60)
+        warn_days = rng.randint(0, 5)
+        firsts = [
+            None if rng.random() < 0.1 else now - timedelta(
+                microseconds=rng.randint(-5 * 86_400_000_000,
+                                         70 * 86_400_000_000))
+            for _ in range(20)
+        ]
+        _assert_batch_matches_scalar(now, firsts, remove_after, warn_days)
+
+
+def test_batch_matches_scalar_on_window_edges():
+    """Exact boundaries of the odd WARN window and the REMOVE threshold."""
+    now = datetime(2024, 3, 31, 2, 30)
+    remove_after, warn_days = 30, 2
+    removal = timedelta(days=remove_after)
+    edges = []
+    for offset in (
+        removal,
+        removal - timedelta(days=warn_days),
+        removal - timedelta(days=warn_days - 1),
+    ):
+        for us in (-1, 0, 1):
+            edges.append(now - offset + timedelta(microseconds=us))
+    _assert_batch_matches_scalar(now, edges, remove_after, warn_days)
+    kinds = {
+        d.kind for d in (
+            decide_season_prune(
+                now, f,
+                remove_after_days=remove_after,
+                warn_days_infront=warn_days,
+            )
+            for f in edges
+        )
+    }
+    assert kinds == {
+        SeasonActionKind.WARN,
+        SeasonActionKind.REMOVE,
+        SeasonActionKind.ACTIVE,
+    }
+
+
+def test_series_next_due_is_first_warning_or_removal():
+    first = [
+        None,
+        datetime(2024, 1, 10),
+        datetime(2024, 1, 5),
+    ]
+    due = series_next_due(first, remove_after_days=30, warn_days_infront=2)
+    assert due == datetime(2024, 2, 2)
+    # Just before `due` every season is still ACTIVE; at `due` it warns.
+    for sd in first[1:]:
+        before = decide_season_prune(
+            due - timedelta(seconds=1), sd,
+            remove_after_days=30, warn_days_infront=2)
+        assert before.kind == SeasonActionKind.ACTIVE
+    at_due = decide_season_prune(
+        due, first[2], remove_after_days=30, warn_days_infront=2)
+    assert at_due.kind == SeasonActionKind.WARN
+
+    assert series_next_due(
+        first, remove_after_days=30, warn_days_infront=0
+    ) == datetime(2024, 2, 4)
+    assert series_next_due(
+        [None], remove_after_days=30, warn_days_infront=1) is None
+
+
+def test_series_fingerprint_tracks_relevant_fields():
+    from app.sonarr_client import Season, Series
+
+    serie = Series(
+        sortTitle="a", title="A", year=2020, path="/tv/A",
+        tagsIds=(2, 1), seasons=(Season(1, 8, 8), Season(2, 8, 3)),
+    )
+    fp = series_fingerprint(serie, (30, 1))
+    same = Series(
+        sortTitle="other", title="Other", year=1999, path="/tv/A",
+        tagsIds=(1, 2), seasons=(Season(2, 8, 3), Season(1, 8, 8)),
+    )
+    assert series_fingerprint(same, (30, 1)) == fp
+    assert series_fingerprint(serie, (31, 1)) != fp
+    more_files = Series(
+        sortTitle="a", title="A", year=2020, path="/tv/A",
+        tagsIds=(2, 1), seasons=(Season(1, 8, 8), Season(2, 8, 4)),
+    )
+    assert series_fingerprint(more_files, (30, 1)) != fp
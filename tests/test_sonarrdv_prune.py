@@ -1,3 +1,5 @@
+import os
+
 from app.sonarrdv_prune import SONARRPRUNE
 
 
@@ -63,3 +65,941 @@ def test_config_parsing(tmp_path):
     assert isinstance(obj.tags_to_keep, list)
     assert obj.tags_to_keep == ["tag1", "tag2"]
     assert obj.mail_receiver == ["a@example.test", "b@example.test"]
+
+
+def _library(root):
+    from app.sonarr_client import Season, Series
+
+    media = []
+    for i in range(12):
+        path = root / f"Show {i:02d}"
+        seasons = []
+        for n in range(1, 4):
+            (path / f"Season {n}").mkdir(parents=True)
+            complete = (i + n) % 3 != 0
+            seasons.append(Season(n, 4, 4 if complete else 2))
+            if complete and i % 2:
+                marker = path / f"Season {n}" / ".firstcomplete"
+                marker.touch()
+                # Old enough to be removed (well past 30 days)
+                os.utime(marker, (1_000_000_000, 1_000_000_000))
+        media.append(Series(
+            sortTitle=f"show {i:02d}", title=f"Show {i:02d}", year=2020,
+            path=str(path), tagsIds=[7] if i == 5 else [], seasons=seasons,
+        ))
+    return media
+
+
+def _prune_library(tmp_path, name, workers, batch_decide_min_seasons=0):
+    from app.season_scan import SeasonScanner
+
+    ini = make_sample_ini(tmp_path)
+    obj = SONARRPRUNE(config_path=str(ini))
+    obj.dry_run = True
+    obj.batch_decide_min_seasons = batch_decide_min_seasons
+    obj.log_filePath = str(tmp_path / f"{name}.log")
+    root = tmp_path / name
+    media = _library(root)
+    scanner = SeasonScanner(obj._probe_series, workers) if workers else None
+    try:
+        counts = obj._prune_batch(media, [7], scanner)
+    finally:
+        if scanner is not None:
+            scanner.close()
+    obj.close_log()
+    lines = [
+        line.split(" - ", 1)[1].replace(str(root), "")
+        for line in open(obj.log_filePath).read().splitlines()
+    ]
+    return counts, lines
+
+
+def test_parallel_scan_matches_serial(tmp_path):
+    serial = _prune_library(tmp_path, "serial", 0)
+    parallel = _prune_library(tmp_path, "parallel", 4)
+    assert serial[0] == parallel[0]
+    assert serial[0][0] > 0
+    assert any("PRUNE: REMOVED" in line for line in serial[1])
+    assert [
+        line for line in serial[1] if "first complete" not in line
+    ] == [
+        line for line in parallel[1] if "first complete" not in line
+    ]
+
+
+def test_batch_decisions_match_serial(tmp_path):
+    serial = _prune_library(tmp_path, "serial", 0)
+    batch = _prune_library(tmp_path, "batch", 0, batch_decide_min_seasons=1)
+    assert serial[0] == batch[0]
+    assert [
+        line for line in serial[1] if "first complete" not in line
+    ] == [
+        line for line in batch[1] if "first complete" not in line
+    ]
+
+
+def test_state_db_imports_markers_and_forgets_removed(tmp_path):
+    from app.state_store import FirstCompleteStore
+
+    ini = make_sample_ini(tmp_path)
+    obj = SONARRPRUNE(config_path=str(ini))
+    obj.log_filePath = str(tmp_path / "prune.log")
+    obj.write_marker_files = False
+    media = _library(tmp_path / "lib")
+    obj.state_store = FirstCompleteStore(str(tmp_path / "state.db"))
+    obj._state_index = obj.state_store.load_all()
+
+    removed, _ = obj._prune_batch(media, [7], None)
+    obj.state_store.commit()
+    index = obj.state_store.load_all()
+    obj.state_store.close()
+
+    assert removed > 0
+    # Removed (old) seasons are gone from disk and from the index; newly
+    # complete ones are indexed without writing a marker.
+    assert all(ts != 1_000_000_000 for ts in index.values())
+    for (path, number), _ts in index.items():
+        assert not os.path.exists(
+            os.path.join(path, f"Season {number}", ".firstcomplete"))
+
+
+def test_deletion_queue_removes_same_seasons_as_inline(tmp_path):
+    from app.deletion_queue import DeletionQueue
+
+    ini = make_sample_ini(tmp_path)
+    obj = SONARRPRUNE(config_path=str(ini))
+    obj.log_filePath = str(tmp_path / "prune.log")
+    inline = obj._prune_batch(_library(tmp_path / "inline"), [7], None)
+
+    obj.deletion_queue = DeletionQueue(2)
+    root = tmp_path / "queued"
+    media = _library(root)
+    queued = obj._prune_batch(media, [7], None)
+    obj._finish_deletions(obj.deletion_queue.close())
+
+    assert queued == inline
+    assert sorted(p.relative_to(root) for p in root.rglob("*")) == sorted(
+        p.relative_to(tmp_path / "inline")
+        for p in (tmp_path / "inline").rglob("*")
+    )
+
+
+def test_api_remove_mode_deletes_episode_files_in_bulk(tmp_path):
+    import dataclasses
+    import json
+
+    import httpx
+
+    from app.sonarr_client import SonarrClient
+
+    files = {
+        i + 1: [
+            {"id": (i + 1) * 100 + n * 10 + k, "seasonNumber": n,
+             "size": 1000}
+            for n in range(1, 4) for k in range(2)
+        ]
+        for i in range(12)
+    }
+    bulk_calls = []
+
+    def handler(request):
+        if request.url.path == "/api/v3/episodefile/bulk":
+            ids = json.loads(request.content)["episodeFileIds"]
+            bulk_calls.append(ids)
+            return httpx.Response(200)
+        if request.url.path == "/api/v3/episodefile":
+            return httpx.Response(
+                200, json=files[int(request.url.params["seriesId"])])
+        return httpx.Response(200, json={})
+
+    ini = make_sample_ini(tmp_path)
+    obj = SONARRPRUNE(config_path=str(ini))
+    obj.log_filePath = str(tmp_path / "prune.log")
+    obj.jsonl_log = True
+    obj.remove_mode = "api"
+    obj.sonarrNode = SonarrClient(
+        "http://sonarr", "secret", transport=httpx.MockTransport(handler))
+    media = [
+        dataclasses.replace(serie, id=i + 1)
+        for i, serie in enumerate(_library(tmp_path / "lib"))
+    ]
+    old_markers = [
+        p for p in (tmp_path / "lib").rglob(".firstcomplete")
+        if p.stat().st_mtime == 1_000_000_000
+    ]
+
+    removed, _ = obj._prune_batch(media, [7], None)
+    obj._remove_via_api()
+
+    # Odd shows have old markers on their complete seasons; Show 05 is
+    # excluded by its tag.
+    due = [
+        (i, n) for i in range(1, 12, 2) if i != 5
+        for n in range(1, 4) if (i + n) % 3 != 0
+    ]
+    assert removed == len(due) and len(bulk_calls) == 1
+    assert sorted(bulk_calls[0]) == sorted(
+        (i + 1) * 100 + n * 10 + k for i, n in due for k in range(2))
+    lib = tmp_path / "lib"
+    for i, n in due:
+        assert not (lib / f"Show {i:02d}" / f"Season {n}"
+                    / ".firstcomplete").exists()
+    assert all(
+        marker.exists() for marker in old_markers
+        if marker.parent.parent.name == "Show 05"
+    )
+    obj.close_log()
+    deleted = [
+        json.loads(line) for line in open(tmp_path / "prune.jsonl")
+        if '"deleted"' in line
+    ]
+    assert sorted((e["series"], e["season"]) for e in deleted) == [
+        (f"Show {i:02d}", n) for i, n in due]
+    assert all(
+        (e["files"], e["bytes_freed"]) == (2, 2000) for e in deleted)
+
+
+def test_api_remove_mode_keeps_markers_of_failed_batches(tmp_path):
+    import dataclasses
+
+    import httpx
+
+    from app.sonarr_client import SonarrClient
+
+    bulk_calls = []
+
+    def handler(request):
+        if request.url.path == "/api/v3/episodefile/bulk":
+            bulk_calls.append(request)
+            return httpx.Response(200 if len(bulk_calls) == 1 else 500)
+        if request.url.path == "/api/v3/episodefile":
+            serie_id = int(request.url.params["seriesId"])
+            return httpx.Response(200, json=[
+                {"id": serie_id * 100 + n * 10 + k, "seasonNumber": n}
+                for n in range(1, 4) for k in range(2)
+            ])
+        return httpx.Response(200, json={})
+
+    ini = make_sample_ini(tmp_path)
+    obj = SONARRPRUNE(config_path=str(ini))
+    obj.log_filePath = str(tmp_path / "prune.log")
+    obj.remove_mode = "api"
+    obj.sonarrNode = SonarrClient(
+        "http://sonarr", "secret", transport=httpx.MockTransport(handler))
+    media = [
+        dataclasses.replace(serie, id=i + 1)
+        for i, serie in enumerate(_library(tmp_path / "lib"))
+    ]
+    obj._prune_batch(media, [7], None)
+    queued = [
+        (serie.path, season.seasonNumber)
+        for serie, season in obj._api_removals
+    ]
+    # The first batch holds the first two queued seasons exactly.
+    original = obj.sonarrNode.delete_episode_files
+    obj.sonarrNode.delete_episode_files = (
+        lambda ids, **kw: original(ids, batch_size=4, **kw))
+    obj._remove_via_api()
+
+    assert len(bulk_calls) == 2
+    for i, (path, number) in enumerate(queued):
+        marker = os.path.join(path, f"Season {number}", ".firstcomplete")
+        assert os.path.exists(marker) == (i >= 2)
+    assert obj.metrics.deleted_files.value() == 4
+
+
+def test_api_remove_mode_keeps_seasons_without_episode_files(tmp_path):
+    import dataclasses
+
+    import httpx
+
+    from app.sonarr_client import SonarrClient
+
+    def handler(request):
+        if request.url.path == "/api/v3/episodefile":
+            serie_id = int(request.url.params["seriesId"])
+            # Sonarr lost track of Show 01's files
+            return httpx.Response(200, json=[] if serie_id == 2 else [
+                {"id": serie_id * 100 + n, "seasonNumber": n}
+                for n in range(1, 4)
+            ])
+        return httpx.Response(200, json={})
+
+    obj = SONARRPRUNE(config_path=str(make_sample_ini(tmp_path)))
+    obj.log_filePath = str(tmp_path / "prune.log")
+    obj.remove_mode = "api"
+    obj.sonarrNode = SonarrClient(
+        "http://sonarr", "secret", transport=httpx.MockTransport(handler))
+    media = [
+        dataclasses.replace(serie, id=i + 1)
+        for i, serie in enumerate(_library(tmp_path / "lib"))
+    ]
+    obj._prune_batch(media, [7], None)
+    obj._remove_via_api()
+    obj.close_log()
+
+    show = tmp_path / "lib" / "Show 01"
+    kept = sorted(p.parent.name for p in show.rglob(".firstcomplete"))
+    assert kept == ["Season 1", "Season 3"]
+    assert not list((tmp_path / "lib" / "Show 03").rglob(".firstcomplete"))
+    log = open(tmp_path / "prune.log").read()
+    assert log.count("PRUNE: KEPT - Show 01 (2020)") == 2
+
+
+def test_refresh_targets_touched_series_until_threshold(tmp_path):
+    import dataclasses
+
+    from app.emby_client import MediaServer, RefreshResult
+
+    ini = make_sample_ini(tmp_path)
+    obj = SONARRPRUNE(config_path=str(ini))
+    obj.log_filePath = str(tmp_path / "prune.log")
+    obj.media_servers = [MediaServer("Emby1", "http://emby", "secret")]
+    calls = []
+    obj.trigger_database_update_sonarr = (
+        lambda ids=None: calls.append(("sonarr", ids)))
+
+    def refresh(server, paths=None):
+        calls.append((server.name, paths))
+        return RefreshResult(server.name, True, 0.1, "refreshed")
+
+    obj.refresh_media_server = refresh
+
+    obj.refresh_libraries()
+    assert calls == []
+
+    media = [
+        dataclasses.replace(serie, id=i + 1)
+        for i, serie in enumerate(_library(tmp_path / "lib"))
+    ]
+    obj.touched_series = {s.path: s for s in media[:3]}
+    obj.refresh_full_threshold = 3
+    obj.refresh_libraries()
+    # Sonarr and the media servers are refreshed concurrently
+    assert sorted(calls) == [
+        ("Emby1", [s.path for s in media[:3]]),
+        ("sonarr", [1, 2, 3]),
+    ]
+
+    calls.clear()
+    obj.refresh_full_threshold = 2
+    obj.refresh_libraries()
+    assert sorted(calls) == [("Emby1", None), ("sonarr", None)]
+
+
+def test_media_servers_from_config_refresh_concurrently(tmp_path):
+    import httpx
+
+    ini = make_sample_ini(tmp_path)
+    ini.write_text(ini.read_text().replace(
+        "[EMBY1]\nENABLED = false", "[EMBY1]\nENABLED = true"
+    ) + """
+[JELLYFIN:living room]
+URL = http://jellyfin:8096
+TOKEN = jelly
+
+[EMBY:down]
+URL = http://emby-down
+TOKEN = secret
+
+[EMBY:off]
+ENABLED = false
+URL = http://emby-off
+""")
+    obj = SONARRPRUNE(config_path=str(ini))
+    assert [(m.name, m.kind) for m in obj.media_servers] == [
+        ("Emby1", "emby"), ("living room", "jellyfin"), ("down", "emby")]
+
+    requests = []
+
+    def handler(request):
+        requests.append((request.url.host, request.method, request.url.path))
+        if request.url.host == "emby-down":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(204)
+
+    obj.dry_run = True
+    obj.remove_mode = "api"  # no Sonarr refresh
+    obj.refresh_retries = 1
+    obj.sonarrdv_retry_backoff = 0.01
+    obj.log_filePath = str(tmp_path / "prune.log")
+    obj.media_transport = httpx.MockTransport(handler)
+    obj.touched_series = {s.path: s for s in _library(tmp_path / "lib")}
+    obj.refresh_full_threshold = 0
+    try:
+        lines = obj.refresh_libraries()
+        # One client per server, all on one connection pool
+        clients = list(obj._emby_clients.values())
+        assert len(clients) == 3
+        assert all(c._session is obj._media_session for c in clients)
+    finally:
+        obj.close()
+
+    # One line per media server for the summary mail
+    assert len(lines) == 3
+    for name in ("Emby1: library in ", "living room: library in ",
+                 "down failed after "):
+        assert any(
+            line.startswith(f"Prune - Refresh {name}") for line in lines)
+    assert ("localhost", "POST", "/Emby/Library/Refresh") in requests
+    assert ("jellyfin", "POST", "/Library/Refresh") in requests
+    # The dead server was retried once, then reported
+    assert requests.count(("emby-down", "POST", "/Emby/Library/Refresh")) == 2
+    obj.close_log()
+    log = open(tmp_path / "prune.log").read()
+    assert "Prune - Refresh Emby1: library in " in log
+    assert "Prune - Refresh living room: library in " in log
+    assert "Prune - Refresh down failed after " in log
+
+
+def test_media_server_with_bad_items_response_is_reported(tmp_path):
+    import httpx
+
+    from app.emby_client import MediaServer
+
+    def handler(request):
+        return httpx.Response(200, text="<html>proxy login</html>")
+
+    obj = SONARRPRUNE(config_path=str(make_sample_ini(tmp_path)))
+    obj.refresh_retries = 0
+    obj.media_transport = httpx.MockTransport(handler)
+    server = MediaServer("Emby1", "http://emby", "secret")
+    try:
+        result = obj.refresh_media_server(server, ["/tv/Show 01"])
+    finally:
+        obj.close()
+    assert not result.ok
+    assert result.detail.startswith("Invalid items response")
+
+
+def test_jsonl_log_records_decisions(tmp_path):
+    import json
+
+    ini = make_sample_ini(tmp_path)
+    obj = SONARRPRUNE(config_path=str(ini))
+    obj.dry_run = True
+    obj.jsonl_log = True
+    obj.log_filePath = str(tmp_path / "prune.log")
+    obj.writeLog(True, "Prune - started.\n")
+    removed, notified = obj._prune_batch(_library(tmp_path / "lib"), [7], None)
+    obj.close_log()
+
+    events = [
+        json.loads(line)
+        for line in open(tmp_path / "prune.jsonl").read().splitlines()
+    ]
+    kinds = [e["event"] for e in events]
+    assert kinds.count("remove") == removed
+    assert kinds.count("warn") == notified
+    assert kinds.count("keep") == 1
+    remove = next(e for e in events if e["event"] == "remove")
+    assert remove["dry_run"] is True
+    assert {"series", "year", "path", "season", "first_complete", "ts"} <= (
+        remove.keys())
+    # Dry run: nothing freed, so no bytes are claimed
+    assert "bytes_freed" not in remove
+    text = open(obj.log_filePath).read().splitlines()
+    assert text[0].endswith(" - Prune - started.")
+    assert sum("PRUNE: REMOVED" in line for line in text) == removed
+
+    # Inline removal knows the bytes freed right away
+    obj = SONARRPRUNE(config_path=str(ini))
+    obj.jsonl_log = True
+    obj.log_filePath = str(tmp_path / "inline" / "prune.log")
+    media = _library(tmp_path / "inline" / "lib")
+    for marker in (tmp_path / "inline" / "lib").rglob(".firstcomplete"):
+        if marker.stat().st_mtime == 1_000_000_000:
+            (marker.parent / "episode.mkv").write_bytes(b"x" * 100)
+    removed, _ = obj._prune_batch(media, [7], None)
+    obj.close_log()
+
+    events = [
+        json.loads(line)
+        for line in open(tmp_path / "inline" / "prune.jsonl")
+    ]
+    removes = [e for e in events if e["event"] == "remove"]
+    assert len(removes) == removed
+    assert all(e["bytes_freed"] == 100 for e in removes)
+
+
+def test_summary_mail_is_sent_directly_and_failures_are_logged(
+        tmp_path, monkeypatch, caplog):
+    import threading
+
+    import app.mailer
+
+    obj = SONARRPRUNE(config_path=str(make_sample_ini(tmp_path)))
+    obj.log_filePath = str(tmp_path / "prune.log")
+    obj.writeLog(True, "Prune - started.\n")
+    obj._get_event_log().flush()
+    sent = []
+
+    def send_mail(message, **kwargs):
+        sent.append((threading.current_thread(), kwargs["timeout"]))
+
+    monkeypatch.setattr(app.mailer, "send_mail", send_mail)
+    obj._mail_summary(1, 2)
+    assert sent == [(threading.current_thread(), obj.mail_timeout)]
+
+    def timeout(message, **kwargs):
+        raise TimeoutError
+
+    monkeypatch.setattr(app.mailer, "send_mail", timeout)
+    obj._mail_summary(1, 2)
+    assert "Mail server did not answer" in caplog.text
+    obj.close_log()
+    log = open(obj.log_filePath).read()
+    assert log.count("Prune - Mail Sent to") == 1
+
+
+def test_metrics_count_decisions_and_deleted_bytes(tmp_path):
+    ini = make_sample_ini(tmp_path)
+    obj = SONARRPRUNE(config_path=str(ini))
+    obj.log_filePath = str(tmp_path / "prune.log")
+    media = _library(tmp_path / "lib")
+    for marker in (tmp_path / "lib").rglob(".firstcomplete"):
+        if marker.stat().st_mtime == 1_000_000_000:
+            (marker.parent / "episode.mkv").write_bytes(b"x" * 100)
+
+    removed, notified = obj._prune_batch(media, [7], None)
+    obj.metrics_textfile = str(tmp_path / "sonarr_prune.prom")
+    obj._write_metrics()
+
+    seasons = obj.metrics.seasons
+    assert seasons.value(decision="remove") == removed
+    assert seasons.value(decision="warn") == notified
+    # Every season of the 11 series without the keep tag
+    assert sum(
+        seasons.value(decision=d)
+        for d in ("remove", "warn", "active", "incomplete")
+    ) == 33
+    assert obj.metrics.deleted_files.value() == 2 * removed
+    assert obj.metrics.deleted_bytes.value() == 100 * removed
+    text = open(obj.metrics_textfile).read()
+    assert f'sonarr_prune_seasons_total{{decision="remove"}} {removed}' in text
+    assert 'sonarr_prune_season_seconds_count{decision="remove"}' in text
+
+
+def test_daemon_schedule_from_config(tmp_path):
+    from datetime import datetime
+
+    import pytest
+
+    ini = make_sample_ini(tmp_path)
+    obj = SONARRPRUNE(config_path=str(ini), daemon=True)
+    when = datetime(2024, 1, 1, 12, 0)
+    assert obj.daemon_schedule.next_after(when) == datetime(2024, 1, 1, 13)
+
+    ini.write_text(ini.read_text() + "\n[DAEMON]\nCRON = 30 2 * * *\n")
+    obj = SONARRPRUNE(config_path=str(ini), daemon=True)
+    assert obj.daemon_schedule.next_after(when) == datetime(2024, 1, 2, 2, 30)
+
+    # An invalid CRON only matters to the daemon.
+    ini.write_text(ini.read_text().replace("30 2 * * *", "61 2 * * *"))
+    assert SONARRPRUNE(config_path=str(ini)).daemon_schedule is None
+    with pytest.raises(SystemExit):
+        SONARRPRUNE(config_path=str(ini), daemon=True)
+
+
+def test_incremental_run_skips_unchanged_series(tmp_path):
+    import dataclasses
+    import time
+
+    from app.sonarr_client import Season
+
+    ini = make_sample_ini(tmp_path)
+    obj = SONARRPRUNE(config_path=str(ini))
+    obj.dry_run = True
+    obj.incremental = True
+    obj.log_filePath = str(tmp_path / "prune.log")
+    obj.state_db_path = str(tmp_path / "state.db")
+    media = _library(tmp_path / "lib")
+
+    def prune(media):
+        full = obj._open_series_state([7])
+        counts = obj._prune_batch(media, [7], None)
+        if full:
+            obj.series_state.set_meta("last_full_sweep", time.time())
+        obj.series_state.close()
+        obj.series_state = None
+        return full, counts, obj.series_evaluated, obj.series_skipped
+
+    full, first, evaluated, skipped = prune(media)
+    assert (full, evaluated, skipped) == (True, 11, 0)
+
+    # Only series with seasons due (odd ones, old markers) are evaluated.
+    full, again, evaluated, skipped = prune(media)
+    assert (full, evaluated, skipped) == (False, 5, 6)
+    assert again == first
+
+    # A changed series is evaluated again.
+    media[0] = dataclasses.replace(
+        media[0], seasons=tuple(media[0].seasons) + (Season(4, 2, 1),))
+    _, _, evaluated, skipped = prune(media)
+    assert (evaluated, skipped) == (6, 5)
+
+    # The periodic full sweep evaluates everything.
+    obj.full_sweep_hours = 0
+    full, _, evaluated, skipped = prune(media)
+    assert (full, evaluated, skipped) == (True, 11, 0)
+
+
+def test_calendar_lists_upcoming_removals_and_wakes_daemon(tmp_path):
+    from datetime import datetime, timedelta
+
+    from app.prune_calendar import PruneCalendar
+
+    ini = make_sample_ini(tmp_path)
+    obj = SONARRPRUNE(config_path=str(ini), daemon=True)
+    obj.dry_run = True
+    obj.log_filePath = str(tmp_path / "prune.log")
+    obj.calendar = PruneCalendar()
+    started = datetime.now()
+    obj._prune_batch(_library(tmp_path / "lib"), [7], None)
+    obj._save_calendar()
+
+    # Seasons completed during this run are due in 30 days (warning 1 day
+    # earlier); old seasons are already past due and not "upcoming".
+    assert obj.upcoming_removals(29, now=started) == []
+    upcoming = obj.upcoming_removals(31, now=started)
+    assert upcoming
+    assert all(e.kind == "remove" for e in upcoming)
+    assert {e.series_path for e in upcoming} == {
+        str(tmp_path / "lib" / f"Show {i:02d}") for i in range(0, 12, 2)
+    }
+
+    obj.calendar = None
+    wake = obj.next_run_after(started)
+    assert wake == started + timedelta(hours=1)  # schedule comes first
+    obj.daemon_schedule = type(obj.daemon_schedule)(60 * 86400)
+    wake = obj.next_run_after(started)
+    assert timedelta(days=28) < wake - started < timedelta(days=29, hours=1)
+
+
+def _two_instance_ini(tmp_path):
+    ini = make_sample_ini(tmp_path)
+    ini.write_text(ini.read_text() + """
+[SONARR:4k]
+URL = http://sonarr-4k
+TOKEN = secret-4k
+MAX_CONNECTIONS = 4
+
+[SONARR:anime]
+URL = http://sonarr-anime
+TOKEN = secret
+
+[SONARR:old]
+ENABLED = false
+URL = http://sonarr-old
+""")
+    return ini
+
+
+def test_named_sonarr_sections_are_instances(tmp_path):
+    obj = SONARRPRUNE(config_path=str(_two_instance_ini(tmp_path)))
+
+    assert [i.name for i in obj.sonarr_instances] == ["4k", "anime"]
+    four_k, anime = obj.sonarr_instances
+    assert (four_k.url, four_k.token, four_k.max_connections) == (
+        "http://sonarr-4k", "secret-4k", 4)
+    assert anime.max_connections == obj.sonarrdv_max_connections
+    assert anime.retries == obj.sonarrdv_retries
+
+
+def _two_instance_pruner(tmp_path):
+    """Dry-run pruner for the 4k and anime instances on fake Sonarrs."""
+    import httpx
+
+    from benchmarks.fake_sonarr import FakeSonarr
+    from benchmarks.library import make_library
+
+    servers = {}
+    for host, key, seed in (
+        ("sonarr-4k", "secret-4k", 1),
+        ("sonarr-anime", "secret", 2),
+    ):
+        series = make_library(
+            str(tmp_path / host), 20, due_ratio=0.5, seed=seed)
+        servers[host] = FakeSonarr(series, [], api_key=key)
+
+    ini = _two_instance_ini(tmp_path)
+    ini.write_text(ini.read_text().replace(
+        "DRY_RUN = false", "DRY_RUN = true"))
+    obj = SONARRPRUNE(config_path=str(ini))
+    obj.sonarrdv_enabled = False
+    obj.log_filePath = str(tmp_path / "prune.log")
+    obj.sonarr_transport = httpx.MockTransport(
+        lambda request: servers[request.url.host].handle(request))
+    return obj, servers
+
+
+def test_run_prunes_every_instance_with_one_report(tmp_path):
+    obj, servers = _two_instance_pruner(tmp_path)
+    try:
+        obj.run()
+    finally:
+        obj.close()
+
+    four_k = obj._instance_pruners["4k"]
+    anime = obj._instance_pruners["anime"]
+    assert four_k.series_evaluated == anime.series_evaluated == 20
+    log = open(tmp_path / "prune.log").read()
+    assert "Prune - Sonarr 4k: " in log
+    assert "Prune - Sonarr anime: " in log
+    removed = log.count("PRUNE: REMOVED")
+    assert removed > 0
+    assert f"There were {removed} seasons removed." in log
+    assert all(s.requests for s in servers.values())
+    # Each instance has its own calendar; the run merges them.
+    assert four_k.calendar_path.endswith("prune_calendar.4k.json")
+    assert os.path.exists(four_k.calendar_path)
+    assert os.path.exists(anime.calendar_path)
+    assert len(obj.calendar) == len(four_k.calendar) + len(anime.calendar)
+    # Built from the config, not copied: own limiter, the config's settings
+    assert four_k.instance_name == "4k" and four_k.dry_run
+    assert four_k.sonarr_limiter is not anime.sonarr_limiter
+    assert four_k.state_db_path.endswith("sonarr_prune_state.4k.db")
+
+
+def test_profiled_run_covers_every_instance(tmp_path):
+    obj, _ = _two_instance_pruner(tmp_path)
+    try:
+        obj.profiled_run()
+    finally:
+        obj.close()
+
+    report = (tmp_path / "prune.profile.txt").read_text()
+    table = report.split("\n\n")[1].splitlines()
+    # 20 series per instance in the per-series table
+    assert len(table) == 1 + 40
+    # Instance scans run on worker threads and still show up in cProfile.
+    assert "(_scan_instance)" in report
+    assert all(
+        "_probe_series" not in vars(pruner)
+        for pruner in obj._instance_pruners.values()
+    )
+
+
+def _aged_show(show, ages_days, size):
+    """Sonarr series JSON for `show` with complete seasons of given ages."""
+    import time
+
+    seasons = []
+    for n, age_days in enumerate(ages_days, 1):
+        season_dir = show / f"Season {n}"
+        season_dir.mkdir(parents=True)
+        marker = season_dir / ".firstcomplete"
+        marker.touch()
+        ts = time.time() - age_days * 86400
+        os.utime(marker, (ts, ts))
+        seasons.append({
+            "seasonNumber": n,
+            "statistics": {
+                "totalEpisodeCount": 4,
+                "episodeFileCount": 4,
+                "sizeOnDisk": size,
+            },
+        })
+    return {
+        "id": 1, "title": show.name, "year": 2020, "path": str(show),
+        "tags": [], "seasons": seasons,
+    }
+
+
+def test_free_space_target_removes_oldest_due_seasons_only(tmp_path):
+    from app.free_space import disk_free
+    from benchmarks.fake_sonarr import FakeSonarr
+
+    gb = 1024 ** 3
+    root = tmp_path / "tv"
+    series = [_aged_show(root / "Show", (40, 80, 60, 70, 50, 5), 10 * gb)]
+    sonarr = FakeSonarr(series, [], root_folders=[str(root)])
+
+    def run(target_gb):
+        obj = SONARRPRUNE(config_path=str(make_sample_ini(tmp_path)))
+        obj.dry_run = True  # reclaimed bytes are Sonarr's sizes
+        obj.sonarrdv_url = "http://sonarr"
+        obj.free_space_target_gb = target_gb
+        obj.log_filePath = str(tmp_path / "prune.log")
+        obj.sonarr_transport = sonarr.transport
+        try:
+            obj.run()
+        finally:
+            obj.close()
+        return open(tmp_path / "prune.log").read()
+
+    # 25 GB short: the three oldest of the five due seasons go
+    log = run((disk_free(str(root)) + 25 * gb) / gb)
+    removed = [
+        line.split("Season ")[1][:2]
+        for line in log.splitlines() if "PRUNE: REMOVED" in line
+    ]
+    assert removed == ["02", "04", "03"]
+    assert "There were 3 seasons removed." in log
+    assert "Reclaimed 30.00 GB from 3 seasons, kept 2 due seasons." in log
+    assert "Season 06" in log  # too young, not a candidate
+
+    # Enough free space: nothing is removed
+    log = run(1)
+    assert "PRUNE: REMOVED" not in log
+    assert "Reclaimed 0.00 GB from 0 seasons, kept 5 due seasons." in log
+
+
+def test_free_space_target_is_shared_by_instances(tmp_path):
+    import httpx
+
+    from app.free_space import disk_free
+    from benchmarks.fake_sonarr import FakeSonarr
+
+    gb = 1024 ** 3
+    servers = {}
+    for host, key, name, ages in (
+        ("sonarr-4k", "secret-4k", "Four", (80, 50, 5)),
+        ("sonarr-anime", "secret", "Anime", (70, 40)),
+    ):
+        root = tmp_path / host
+        servers[host] = FakeSonarr(
+            [_aged_show(root / name, ages, 10 * gb)], [],
+            api_key=key, root_folders=[str(root)])
+
+    ini = _two_instance_ini(tmp_path)
+    ini.write_text(ini.read_text().replace(
+        "DRY_RUN = false", "DRY_RUN = true"))
+    obj = SONARRPRUNE(config_path=str(ini))
+    obj.sonarrdv_enabled = False
+    # Both root folders are on one disk: 25 GB short in total
+    obj.free_space_target_gb = (disk_free(str(tmp_path)) + 25 * gb) / gb
+    obj.log_filePath = str(tmp_path / "prune.log")
+    obj.sonarr_transport = httpx.MockTransport(
+        lambda request: servers[request.url.host].handle(request))
+    try:
+        obj.run()
+    finally:
+        obj.close()
+
+    log = open(tmp_path / "prune.log").read()
+    removed = [
+        " - ".join(line.split(" - ")[2:4]).split(" (removed")[0]
+        for line in log.splitlines()
+        if "PRUNE: REMOVED" in line
+    ]
+    # Oldest first across both instances; one report for the disk
+    assert removed == [
+        "Four (2020) - Season 01",
+        "Anime (2020) - Season 01",
+        "Four (2020) - Season 02",
+    ]
+    assert log.count("Prune - Free space on ") == 1
+    assert "Reclaimed 30.00 GB from 3 seasons, kept 1 due seasons." in log
+    assert "Prune - Sonarr 4k: 2 seasons removed" in log
+    assert "Prune - Sonarr anime: 1 seasons removed" in log
+    assert "There were 3 seasons removed." in log
+
+
+def test_free_space_holds_seasons_on_unreadable_disks(tmp_path):
+    from datetime import datetime
+
+    from app.free_space import FreeSpaceTarget
+    from app.sonarr_client import Season, Series
+
+    obj = SONARRPRUNE(config_path=str(make_sample_ini(tmp_path)))
+    obj.log_filePath = str(tmp_path / "prune.log")
+
+    def device(path):
+        raise PermissionError(path)
+
+    obj.free_space = FreeSpaceTarget([], 1, device=device)
+    serie = Series(
+        "show", "Show", 2020, str(tmp_path / "Show"), (), (), id=1)
+    obj._add_space_candidate(
+        serie, Season(1, 4, 4), datetime.now(), str(tmp_path / "Show"))
+
+    assert obj.free_space.unreadable == 1
+    assert obj._reclaim_space([obj]) == {obj: 0}
+    obj.close_log()
+    assert "kept 1 due seasons on disks that could not be read" in open(
+        tmp_path / "prune.log").read()
+
+
+def test_run_with_removals_expires_series_cache(tmp_path):
+    from benchmarks.fake_sonarr import FakeSonarr
+    from benchmarks.library import make_library
+
+    series = make_library(str(tmp_path / "tv"), 10, due_ratio=0.5, seed=3)
+    sonarr = FakeSonarr(series, [])
+
+    def run():
+        obj = SONARRPRUNE(config_path=str(make_sample_ini(tmp_path)))
+        obj.sonarrdv_url = "http://sonarr"
+        obj.cache_enabled = True
+        obj.cache_ttl_minutes = 60
+        obj.log_filePath = str(tmp_path / "prune.log")
+        obj.sonarr_transport = sonarr.transport
+        try:
+            obj.run()
+        finally:
+            obj.close()
+        return obj
+
+    assert run().touched_series
+    run()
+    # Within the TTL, but the first run removed seasons
+    assert sonarr.requests.count("GET /api/v3/series") == 2
+
+
+def test_daemon_runs_share_the_async_sonarr_client(tmp_path):
+    from benchmarks.fake_sonarr import FakeSonarr
+    from benchmarks.library import make_library
+
+    series = make_library(str(tmp_path / "tv"), 10, seed=4)
+    sonarr = FakeSonarr(series, [])
+    obj = SONARRPRUNE(config_path=str(make_sample_ini(tmp_path)))
+    obj.sonarrdv_url = "http://sonarr"
+    obj.dry_run = True
+    obj.log_filePath = str(tmp_path / "prune.log")
+    obj.sonarr_transport = sonarr.transport
+    try:
+        obj.run()
+        client, runner = obj._async_sonarr, obj._async_runner
+        obj.run()
+        assert client is not None
+        assert (obj._async_sonarr, obj._async_runner) == (client, runner)
+        # This run's series and tag requests only
+        assert [t.path for t in sorted(client.timings, key=str)] == [
+            "/api/v3/series", "/api/v3/tag"]
+    finally:
+        obj.close()
+    assert obj._async_sonarr is None
+    assert sonarr.requests.count("GET /api/v3/series") == 2
+
+
+def test_state_db_forgets_season_deleted_outside_prune(tmp_path):
+    import time
+
+    from app.sonarr_client import Season, Series
+    from app.state_store import FirstCompleteStore
+
+    obj = SONARRPRUNE(config_path=str(make_sample_ini(tmp_path)))
+    obj.log_filePath = str(tmp_path / "prune.log")
+    show = tmp_path / "lib" / "Show"
+    show.mkdir(parents=True)
+    serie = Series(
+        "show", "Show", 2020, str(show), (), (Season(1, 4, 4),), id=1)
+    store = obj.state_store = FirstCompleteStore(str(tmp_path / "state.db"))
+    store.record(str(show), 1, time.time() - 60 * 86400)
+    store.commit()
+
+    def prune():
+        obj._state_index = store.load_all()
+        removed, _ = obj._prune_batch([serie], [], None)
+        store.commit()
+        return removed
+
+    # The folder was deleted by hand: the old time must not survive it
+    assert prune() == 0
+    assert store.load_all() == {}
+    # Downloaded again: a new season, not 60 days old
+    (show / "Season 1").mkdir()
+    assert prune() == 0
+    assert (show / "Season 1").exists()
+    store.close()
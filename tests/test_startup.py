@@ -0,0 +1,82 @@
+"""Import-time checks for the driver (python -X importtime)."""
+
+import subprocess
+import sys
+
+# Only needed when mail, Pushover, Emby, the metrics endpoint or
+# --profile are enabled.
+OPTIONAL_MODULES = (
+    "smtplib",
+    "email.mime",
+    "chump",
+    "app.mailer",
+    "app.emby_client",
+    "app.profiler",
+    "cProfile",
+    "http.server",
+)
+
+# Only needed when their feature is enabled: state database, snapshot
+# cache, sorting, deletion queue, free-space target, Pushover queue and
+# the daemon schedule.
+FEATURE_MODULES = (
+    "app.state_store",
+    "sqlite3",
+    "app.series_cache",
+    "pickle",
+    "app.external_sort",
+    "app.deletion_queue",
+    "app.free_space",
+    "app.notifier",
+    "app.scheduler",
+)
+
+
+def _import_times(statement):
+    """(module, cumulative microseconds) for a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times.append((name.strip(), int(cumulative)))
+    return times
+
+
+def test_driver_does_not_import_optional_integrations():
+    times = _import_times("import app.sonarrdv_prune")
+    modules = {name for name, _ in times}
+
+    assert "app.sonarrdv_prune" in modules
+    loaded = sorted(
+        name for name in modules
+        if any(
+            name == opt or name.startswith(opt + ".")
+            for opt in OPTIONAL_MODULES
+        )
+    )
+    slowest = sorted(times, key=lambda t: t[1], reverse=True)[:10]
+    assert loaded == [], f"{loaded} imported at startup; slowest: {slowest}"
+
+
+def test_driver_does_not_import_feature_modules():
+    modules = {name for name, _ in _import_times("import app.sonarrdv_prune")}
+    assert sorted(set(FEATURE_MODULES) & modules) == []
+
+
+def test_optional_integrations_load_on_use():
+    result = subprocess.run(
+        [
+            sys.executable, "-c",
+            "import sys, app.sonarrdv_prune as m; m._app_module('mailer'); "
+            "print(' '.join(sys.modules))",
+        ],
+        capture_output=True, text=True, check=True,
+    )
+    modules = result.stdout.split()
+    assert "app.mailer" in modules
+    assert "smtplib" in modules
@@ -0,0 +1,61 @@
+"""Tests for the SQLite run state (first-complete index, series state)."""
+
+from app.state_store import FirstCompleteStore, SeriesStateStore
+
+
+def test_record_commit_and_load(tmp_path):
+    db = str(tmp_path / "state.db")
+    store = FirstCompleteStore(db)
+    store.record("/tv/A", 1, 100.0)
+    store.record("/tv/A", 2, 200.0)
+    assert store.load_all() == {}  # buffered until commit
+    store.commit()
+    assert store.load_all() == {("/tv/A", 1): 100.0, ("/tv/A", 2): 200.0}
+    store.close()
+
+    reopened = FirstCompleteStore(db)
+    assert reopened.get("/tv/A", 2) == 200.0
+    assert reopened.get("/tv/B", 1) is None
+    reopened.close()
+
+
+def test_forget_and_replace(tmp_path):
+    store = FirstCompleteStore(str(tmp_path / "state.db"))
+    store.record("/tv/A", 1, 100.0)
+    store.commit()
+    store.forget("/tv/A", 1)
+    store.commit()
+    assert store.load_all() == {}
+
+    store.record("/tv/A", 1, 100.0)
+    store.forget("/tv/A", 1)  # forget wins over a pending record
+    store.record("/tv/A", 3, 1.0)
+    store.record("/tv/A", 3, 2.0)
+    store.close()
+    assert FirstCompleteStore(
+        str(tmp_path / "state.db")).load_all() == {("/tv/A", 3): 2.0}
+
+
+def test_series_state_roundtrip_and_clear(tmp_path):
+    db = str(tmp_path / "state.db")
+    # Shares the database file with the first-complete index.
+    FirstCompleteStore(db).close()
+    store = SeriesStateStore(db)
+    store.update("/tv/A", "fp-a", 1_700_000_000.0)
+    store.update("/tv/B", "fp-b", None)
+    assert store.load_all() == {}
+    store.close()
+
+    store = SeriesStateStore(db)
+    assert store.load_all() == {
+        "/tv/A": ("fp-a", 1_700_000_000.0),
+        "/tv/B": ("fp-b", None),
+    }
+    assert store.get_meta("last_full_sweep") is None
+    store.set_meta("last_full_sweep", 123.0)
+    store.clear()
+    assert store.load_all() == {}
+    store.close()
+    reopened = SeriesStateStore(db)
+    assert reopened.get_meta("last_full_sweep") == 123.0
+    reopened.close()